@@ -1,6 +1,7 @@
 from flask import Flask
 from config import Config
 from app.extensions import db
+from app.services import auth, attachments, events, notice_scheduler, club_recommender
 from datetime import timedelta
 
 def create_app(config_class=Config):
@@ -10,18 +11,35 @@ def create_app(config_class=Config):
     # Initialize Flask extensions
     db.init_app(app)
 
+    # Verify X-Auth-Token once per request and expose the identity on g
+    auth.init_app(app)
+
+    # Stream multipart uploads into the attachment store instead of buffering them
+    attachments.init_app(app)
+
+    # Pub/sub hub feeding the server-sent events stream
+    events.init_app(app)
+
+    # Flips notice visibility at publish_at/expire_at
+    notice_scheduler.init_app(app)
+
+    # Inverted index of club interest tags for recommendations
+    club_recommender.init_app(app)
+
     # Register Blueprints
     from app.routes.main import main_bp
     from app.routes.auth import auth_bp
     from app.routes.student import student_bp
     from app.routes.faculty import faculty_bp
     from app.routes.admin import admin_bp
+    from app.routes.notifications import notifications_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(student_bp)
     app.register_blueprint(faculty_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(notifications_bp)
     
     # Register error handlers or other common logic here
     
@@ -96,6 +96,19 @@ class Club(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     
     coordinator = db.relationship('Faculty', backref='coordinated_clubs')
+    # Normalized form of `interests`, kept in sync on flush (see app/services/club_tags.py)
+    tags = db.relationship('ClubInterest', secondary='club_interest_link', backref='clubs')
+
+class ClubInterest(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    tag = db.Column(db.String(100), unique=True, nullable=False)  # lower-case, single-spaced
+
+club_interest_link = db.Table(
+    'club_interest_link',
+    db.Column('club_id', db.Integer, db.ForeignKey('club.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('interest_id', db.Integer, db.ForeignKey('club_interest.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_club_interest_link_interest', 'interest_id', 'club_id')
+)
 
 class ClubRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -103,10 +116,17 @@ class ClubRequest(db.Model):
     club_id = db.Column(db.Integer, db.ForeignKey('club.id'), nullable=False)
     status = db.Column(db.String(20), default='pending') # pending, approved, rejected
     requested_at = db.Column(db.DateTime, default=datetime.utcnow)
+    decided_at = db.Column(db.DateTime) # set when status leaves 'pending' (see app/services/clubs.py)
     
     student = db.relationship('Student', backref='club_requests')
     club = db.relationship('Club', backref='requests')
 
+    # Roster pages and per-status counts for a club; one request per student and club
+    __table_args__ = (
+        db.Index('ix_club_request_club_status', 'club_id', 'status', 'id'),
+        db.UniqueConstraint('student_id', 'club_id', name='uq_club_request_student_club'),
+    )
+
 class Timetable(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     # Flexible columns for PDF ingestion
@@ -124,6 +144,26 @@ class Timetable(db.Model):
     semester = db.Column(db.Integer, default=4, nullable=False)
     academic_year = db.Column(db.String(10), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_timetable_batch_year', 'batch', 'academic_year'),
+        db.Index('ix_timetable_faculty_year', 'faculty_raw', 'academic_year'),
+        db.Index('ix_timetable_subject', 'subject_raw'),
+    )
+
+class CohortSubject(db.Model):
+    # Distinct (semester, division, batch) -> subject rows of Timetable, rebuilt
+    # whenever Timetable changes (see app/services/student_exams.py)
+    id = db.Column(db.Integer, primary_key=True)
+    semester = db.Column(db.Integer, nullable=False)
+    division = db.Column(db.String(5))
+    batch = db.Column(db.String(10))
+    academic_year = db.Column(db.String(10))
+    subject = db.Column(db.String(100), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_cohort_subject_cohort', 'semester', 'division', 'batch', 'academic_year', 'subject'),
+    )
+
 # StudentQuery and QueryResponse models removed
 
 
@@ -137,12 +177,39 @@ class Scholarship(db.Model):
     max_family_income = db.Column(db.Float, default=0.0)
     eligible_categories = db.Column(db.String(200))  # general,obc,sc,st,ews
     eligible_genders = db.Column(db.String(50))  # male,female,other,all
+    # Bitmasks of the two lists above, kept in sync on flush (see app/services/scholarships.py)
+    category_mask = db.Column(db.Integer, nullable=False, default=0)
+    gender_mask = db.Column(db.Integer, nullable=False, default=0)
     amount = db.Column(db.Float, nullable=False)
     deadline = db.Column(db.Date, nullable=False)
     official_website = db.Column(db.String(500))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_scholarship_active_deadline', 'is_active', 'deadline'),
+    )
+
+class ScholarshipProfile(db.Model):
+    # Details a student last entered in the scholarship finder; the Student
+    # record itself no longer stores cgpa/income/category/gender
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), primary_key=True)
+    cgpa = db.Column(db.Float, nullable=False, default=0.0)
+    family_income = db.Column(db.Float)
+    category = db.Column(db.String(20))
+    gender = db.Column(db.String(10))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ScholarshipMatch(db.Model):
+    # Precomputed by app/services/scholarship_matcher.py
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), primary_key=True)
+    scholarship_id = db.Column(db.Integer, db.ForeignKey('scholarship.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_scholarship_match_scholarship', 'scholarship_id', 'student_id'),
+        {'sqlite_with_rowid': False},
+    )
+
 class Notice(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -157,14 +224,34 @@ class Notice(db.Model):
     target_class_id = db.Column(db.String(20)) # e.g., 'CS-A'
     
     urgency = db.Column(db.String(20), default='low') # urgent, moderate, low
-    is_active = db.Column(db.Boolean, default=True)
+    urgency_rank = db.Column(db.Integer, nullable=False, default=1) # 3=urgent, 2=moderate, 1=low; kept in sync with urgency
+    is_active = db.Column(db.Boolean, default=True) # maintained by the notice scheduler from publish_at/expire_at
+    is_published = db.Column(db.Boolean, default=True) # False until a scheduled notice's publish_at is reached
     publish_at = db.Column(db.DateTime, default=datetime.utcnow)
     expire_at = db.Column(db.DateTime)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Feed order (urgency_rank, created_at, id) all descending, so the index is scanned backwards
+    __table_args__ = (
+        db.Index('ix_notice_feed', 'is_active', 'urgency_rank', 'created_at', 'id'),
+        db.Index('ix_notice_publish_pending', 'is_published', 'publish_at'),
+        db.Index('ix_notice_active_expire', 'is_active', 'expire_at'),
+    )
+
     author = db.relationship('User')
+    audiences = db.relationship('NoticeAudience', backref='notice', cascade='all, delete-orphan')
+
+class NoticeAudience(db.Model):
+    # One row per role a notice is visible to, keyed 'role:branch:semester:class' with '*' for "any"
+    id = db.Column(db.Integer, primary_key=True)
+    notice_id = db.Column(db.Integer, db.ForeignKey('notice.id', ondelete='CASCADE'), nullable=False)
+    audience_key = db.Column(db.String(120), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_notice_audience_key_notice', 'audience_key', 'notice_id'),
+    )
 
 # ScholarshipApplication model removed
 
@@ -180,6 +267,11 @@ class Notification(db.Model):
     
     user = db.relationship('User', backref='notifications')
 
+    # Serves unread counts and the per-user inbox
+    __table_args__ = (
+        db.Index('ix_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
 # Mentorship model removed
 
 
@@ -200,6 +292,12 @@ class QueryThread(db.Model):
     student = db.relationship('Student', backref='query_threads')
     faculty = db.relationship('Faculty', backref='assigned_queries')
 
+    # Back the keyset-paginated inboxes, newest (updated_at, id) first
+    __table_args__ = (
+        db.Index('ix_query_thread_faculty_status_updated', 'faculty_id', 'status', 'updated_at'),
+        db.Index('ix_query_thread_student_updated', 'student_id', 'updated_at'),
+    )
+
 class QueryPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     thread_id = db.Column(db.Integer, db.ForeignKey('query_thread.id'), nullable=False)
@@ -211,6 +309,11 @@ class QueryPost(db.Model):
     thread = db.relationship('QueryThread', backref=db.backref('posts', order_by=created_at))
     author = db.relationship('User')
 
+    # SQLite appends the rowid, so this also serves "WHERE thread_id = ? AND id < ? ORDER BY id"
+    __table_args__ = (
+        db.Index('ix_query_post_thread', 'thread_id'),
+    )
+
 class QueryAttachment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('query_post.id'), nullable=False)
@@ -218,9 +321,16 @@ class QueryAttachment(db.Model):
     file_type = db.Column(db.String(50))
     file_name = db.Column(db.String(200)) # Original name
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # SHA-256 of the blob in the attachment store; rows sharing it are its references
+    content_hash = db.Column(db.String(64), index=True)
+    file_size = db.Column(db.Integer)
     
     post = db.relationship('QueryPost', backref='attachments')
 
+    __table_args__ = (
+        db.Index('ix_query_attachment_post', 'post_id'),
+    )
+
 
 class ExamSchedule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -231,6 +341,8 @@ class ExamSchedule(db.Model):
     end_date = db.Column(db.Date, nullable=False)
     is_published = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on every committed change to the schedule or its entries; exports are cached per version
+    version = db.Column(db.Integer, nullable=False, default=1)
 
 class Exam(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -254,11 +366,17 @@ class ExamTimetable(db.Model):
     subject_name = db.Column(db.String(100), nullable=True)
     
     exam_date = db.Column(db.Date, nullable=False)
-    start_time = db.Column(db.String(10), nullable=False) # e.g. "10:00"
-    end_time = db.Column(db.String(10), nullable=False)   # e.g. "13:00"
+    start_time = db.Column(db.Time, nullable=False) # e.g. 10:00
+    end_time = db.Column(db.Time, nullable=False)   # e.g. 13:00
     room_number = db.Column(db.String(50), nullable=False)
     faculty_id = db.Column(db.Integer, db.ForeignKey('faculty.id')) # Invigilator
     
     # Relationships
     exam_schedule = db.relationship('ExamSchedule', backref=db.backref('timetable_entries', lazy=True))
     faculty = db.relationship('Faculty', backref='exam_duties')
+
+    __table_args__ = (
+        # Conflict checks load every exam on the submitted dates
+        db.Index('ix_exam_timetable_date_start', 'exam_date', 'start_time'),
+        db.Index('ix_exam_timetable_schedule_date', 'exam_schedule_id', 'exam_date', 'start_time'),
+    )
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, jsonify, request, session
+from flask import Blueprint, render_template, jsonify, request, session, g
 from app.models import User, Faculty, Student, Course, Notice, ExamSchedule, Exam, ExamTimetable
 from app.extensions import db
-from werkzeug.security import generate_password_hash
-from datetime import datetime
-from sqlalchemy import case, or_
+from app.services.passwords import hash_password
+from app.services.notifications import fan_out
+from app.services import notice_audience, notice_feed, notice_scheduler, club_tags, scholarship_matcher, exam_conflicts, exam_generator, exam_timetable, exam_exports
+from datetime import datetime, timezone
 import io
 import csv
 from flask import make_response
@@ -58,7 +59,7 @@ def add_faculty():
         user = User(
             username=username,
             email=data['email'],
-            password_hash=generate_password_hash('faculty123'),
+            password_hash=hash_password('faculty123'),
             role='faculty',
             full_name=data['full_name'],
             department=data['department']
@@ -112,47 +113,83 @@ def update_faculty(id):
     return jsonify({'success': True})
 
 # --- Notices ---
+def _notice_viewer():
+    role = g.role or request.args.get('role', 'student')
+    student = Student.query.get(g.student_id) if role == 'student' and g.student_id else None
+    return notice_audience.viewer_profile(role, student)
+
+def _revalidated(etag, build):
+    # Answer from the ETag alone when the client's copy is current
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 @admin_bp.route('/api/notices', methods=['GET'])
 def get_notices():
-    role = request.args.get('role', 'student')
-    query = Notice.query.filter(Notice.is_active == True)
-    
-    if role == 'student':
-        query = query.filter(or_(Notice.visible_to == 'student', Notice.visible_to == 'both'))
-    elif role == 'faculty':
-        query = query.filter(or_(Notice.visible_to == 'faculty', Notice.visible_to == 'both'))
-        
-    urgency_order = case((Notice.urgency == 'urgent', 1), (Notice.urgency == 'moderate', 2), else_=3)
-    notices = query.order_by(urgency_order, Notice.created_at.desc()).all()
-    
-    result = []
-    for n in notices:
-        result.append({
-            'id': n.id,
-            'title': n.title,
-            'content': n.content,
-            'notice_type': n.urgency,
-            'created_at': n.created_at.isoformat(),
-            'author': n.author.full_name if n.author else 'System',
-        })
-    return jsonify(result)
+    try:
+        limit, cursor = notice_feed.parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    profile = _notice_viewer()
+    return _revalidated(notice_feed.feed_etag(profile, limit, cursor),
+                        lambda: notice_feed.feed_page(profile, limit, cursor))
+
+@admin_bp.route('/api/notices/<int:notice_id>', methods=['GET'])
+def get_notice(notice_id):
+    notice = notice_feed.load_notice(_notice_viewer(), notice_id)
+    if not notice:
+        return jsonify({'error': 'Notice not found'}), 404
+    return _revalidated(notice_feed.notice_etag(notice), lambda: notice_feed.serialize_notice(notice))
 
 @admin_bp.route('/api/notices/publish', methods=['POST'])
 def publish_notice():
-    if 'user_id' not in session: return jsonify({'error': 'Unauthorized'}), 401
+    if not g.user_id: return jsonify({'error': 'Unauthorized'}), 401
+    if g.role not in ('faculty', 'admin'):
+        return jsonify({'error': 'Permission denied'}), 403
     data = request.get_json()
-    
+
+    try:
+        expire_at = datetime.strptime(data['expiry_date'], '%Y-%m-%d') if data.get('expiry_date') else None
+        publish_at = datetime.fromisoformat(data['publish_at']) if data.get('publish_at') else datetime.utcnow()
+    except ValueError:
+        return jsonify({'error': 'expiry_date must be YYYY-MM-DD and publish_at ISO 8601'}), 400
+    if publish_at.tzinfo is not None:
+        # Stored and compared as naive UTC, like utcnow()
+        publish_at = publish_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # Future notices stay hidden until the scheduler publishes them
+    now = datetime.utcnow()
+    published = publish_at <= now
+    active = published and not (expire_at and expire_at <= now)
+
+    # Audience keys are derived from the targeting columns when the notice is flushed
     notice = Notice(
         title=data['title'],
         content=data['content'],
-        created_by_user_id=session['user_id'],
-        created_by_role=session['role'],
+        created_by_user_id=g.user_id,
+        created_by_role=g.role,
         visible_to=data['visible_to'],
-        urgency=data.get('urgency', 'low')
+        target_branch=data.get('target_branch') or None,
+        target_semester=data.get('target_semester') or None,
+        target_class_id=data.get('target_class_id') or None,
+        urgency=data.get('urgency', 'low'),
+        publish_at=publish_at,
+        expire_at=expire_at,
+        is_published=published,
+        is_active=active
     )
     db.session.add(notice)
     db.session.commit()
-    return jsonify({'success': True})
+
+    notice_scheduler.schedule(notice)
+    if active:
+        notice_scheduler.announce(notice)
+    return jsonify({'success': True, 'scheduled': not published})
 
 # --- Exam Management (Integrated from admin.py) ---
 
@@ -178,37 +215,218 @@ def create_exam_schedule():
 def manage_timetable():
     data = request.get_json()
     entries = data if isinstance(data, list) else [data]
-    results = []
-    for entry in entries:
-        existing = ExamTimetable.query.get(entry.get('id')) if entry.get('id') else None
-        if existing:
-            # Update logic simplified for brevity
-            pass
-        else:
-            new_entry = ExamTimetable(
-                exam_schedule_id=entry['exam_schedule_id'],
-                subject_id=entry['subject_id'],
-                exam_date=datetime.strptime(entry['exam_date'], '%Y-%m-%d').date(),
-                start_time=entry['start_time'],
-                end_time=entry['end_time'],
-                room_number=entry['room_number'],
-                faculty_id=entry.get('faculty_id')
-            )
-            db.session.add(new_entry)
-            results.append({'status': 'created'})
-    
+
+    # Validate everything before writing anything
+    batch = exam_timetable.prepare(entries)
+    if batch.errors:
+        return jsonify({'success': False, 'error': 'Invalid entries', 'errors': batch.errors,
+                        'results': batch.results}), 400
+
+    # Every clash in one response; nothing is written while any remain
+    conflicts = exam_conflicts.check_submission(batch.slots, batch.replacing_ids)
+    if conflicts or request.args.get('dry_run') == '1':
+        status = 409 if conflicts else 200
+        return jsonify({'success': not conflicts, 'conflicts': conflicts,
+                        'error': f'{len(conflicts)} scheduling conflicts' if conflicts else None}), status
+
+    results = exam_timetable.apply(batch)
     db.session.commit()
     return jsonify({'success': True, 'results': results})
 
+@admin_bp.route('/api/admin/exams/generate/<int:schedule_id>', methods=['POST'])
+def generate_exam_timetable(schedule_id):
+    if g.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    schedule = ExamSchedule.query.get(schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+    dry_run = request.args.get('dry_run') == '1'
+    replace = bool(data.get('replace'))
+    if not dry_run and not replace and ExamTimetable.query.filter_by(exam_schedule_id=schedule_id).first():
+        return jsonify({'error': 'Schedule already has entries; pass "replace": true to regenerate'}), 409
+
+    try:
+        entries, metrics = exam_generator.generate(
+            schedule,
+            slots=data.get('slots') or exam_generator.DEFAULT_SLOTS,
+            rooms=data.get('rooms'),
+            unavailable=exam_generator.parse_unavailable(data.get('unavailable')),
+            skip_weekends=data.get('skip_weekends', True),
+            seed=data.get('seed', 0),
+            ignore_schedule_entries=replace
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid generator options: {e}'}), 400
+
+    result = {'success': True, 'dry_run': dry_run, 'metrics': metrics,
+              'entries': [exam_generator.serialize_entry(e) for e in entries]}
+    if metrics['unplaced'] and not data.get('allow_partial'):
+        # A partial timetable is only saved when asked for explicitly
+        result.update(success=False, unplaced=metrics['unplaced'],
+                      error=f"{len(metrics['unplaced'])} exams could not be placed; "
+                            f'add days, slots or rooms, or pass "allow_partial": true')
+        return jsonify(result), 409
+    if dry_run:
+        return jsonify(result)
+
+    if replace:
+        ExamTimetable.query.filter_by(exam_schedule_id=schedule_id).delete(synchronize_session=False)
+    db.session.add_all([ExamTimetable(
+        exam_schedule_id=e['exam_schedule_id'], subject_name=e['subject_name'], exam_date=e['exam_date'],
+        start_time=e['start_time'], end_time=e['end_time'], room_number=e['room_number'], faculty_id=e['faculty_id']
+    ) for e in entries])
+    db.session.commit()
+    return jsonify(result)
+
+@admin_bp.route('/api/admin/exams/publish/<int:schedule_id>', methods=['POST'])
+def publish_exam_schedule(schedule_id):
+    if g.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    schedule = ExamSchedule.query.get(schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+
+    schedule.is_published = True
+    db.session.commit()
+
+    # Students are notified by one INSERT ... SELECT on the background worker
+    fan_out(
+        {'role': 'student'},
+        'Exam Schedule Released',
+        f'The schedule for {schedule.name} has been published.',
+        'exam'
+    )
+    return jsonify({'success': True, 'message': 'Schedule published and students notified'})
+
+# --- Exam schedule exports (streamed, cached per schedule version and inputs) ---
+
+def _exportable_schedule(schedule_id):
+    """The schedule if the caller may export it: admins any, everyone else only published ones."""
+    schedule = ExamSchedule.query.get(schedule_id)
+    if not schedule or not (schedule.is_published or g.role == 'admin'):
+        return None
+    return schedule
+
+@admin_bp.route('/api/admin/exams/<int:schedule_id>/export.csv')
+def export_exam_schedule(schedule_id):
+    if g.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    schedule = _exportable_schedule(schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+    filename = f"exam-schedule-{exam_exports.slug(schedule.name)}.csv"
+    return exam_exports.serve(schedule, filename, exam_exports.schedule_csv(schedule), 'text/csv',
+                              exam_exports.schedule_csv_inputs(schedule))
+
+@admin_bp.route('/api/admin/exams/<int:schedule_id>/seating')
+def list_seating_sheets(schedule_id):
+    if g.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    schedule = _exportable_schedule(schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+    return jsonify([{'room': room, 'filename': filename}
+                    for room, filename in exam_exports.schedule_rooms(schedule)])
+
+@admin_bp.route('/api/admin/exams/<int:schedule_id>/seating/<path:room>')
+def export_seating_sheet(schedule_id, room):
+    if g.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    schedule = _exportable_schedule(schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+    rooms = dict(exam_exports.schedule_rooms(schedule))
+    if room not in rooms:
+        return jsonify({'error': 'Room not in schedule'}), 404
+    # Not cached: the sheet follows the student roster, which has no version
+    return exam_exports.stream(rooms[room], exam_exports.seating_sheet(schedule, room), 'text/csv')
+
+@admin_bp.route('/api/exams/<int:schedule_id>/calendar/cohort.ics')
+def export_cohort_calendar(schedule_id):
+    if not g.user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if g.role == 'student':
+        # Students get their own cohort's calendar
+        student = Student.query.get(g.student_id) if g.student_id else None
+        if not student:
+            return jsonify({'error': 'Student not found'}), 404
+        semester, division, batch = student.current_semester, student.division, student.batch
+    else:
+        semester = request.args.get('semester', type=int)
+        division = request.args.get('division') or None
+        batch = request.args.get('batch') or None
+        if semester is None:
+            return jsonify({'error': 'semester is required'}), 400
+
+    schedule = _exportable_schedule(schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+    return exam_exports.serve(
+        schedule, exam_exports.cohort_filename(semester, division, batch),
+        exam_exports.cohort_calendar(schedule, semester, division, batch), 'text/calendar',
+        exam_exports.cohort_calendar_inputs(schedule, semester, division, batch)
+    )
+
+@admin_bp.route('/api/exams/<int:schedule_id>/calendar/invigilator.ics')
+def export_invigilator_calendar(schedule_id):
+    if g.role == 'admin':
+        faculty_id = request.args.get('faculty_id', type=int)
+        if faculty_id is None:
+            return jsonify({'error': 'faculty_id is required'}), 400
+    elif g.role == 'faculty' and g.faculty_id:
+        # Faculty only get their own duties
+        faculty_id = g.faculty_id
+    else:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    schedule = _exportable_schedule(schedule_id)
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+    return exam_exports.serve(
+        schedule, exam_exports.invigilator_filename(faculty_id),
+        exam_exports.invigilator_calendar(schedule, faculty_id), 'text/calendar'
+    )
+
 # --- Common / Clubs ---
 @admin_bp.route('/api/clubs')
 def get_clubs():
     # Publicly accessible, but maintained here or in common
     from app.models import Club
+    tags = request.args.getlist('tag')
+    if tags:
+        # ?tag=coding&tag=music: clubs sharing any of the tags, most matches first
+        return jsonify([{'id': c.id, 'name': c.name, 'matched_tags': matched}
+                        for c, matched in club_tags.clubs_with_tags(tags)])
     clubs = Club.query.filter(Club.is_active == True).all()
     # ... logic ...
     return jsonify([{'id': c.id, 'name': c.name} for c in clubs])
 
+@admin_bp.route('/api/clubs/tags')
+def autocomplete_club_tags():
+    limit = min(max(request.args.get('limit', club_tags.AUTOCOMPLETE_LIMIT, type=int), 1), 50)
+    rows = club_tags.autocomplete(request.args.get('q', ''), limit)
+    return jsonify([{'tag': tag, 'clubs': count} for tag, count in rows])
+
+@admin_bp.route('/api/clubs/<int:club_id>/similar')
+def get_similar_clubs(club_id):
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 20)
+    return jsonify([{'id': c.id, 'name': c.name, 'category': c.category, 'shared_tags': shared}
+                    for c, shared in club_tags.similar_clubs(club_id, limit)])
+
+@admin_bp.route('/api/admin/scholarships/eligible-counts')
+def scholarship_eligible_counts():
+    # From the precomputed matches; refreshed by scripts/match_scholarships.py
+    if g.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify([{
+        'id': scholarship.id,
+        'name': scholarship.name,
+        'deadline': scholarship.deadline.isoformat(),
+        'eligible_students': count
+    } for scholarship, count in scholarship_matcher.eligible_counts()])
+
 @admin_bp.route('/api/common/subjects')
 def get_common_subjects():
     from app.models import Timetable
@@ -1,8 +1,9 @@
 from flask import Blueprint, request, jsonify, session, g
-from werkzeug.security import check_password_hash
-from itsdangerous import URLSafeTimedSerializer
-from flask import current_app
+from sqlalchemy.orm import joinedload
 from app.models import User, Student, Faculty
+from app.extensions import db
+from app.services.passwords import verify_password, needs_rehash, hash_password
+from app.services.auth import identity_for, issue_token
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -13,16 +14,23 @@ def login():
     password = data.get('password')
     role = data.get('role')
     
-    user = User.query.filter_by(username=username, role=role).first()
+    # Role profile comes back in the same round trip via the backrefs
+    user = User.query.options(
+        joinedload(User.student), joinedload(User.faculty)
+    ).filter_by(username=username, role=role).first()
     
-    if user and check_password_hash(user.password_hash, password):
+    if user and verify_password(user.password_hash, password):
+        if needs_rehash(user.password_hash):
+            user.password_hash = hash_password(password)
+            db.session.commit()
+
+        identity = identity_for(user)
+
         # Cookie Session (Legacy/Fallback)
-        session['user_id'] = user.id
-        session['role'] = user.role
+        session.update(identity)
         
         # Token Session (Multi-Tab Isolation)
-        s = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
-        token = s.dumps({'user_id': user.id, 'role': user.role})
+        token = issue_token(identity)
         
         # Get additional user data based on role
         user_data = {
@@ -35,7 +43,7 @@ def login():
         }
         
         if user.role == 'student':
-            student = Student.query.filter_by(user_id=user.id).first()
+            student = user.student
             if student:
                 user_data.update({
                     'student_id': student.id,
@@ -48,7 +56,7 @@ def login():
                 })
                 
         elif user.role == 'faculty':
-            faculty = Faculty.query.filter_by(user_id=user.id).first()
+            faculty = user.faculty
             if faculty:
                 user_data.update({
                     'faculty_id': faculty.faculty_id,
@@ -62,7 +70,7 @@ def login():
 
 @auth_bp.route('/api/get_current_user/<int:user_id>')
 def get_current_user(user_id):
-    user = User.query.get(user_id)
+    user = User.query.options(joinedload(User.student)).get(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
         
@@ -75,7 +83,7 @@ def get_current_user(user_id):
     }
     
     if user.role == 'student':
-        student = Student.query.filter_by(user_id=user.id).first()
+        student = user.student
         if student:
             user_data.update({
                 'student_id': student.id,
@@ -1,6 +1,16 @@
-from flask import Blueprint, render_template, jsonify, request
-from app.models import Faculty, Timetable, QueryThread, Notification, QueryPost, QueryAttachment
+from flask import Blueprint, render_template, jsonify, request, make_response, url_for, redirect, send_file, g
+from app.models import Faculty, Timetable, QueryThread, Notification, QueryPost, QueryAttachment, Club
 from app.extensions import db
+from app.services.timetable_cache import full_day_name
+from app.services.auth import resolve_faculty_id
+from app.services import attachments, clubs
+from app.services.notifications import notify
+from app.services.events import publish_after_commit, user_channel
+from app.services.query_threads import (
+    thread_list_query, with_student_user, format_preview, parse_page_args, keyset_page, pending_first_page,
+    load_thread_header, serialize_thread_header, header_etag, post_stream_query, post_page, serialize_post,
+    DEFAULT_POST_PAGE_SIZE, MAX_PAGE_SIZE
+)
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import os
@@ -14,14 +24,15 @@ def dashboard():
 
 @faculty_bp.route('/api/faculty/timetable/<int:id_param>')
 def get_faculty_timetable(id_param):
-    faculty = Faculty.query.get(id_param)
+    faculty_id = resolve_faculty_id(id_param)
+    faculty = Faculty.query.get(faculty_id or id_param)
     if not faculty:
         faculty = Faculty.query.filter_by(user_id=id_param).first()
         
     if not faculty:
         return jsonify({'error': 'Faculty not found'}), 404
 
-    current_academic_year = '2025-26'
+    current_academic_year = current_app.config['CURRENT_ACADEMIC_YEAR']
     
     # Match by initials (assuming faculty_id stores initials like MGV)
     entries = Timetable.query.filter(
@@ -30,17 +41,9 @@ def get_faculty_timetable(id_param):
     ).all()
     
     timetable = []
-    day_map = {
-        'MON': 'Monday', 'TUE': 'Tuesday', 'WED': 'Wednesday', 
-        'THU': 'Thursday', 'FRI': 'Friday', 'SAT': 'Saturday', 'SUN': 'Sunday'
-    }
-    
     for entry in entries:
-        raw_day = entry.day_of_week.upper()
-        full_day = day_map.get(raw_day, entry.day_of_week.capitalize())
-        
         timetable.append({
-            'day': full_day,
+            'day': full_day_name(entry.day_of_week),
             'time': entry.time_slot,
             'subject': entry.subject_raw,
             'division': entry.division if entry.division else 'All',
@@ -71,17 +74,28 @@ def get_faculty_by_subject():
 # --- Faculty Query System ---
 @faculty_bp.route('/api/queries/faculty/<int:user_id>')
 def get_faculty_queries(user_id):
-    faculty = Faculty.query.filter_by(user_id=user_id).first()
-    if not faculty:
-        return jsonify([])
+    faculty_id = resolve_faculty_id(user_id)
+    if not faculty_id:
+        faculty = Faculty.query.filter_by(user_id=user_id).first()
+        if not faculty:
+            return jsonify({'threads': [], 'next_cursor': None})
+        faculty_id = faculty.id
         
-    threads = QueryThread.query.filter_by(faculty_id=faculty.id).order_by(
-        (QueryThread.status == 'pending').desc(),
-        QueryThread.updated_at.desc()
-    ).all()
+    try:
+        limit, phase, after = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # One SELECT per page: student/user are joined in and the preview is a correlated subquery
+    query = thread_list_query(with_student_user()).filter(QueryThread.faculty_id == faculty_id)
+    status = request.args.get('status')
+    if status and status != 'all':
+        threads, next_cursor = keyset_page(query.filter(QueryThread.status == status), limit, after, phase)
+    else:
+        threads, next_cursor = pending_first_page(query, limit, phase, after)
     
     result = []
-    for t in threads:
+    for t, preview in threads:
         student = t.student
         result.append({
             'id': t.id,
@@ -92,9 +106,9 @@ def get_faculty_queries(user_id):
             'student_name': student.user.full_name,
             'student_roll': student.roll_number,
             'updated_at': t.updated_at.strftime('%Y-%m-%d %H:%M'),
-            'last_message': t.posts[-1].content[:50] + "..." if t.posts else ""
+            'last_message': format_preview(preview)
         })
-    return jsonify(result)
+    return jsonify({'threads': result, 'next_cursor': next_cursor})
 
 # Query Thread Details (Shared logic, but exposed via this BP mostly for faculty context if needed, or stick to a shared 'queries_bp')
 # We'll put common query routes in a shared place or just duplicate the endpoint for simplicity if there's no shared 'api' BP.
@@ -102,48 +116,44 @@ def get_faculty_queries(user_id):
 
 @faculty_bp.route('/api/queries/thread/<int:thread_id>')
 def get_query_thread_details(thread_id):
+    thread = load_thread_header(thread_id)
+    if not thread:
+        return jsonify({'error': 'Thread not found'}), 404
+
+    posts = post_stream_query(thread.id).order_by(QueryPost.created_at, QueryPost.id).all()
+    details = serialize_thread_header(thread)
+    details['posts'] = [serialize_post(p) for p in posts]
+    return jsonify(details)
+
+@faculty_bp.route('/api/queries/thread/<int:thread_id>/header')
+def get_query_thread_header(thread_id):
     thread = QueryThread.query.get(thread_id)
     if not thread:
         return jsonify({'error': 'Thread not found'}), 404
-        
-    posts_data = []
-    for p in thread.posts:
-        atts = []
-        for a in p.attachments:
-            atts.append({
-                'file_url': a.file_url,
-                'file_name': a.file_name,
-                'file_type': a.file_type
-            })
-            
-        posts_data.append({
-            'id': p.id,
-            'author_name': p.author.full_name,
-            'role': p.role,
-            'content': p.content,
-            'created_at': p.created_at.strftime('%Y-%m-%d %H:%M'),
-            'attachments': atts
-        })
-        
-    std = thread.student
-    student_details = {
-        'full_name': std.user.full_name,
-        'enrollment': std.enrollment_number,
-        'roll_number': std.roll_number,
-        'branch': std.branch,
-        'semester': std.current_semester
-    }
-        
+
+    # Revalidation only needs the thread row; student/faculty are joined on a miss
+    etag = header_etag(thread)
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = jsonify(serialize_thread_header(load_thread_header(thread_id)))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@faculty_bp.route('/api/queries/thread/<int:thread_id>/posts')
+def get_query_thread_posts(thread_id):
+    limit = min(max(request.args.get('limit', DEFAULT_POST_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    before = request.args.get('before', type=int)
+
+    posts, next_before = post_page(thread_id, limit, before)
+    # An empty page is the only case that needs to tell a missing thread apart
+    if not posts and not db.session.query(QueryThread.id).filter(QueryThread.id == thread_id).first():
+        return jsonify({'error': 'Thread not found'}), 404
     return jsonify({
-        'id': thread.id,
-        'title': thread.title,
-        'subject': thread.subject_name,
-        'status': thread.status,
-        'type': getattr(thread, 'query_type', 'academic'),
-        'faculty_id': thread.faculty_id,
-        'faculty_name': thread.faculty.user.full_name if thread.faculty else "Unassigned",
-        'posts': posts_data,
-        'student_details': student_details
+        'posts': [serialize_post(p) for p in posts],
+        'before': next_before
     })
 
 @faculty_bp.route('/api/queries/<int:thread_id>/reply', methods=['POST'])
@@ -175,40 +185,68 @@ def reply_to_query(thread_id):
     db.session.flush()
     
     file = request.files.get('file') if not request.is_json else None
-    if file:
+    if file and file.filename:
         filename = secure_filename(file.filename)
-        upload_dir = os.path.join(current_app.root_path, 'static/uploads/queries')
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        save_name = f"{timestamp}_{filename}"
-        file.save(os.path.join(upload_dir, save_name))
+        content_hash, size = attachments.store_upload(file)
         
         attachment = QueryAttachment(
             post_id=post.id,
-            file_url=f"/static/uploads/queries/{save_name}",
+            file_url='',
             file_type=filename.split('.')[-1],
-            file_name=filename
+            file_name=filename,
+            content_hash=content_hash,
+            file_size=size
         )
         db.session.add(attachment)
+        db.session.flush()
+        attachment.file_url = url_for('faculty.download_attachment', attachment_id=attachment.id)
     
     thread.updated_at = datetime.utcnow()
     if role == 'faculty':
         thread.status = status if status else 'answered'
-        notif = Notification(
-            user_id=thread.student.user_id,
-            title="Query Update",
-            message=f"Faculty replied to: {thread.title}",
-            notification_type="query"
-        )
-        db.session.add(notif)
+        notify([thread.student.user_id], "Query Update", f"Faculty replied to: {thread.title}", "query")
         
     elif role == 'student' and thread.status == 'answered':
          thread.status = 'clarification'
     
+    # Push to whoever is on the other side of the conversation
+    recipient_user_id = thread.student.user_id if role == 'faculty' else (
+        thread.faculty.user_id if thread.faculty else None)
+    if recipient_user_id:
+        publish_after_commit(user_channel(recipient_user_id), 'query',
+                             {'thread_id': thread.id, 'status': thread.status, 'post_id': post.id})
+    
     db.session.commit()
     return jsonify({'success': True})
 
+@faculty_bp.route('/api/queries/attachments/<int:attachment_id>')
+def download_attachment(attachment_id):
+    if not g.user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+    attachment = QueryAttachment.query.get(attachment_id)
+    if not attachment:
+        return jsonify({'error': 'Attachment not found'}), 404
+    # Only the thread's student and faculty (and admins) may read its files
+    thread = attachment.post.thread
+    if g.role != 'admin' and not (
+            (g.student_id and g.student_id == thread.student_id) or
+            (g.faculty_id and g.faculty_id == thread.faculty_id)):
+        return jsonify({'error': 'Permission denied'}), 403
+    if not attachment.content_hash:
+        # Uploaded before the attachment store existed
+        return redirect(attachment.file_url)
+
+    # conditional=True answers Range and If-None-Match requests; private so shared caches never keep a copy
+    response = send_file(
+        attachments.blob_path(attachment.content_hash),
+        download_name=attachment.file_name,
+        etag=attachment.content_hash,
+        conditional=True,
+        max_age=0
+    )
+    response.cache_control.private = True
+    return response
+
 @faculty_bp.route('/api/queries/<int:thread_id>/resolve', methods=['POST'])
 def resolve_query(thread_id):
     thread = QueryThread.query.get(thread_id)
@@ -216,5 +254,61 @@ def resolve_query(thread_id):
         return jsonify({'error': 'Thread not found'}), 404
     thread.status = 'resolved'
     thread.updated_at = datetime.utcnow()
+    if thread.faculty:
+        publish_after_commit(user_channel(thread.faculty.user_id), 'query',
+                             {'thread_id': thread.id, 'status': thread.status})
     db.session.commit()
     return jsonify({'success': True})
+
+# --- Club coordination ---
+@faculty_bp.route('/api/clubs/<int:club_id>/roster')
+def get_club_roster(club_id):
+    club = Club.query.get(club_id)
+    if not club:
+        return jsonify({'error': 'Club not found'}), 404
+    if not clubs.can_manage(club):
+        return jsonify({'error': 'Permission denied'}), 403
+
+    status = request.args.get('status', 'approved')
+    if status not in clubs.STATUSES:
+        return jsonify({'error': f"status must be one of {', '.join(clubs.STATUSES)}"}), 400
+    limit = min(max(request.args.get('limit', clubs.DEFAULT_ROSTER_PAGE_SIZE, type=int), 1), clubs.MAX_ROSTER_PAGE_SIZE)
+
+    rows, next_after = clubs.roster_page(club_id, status, limit, request.args.get('after', type=int))
+    return jsonify({
+        'club_id': club.id,
+        'counts': clubs.status_counts(club_id),
+        'members': [clubs.serialize_roster_entry(r) for r in rows],
+        'next_after': next_after
+    })
+
+@faculty_bp.route('/api/clubs/<int:club_id>/requests/decide', methods=['POST'])
+def decide_club_requests(club_id):
+    club = Club.query.get(club_id)
+    if not club:
+        return jsonify({'error': 'Club not found'}), 404
+    if not clubs.can_manage(club):
+        return jsonify({'error': 'Permission denied'}), 403
+
+    data = request.get_json() or {}
+    decision = data.get('decision')
+    if decision not in clubs.DECISIONS:
+        return jsonify({'error': "decision must be 'approved' or 'rejected'"}), 400
+    request_ids = data.get('request_ids')
+    if request_ids is None and not data.get('all_pending'):
+        return jsonify({'error': 'Pass request_ids or all_pending'}), 400
+    if request_ids is not None and not (
+            isinstance(request_ids, list) and
+            all(isinstance(i, int) and not isinstance(i, bool) for i in request_ids)):
+        return jsonify({'error': 'request_ids must be a list of integers'}), 400
+
+    # One UPDATE for every request, then one batched insert of notifications
+    student_ids = clubs.decide_requests(club_id, decision, request_ids)
+    notify(
+        clubs.student_user_ids(student_ids),
+        f"Club Request {decision.capitalize()}: {club.name}",
+        f"Your request to join {club.name} has been {decision}.",
+        'club_request'
+    )
+    db.session.commit()
+    return jsonify({'success': True, 'updated': len(student_ids)})
@@ -0,0 +1,111 @@
+from flask import Blueprint, jsonify, request, g, Response, current_app
+from app.models import Notification, Student
+from app.extensions import db
+from app.services.notifications import unread_count, mark_read_up_to, member_channels
+from app.services.events import get_hub, user_channel
+from app.services.auth import IDENTITY_KEYS, issue_stream_token
+import json
+
+notifications_bp = Blueprint('notifications', __name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def _denied(user_id):
+    """Error response unless the caller is signed in as ``user_id`` or is an admin."""
+    if not g.user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+    # Users may only read their own inbox
+    if g.user_id != user_id and g.role != 'admin':
+        return jsonify({'error': 'Permission denied'}), 403
+    return None
+
+@notifications_bp.route('/api/notifications/<int:user_id>')
+def get_notifications(user_id):
+    denied = _denied(user_id)
+    if denied:
+        return denied
+
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    before = request.args.get('before', type=int)
+
+    query = Notification.query.filter(Notification.user_id == user_id)
+    if before:
+        query = query.filter(Notification.id < before)
+    notifications = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+
+    next_before = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        next_before = notifications[-1].id
+
+    return jsonify({
+        'notifications': [{
+            'id': n.id,
+            'title': n.title,
+            'message': n.message,
+            'notification_type': n.notification_type,
+            'is_read': n.is_read,
+            'created_at': n.created_at.isoformat()
+        } for n in notifications],
+        'next_before': next_before,
+        'unread_count': unread_count(user_id)
+    })
+
+@notifications_bp.route('/api/notifications/<int:user_id>/unread-count')
+def get_unread_count(user_id):
+    denied = _denied(user_id)
+    if denied:
+        return denied
+    return jsonify({'unread_count': unread_count(user_id)})
+
+@notifications_bp.route('/api/notifications/<int:user_id>/read', methods=['POST'])
+def mark_notifications_read(user_id):
+    denied = _denied(user_id)
+    if denied:
+        return denied
+
+    data = request.get_json(silent=True) or {}
+    up_to_id = data.get('up_to_id')
+    if not isinstance(up_to_id, int):
+        return jsonify({'error': 'up_to_id is required'}), 400
+
+    updated = mark_read_up_to(user_id, up_to_id)
+    db.session.commit()
+    return jsonify({'success': True, 'marked_read': updated, 'unread_count': unread_count(user_id)})
+
+@notifications_bp.route('/api/events/token', methods=['POST'])
+def event_stream_token():
+    """Short-lived token for opening the event stream, which can only be passed in the URL."""
+    if not g.user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify({'token': issue_stream_token({key: g.get(key) for key in IDENTITY_KEYS})})
+
+@notifications_bp.route('/api/events/stream')
+def event_stream():
+    """Server-sent events for the signed-in user: notifications and query replies."""
+    if not g.user_id:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    # Resolve everything up front: the generator outlives the app context
+    # Audience fan-outs reach only the channels this user's profile belongs to
+    student = db.session.get(Student, g.student_id) if g.student_id else None
+    sub = get_hub().subscribe([user_channel(g.user_id)] + member_channels(g.role, student))
+    keepalive = current_app.config['SSE_KEEPALIVE']
+
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                message = sub.get(timeout=keepalive)
+                if message is None:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+        finally:
+            sub.close()
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
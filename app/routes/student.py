@@ -1,6 +1,12 @@
-from flask import Blueprint, render_template, jsonify, request, session
+from flask import Blueprint, render_template, jsonify, request, session, Response, g
 from app.models import Student, Timetable, Club, ClubRequest, Notification, Scholarship, QueryThread, User, Faculty, QueryPost, QueryAttachment
 from app.extensions import db
+from app.services import timetable_cache, club_recommender, clubs, scholarships, scholarship_matcher, student_exams
+from app.services.auth import resolve_student_id
+from app.services.notifications import notify
+from app.services.events import publish_after_commit, user_channel
+from app.services.query_threads import thread_list_query, with_faculty_user, format_preview, parse_page_args, keyset_page
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
@@ -35,38 +41,42 @@ def get_student_id_card(student_id):
 
 @student_bp.route('/api/student/timetable/<int:id_param>')
 def get_student_timetable(id_param):
-    student = Student.query.get(id_param)
-    if not student:
-        student = Student.query.filter_by(user_id=id_param).first()
+    student_id = resolve_student_id(id_param)
+    if student_id:
+        student = Student.query.get(student_id)
+    else:
+        student = Student.query.get(id_param)
+        if not student:
+            student = Student.query.filter_by(user_id=id_param).first()
         
     if not student or not student.batch:
         return jsonify([])
     
-    current_academic_year = '2025-26'
-    schedule = Timetable.query.filter(
-        Timetable.batch == student.batch,
-        Timetable.academic_year == current_academic_year
-    ).order_by(Timetable.id).all()
-    
-    day_map = {
-        'MON': 'Monday', 'TUE': 'Tuesday', 'WED': 'Wednesday', 
-        'THU': 'Thursday', 'FRI': 'Friday', 'SAT': 'Saturday', 'SUN': 'Sunday'
-    }
+    body, etag = timetable_cache.get_batch_timetable(
+        student.batch,
+        current_app.config['CURRENT_ACADEMIC_YEAR'],
+        current_app.config['TIMETABLE_CACHE_TTL']
+    )
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
-    result = []
-    for entry in schedule:
-        raw_day = entry.day_of_week.upper()
-        full_day = day_map.get(raw_day, entry.day_of_week.capitalize())
-        
-        result.append({
-            'day': full_day,
-            'time': entry.time_slot,
-            'subject': entry.subject_raw,
-            'faculty': entry.faculty_raw,
-            'room': entry.room_number,
-            'type': "Lecture"
-        })
-    return jsonify(result)
+@student_bp.route('/api/student/exams')
+def get_student_exams():
+    if not g.student_id:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    cached = student_exams.student_exams(g.student_id)
+    if cached is None:
+        return jsonify({'error': 'Student not found'}), 404
+    body, etag = cached
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @student_bp.route('/api/student/club/register', methods=['POST'])
 def register_club():
@@ -77,32 +87,25 @@ def register_club():
     if not student_id or not club_id:
         return jsonify({'error': 'Missing student_id or club_id'}), 400
         
-    existing_request = ClubRequest.query.filter_by(student_id=student_id, club_id=club_id).first()
-    if existing_request:
-        return jsonify({'error': 'Request already exists', 'status': existing_request.status}), 400
-        
-    club = Club.query.get(club_id)
-    student = Student.query.get(student_id)
+    club = Club.query.options(joinedload(Club.coordinator)).filter(Club.id == club_id).first()
+    student = Student.query.options(joinedload(Student.user)).filter(Student.id == student_id).first()
     
     if not club or not student:
         return jsonify({'error': 'Club or Student not found'}), 404
-        
-    new_request = ClubRequest(
-        student_id=student_id,
-        club_id=club_id,
-        status='pending'
-    )
-    db.session.add(new_request)
+
+    # Insert-or-reopen against the unique (student_id, club_id) constraint; no SELECT-then-INSERT race
+    if not clubs.request_membership(student.id, club.id):
+        existing_request = ClubRequest.query.filter_by(student_id=student.id, club_id=club.id).first()
+        return jsonify({'error': 'Request already exists', 'status': existing_request.status}), 400
     
     coordinator_user_id = club.coordinator.user_id if club.coordinator else None
     if coordinator_user_id:
-        notification = Notification(
-            user_id=coordinator_user_id,
-            title=f"New Club Registration: {club.name}",
-            message=f"Student {student.user.full_name} ({student.roll_number}) has requested to join {club.name}.",
-            notification_type='club_request'
+        notify(
+            [coordinator_user_id],
+            f"New Club Registration: {club.name}",
+            f"Student {student.user.full_name} ({student.roll_number}) has requested to join {club.name}.",
+            'club_request'
         )
-        db.session.add(notification)
     
     db.session.commit()
     return jsonify({'success': True, 'message': 'Registration requested successfully'})
@@ -116,109 +119,54 @@ def recommend_clubs():
         if not user_interests:
             return jsonify([])
 
-        all_clubs = Club.query.all()
-        recommendations = []
-        
-        for club in all_clubs:
-            if not club.interests:
-                continue
-            club_tags = [tag.strip().lower() for tag in club.interests.split(',')]
-            match_count = 0
-            matching_tags = []
-            
-            for interest in user_interests:
-                interest_lower = interest.lower()
-                for tag in club_tags:
-                    if interest_lower == tag or interest_lower in tag or tag in interest_lower:
-                        if tag not in matching_tags:
-                            match_count += 1
-                            matching_tags.append(tag)
-            
-            if match_count > 0:
-                recommendations.append({
-                    'club': {
-                        'id': club.id,
-                        'name': club.name,
-                        'description': club.description,
-                        'category': club.category,
-                        'faculty_coordinator': 'Faculty Coordinator',
-                        'contact_email': club.contact_email
-                    },
-                    'match_score': match_count,
-                    'matching_interests': matching_tags
-                })
-        
-        recommendations.sort(key=lambda x: x['match_score'], reverse=True)
-        return jsonify(recommendations)
+        k = min(max(int(data.get('limit', club_recommender.DEFAULT_TOP_K)), 1), 100)
+        return jsonify(club_recommender.recommend(user_interests, k, tfidf=bool(data.get('tfidf'))))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @student_bp.route('/api/student/memberships/<int:student_id>')
 def get_student_memberships(student_id):
-    memberships = ClubRequest.query.filter_by(student_id=student_id, status='approved').all()
     result = []
-    for m in memberships:
-        club = Club.query.get(m.club_id)
-        if club:
-            result.append({
-                'id': club.id,
-                'name': club.name,
-                'category': club.category,
-                'description': club.description,
-                'role': 'Member',
-                'joined_at': m.updated_at.strftime('%B %Y') if m.updated_at else 'N/A'
-            })
+    for club, joined_at in clubs.student_memberships(student_id):
+        result.append({
+            'id': club.id,
+            'name': club.name,
+            'category': club.category,
+            'description': club.description,
+            'role': 'Member',
+            'joined_at': joined_at.strftime('%B %Y') if joined_at else 'N/A'
+        })
     return jsonify(result)
 
 @student_bp.route('/api/scholarships/eligible', methods=['POST'])
 def get_eligible_scholarships():
-    data = request.get_json()
-    student_cgpa = data.get('cgpa', 0.0)
+    data = request.get_json() or {}
+    try:
+        student_cgpa = float(data.get('cgpa') or 0)
+    except (TypeError, ValueError):
+        student_cgpa = 0.0
     family_income = data.get('family_income')
+    if family_income is not None:
+        try:
+            family_income = float(family_income)
+        except (TypeError, ValueError):
+            family_income = None
+
     category = data.get('category')
     gender = data.get('gender')
-    
-    scholarships = Scholarship.query.filter(Scholarship.is_active == True).all()
-    eligible_scholarships = []
-    
-    for scholarship in scholarships:
-        eligible = True
-        
-        if scholarship.min_cgpa > 0 and student_cgpa > 0 and student_cgpa < scholarship.min_cgpa:
-            eligible = False
-        
-        if family_income is not None:
-            try:
-                income_val = float(family_income)
-                if scholarship.max_family_income > 0 and income_val > scholarship.max_family_income:
-                    eligible = False
-            except ValueError:
-                pass
+    result = scholarships.eligible_scholarships(student_cgpa, family_income, category, gender)
+    # Remember changed details so the batch matcher can keep this student's matches current
+    if g.get('student_id') and scholarship_matcher.save_profile(
+            g.student_id, student_cgpa, family_income, category, gender, [s['id'] for s in result]):
+        db.session.commit()
 
-        if category:
-            eligible_cats = [c.strip().lower() for c in scholarship.eligible_categories.split(',')]
-            if 'all' not in eligible_cats and category.lower() not in eligible_cats:
-                eligible = False
-        
-        if gender:
-            eligible_gens = [g.strip().lower() for g in scholarship.eligible_genders.split(',')]
-            if 'all' not in eligible_gens and gender.lower() not in eligible_gens:
-                eligible = False
-        
-        if eligible:
-            eligible_scholarships.append({
-                'id': scholarship.id,
-                'name': scholarship.name,
-                'description': scholarship.description,
-                'category': scholarship.category,
-                'amount': scholarship.amount,
-                'deadline': scholarship.deadline.isoformat(),
-                'official_website': scholarship.official_website,
-                'eligible': True,
-                'eligibility_criteria': scholarship.eligibility_criteria
-            })
-    
-    return jsonify(eligible_scholarships)
+    return jsonify(result)
+
+@student_bp.route('/api/scholarships/matches')
+def get_scholarship_matches():
+    if not g.get('student_id'):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify([scholarships.serialize(s) for s in scholarship_matcher.matched_scholarships(g.student_id)])
 
 # --- Student Queries ---
 @student_bp.route('/api/queries/create', methods=['POST'])
@@ -283,13 +231,14 @@ def create_query():
         if faculty_id:
             faculty = Faculty.query.get(faculty_id)
             if faculty:
-                notif = Notification(
-                    user_id=faculty.user_id,
-                    title=f"New {query_type.capitalize()} Query",
-                    message=f"New query from {student.user.full_name}: {title}",
-                    notification_type="query"
+                notify(
+                    [faculty.user_id],
+                    f"New {query_type.capitalize()} Query",
+                    f"New query from {student.user.full_name}: {title}",
+                    "query"
                 )
-                db.session.add(notif)
+                publish_after_commit(user_channel(faculty.user_id), 'query',
+                                     {'thread_id': thread.id, 'status': thread.status})
         
         db.session.commit()
         return jsonify({'success': True, 'message': 'Query submitted', 'thread_id': thread.id})
@@ -300,9 +249,17 @@ def create_query():
 
 @student_bp.route('/api/queries/student/<int:student_id>')
 def get_student_queries(student_id):
-    threads = QueryThread.query.filter_by(student_id=student_id).order_by(QueryThread.updated_at.desc()).all()
+    try:
+        limit, phase, after = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    threads, next_cursor = keyset_page(
+        thread_list_query(with_faculty_user()).filter(QueryThread.student_id == student_id),
+        limit, after
+    )
     result = []
-    for t in threads:
+    for t, preview in threads:
         result.append({
             'id': t.id,
             'title': t.title,
@@ -311,6 +268,6 @@ def get_student_queries(student_id):
             'type': t.query_type,
             'faculty_name': t.faculty.user.full_name if t.faculty else "Unassigned",
             'updated_at': t.updated_at.strftime('%Y-%m-%d %H:%M'),
-            'last_message': t.posts[-1].content[:50] + "..." if t.posts else ""
+            'last_message': format_preview(preview)
         })
-    return jsonify(result)
+    return jsonify({'threads': result, 'next_cursor': next_cursor})
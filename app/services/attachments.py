@@ -0,0 +1,179 @@
+"""Content-addressed storage for query attachments.
+
+Uploaded files are streamed straight from the multipart parser into a temp file in
+the store while their SHA-256 is computed, so the request body is never held in
+memory and oversized uploads are cut off as soon as they cross
+MAX_ATTACHMENT_SIZE. The finished file is moved to ``<store>/<aa>/<sha256>``;
+identical uploads share one blob, and ``QueryAttachment.content_hash`` rows act
+as its reference count.
+
+A blob is in the store before the row referencing it is committed, and a
+deleted row may have held its last reference. Both kinds of blob are noted on
+the request and ``collect``ed at teardown, so files whose commit failed or
+whose last attachment was deleted don't linger. Until its request ends, every
+upload also holds its hash in flight, so a concurrent request uploading the
+same content can't have the blob collected from under its uncommitted row.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+
+from flask import Request, current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from app.extensions import db
+from app.models import QueryAttachment
+
+CHUNK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+_in_flight = Counter()  # content hash -> requests holding an upload of it that may not be committed yet
+
+
+class HashingUpload:
+    """Writable temp file that hashes and size-checks every chunk written to it."""
+
+    def __init__(self, directory, max_size):
+        self._file = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+        self.path = self._file.name
+        self.max_size = max_size
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            self.discard()
+            raise RequestEntityTooLarge(f'Attachments are limited to {self.max_size} bytes')
+        self._sha256.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        # read/seek/tell/close etc. for werkzeug's FileStorage
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        upload = HashingUpload(_tmp_dir(), current_app.config['MAX_ATTACHMENT_SIZE'])
+        g.setdefault('pending_uploads', []).append(upload)
+        return upload
+
+
+def init_app(app):
+    app.request_class = UploadRequest
+
+    @app.teardown_request
+    def discard_pending_uploads(exc=None):
+        # Anything not moved into the store (failed request, unused field) is dropped
+        for upload in g.pop('pending_uploads', []):
+            upload.discard()
+
+    @app.teardown_request
+    def collect_unreferenced_blobs(exc=None):
+        with _lock:
+            for content_hash in g.pop('in_flight_blobs', ()):
+                _in_flight[content_hash] -= 1
+                if not _in_flight[content_hash]:
+                    del _in_flight[content_hash]
+        blobs = g.pop('unconfirmed_blobs', None)
+        if blobs:
+            # Whatever this request didn't commit is discarded; count committed references only
+            db.session.rollback()
+            for content_hash in blobs:
+                collect(content_hash)
+
+
+def store_root():
+    return current_app.config['ATTACHMENT_STORE'] or os.path.join(current_app.instance_path, 'attachments')
+
+
+def _tmp_dir():
+    path = os.path.join(store_root(), 'tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def blob_path(content_hash):
+    return os.path.join(store_root(), content_hash[:2], content_hash)
+
+
+def store_upload(file):
+    """Move an uploaded FileStorage into the store, returning ``(sha256, size)``."""
+    upload = file.stream
+    if not isinstance(upload, HashingUpload):
+        # Stream wasn't produced by UploadRequest; copy it through in chunks
+        upload = HashingUpload(_tmp_dir(), current_app.config['MAX_ATTACHMENT_SIZE'])
+        try:
+            shutil.copyfileobj(file.stream, upload, CHUNK_SIZE)
+        except Exception:
+            upload.discard()
+            raise
+    else:
+        g.pending_uploads.remove(upload)
+
+    upload.flush()
+    upload.close()
+    content_hash = upload.hexdigest()
+    dest = blob_path(content_hash)
+    with _lock:
+        # In flight until teardown, whether this upload wrote the blob or found it already stored
+        _in_flight[content_hash] += 1
+        g.setdefault('in_flight_blobs', []).append(content_hash)
+        if os.path.exists(dest):
+            upload.discard()
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(upload.path, dest)
+    # Reclaimed at teardown unless an attachment row referencing it is committed
+    g.setdefault('unconfirmed_blobs', set()).add(content_hash)
+    return content_hash, upload.size
+
+
+def reference_count(content_hash):
+    return QueryAttachment.query.filter_by(content_hash=content_hash).count()
+
+
+def collect(content_hash):
+    """Remove a blob once no attachment references it; call after deleting rows is committed.
+
+    A blob another request has uploaded and not yet finished with is kept; that
+    request collects it at its own teardown.
+    """
+    with _lock:
+        if not _in_flight[content_hash] and reference_count(content_hash) == 0:
+            path = blob_path(content_hash)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+@event.listens_for(Session, 'before_flush')
+def _note_released_blobs(session, flush_context, instances):
+    released = {obj.content_hash for obj in session.deleted if isinstance(obj, QueryAttachment) and obj.content_hash}
+    if released:
+        session.info.setdefault('released_blobs', set()).update(released)
+
+
+@event.listens_for(Session, 'after_commit')
+def _collect_released_blobs(session):
+    released = session.info.pop('released_blobs', None)
+    if released and has_app_context():
+        g.setdefault('unconfirmed_blobs', set()).update(released)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _keep_released_blobs(session):
+    session.info.pop('released_blobs', None)
@@ -0,0 +1,82 @@
+"""Request authentication shared by every blueprint.
+
+The login route signs the caller's identity (user, role and role profile ids) into
+the ``X-Auth-Token`` the dashboards send with each request. ``load_user_from_token``
+verifies it once per request and exposes the identity on ``g`` so handlers don't
+have to look the user up again. The cookie session remains a fallback.
+
+``EventSource`` can't send headers, so the event stream alone accepts a
+``stream_token`` query arg instead: a separately salted token that lives for
+STREAM_TOKEN_MAX_AGE seconds, so one leaked through a log or Referer header
+can't be replayed against the rest of the API.
+"""
+from flask import current_app, g, request, session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+IDENTITY_KEYS = ('user_id', 'role', 'student_id', 'faculty_id')
+STREAM_ENDPOINT = 'notifications.event_stream'
+
+
+def init_app(app):
+    app.extensions['auth_serializer'] = URLSafeTimedSerializer(app.config['SECRET_KEY'])
+    app.extensions['stream_token_serializer'] = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='event-stream')
+    app.before_request(load_user_from_token)
+
+
+def identity_for(user):
+    return {
+        'user_id': user.id,
+        'role': user.role,
+        'student_id': user.student.id if user.role == 'student' and user.student else None,
+        'faculty_id': user.faculty.id if user.role == 'faculty' and user.faculty else None,
+    }
+
+
+def issue_token(identity):
+    return current_app.extensions['auth_serializer'].dumps(identity)
+
+
+def issue_stream_token(identity):
+    return current_app.extensions['stream_token_serializer'].dumps(identity)
+
+
+def load_user_from_token():
+    data = None
+    token = request.headers.get('X-Auth-Token')
+    serializer, max_age = current_app.extensions['auth_serializer'], current_app.config['AUTH_TOKEN_MAX_AGE']
+    if not token and request.endpoint == STREAM_ENDPOINT:
+        token = request.args.get('stream_token')
+        serializer, max_age = current_app.extensions['stream_token_serializer'], current_app.config['STREAM_TOKEN_MAX_AGE']
+    if token:
+        try:
+            data = serializer.loads(token, max_age=max_age)
+        except BadSignature:
+            # Invalid or expired token, fall back to the cookie session
+            data = None
+    if data is None and 'user_id' in session:
+        data = session
+
+    for key in IDENTITY_KEYS:
+        setattr(g, key, data.get(key) if data else None)
+
+
+def get_current_user_id():
+    return g.get('user_id')
+
+
+def resolve_student_id(id_param):
+    """Map a route's student-or-user id to the caller's student id without a query.
+
+    Returns None when the caller isn't the authenticated student, leaving the
+    handler to fall back to the legacy lookup.
+    """
+    if g.get('student_id') and id_param in (g.student_id, g.user_id):
+        return g.student_id
+    return None
+
+
+def resolve_faculty_id(id_param):
+    """Faculty counterpart of ``resolve_student_id``."""
+    if g.get('faculty_id') and id_param in (g.faculty_id, g.user_id):
+        return g.faculty_id
+    return None
@@ -0,0 +1,189 @@
+"""Club recommendations from an in-memory inverted index of interest tags.
+
+The index maps each normalized tag (from the club_interest tables) to the clubs
+carrying it, plus a sorted tag list for prefix lookups and per-tag document
+frequencies for TF-IDF. It is built when the app starts and rebuilt on the next request after a Club write commits
+(or after CLUB_INDEX_TTL, for writes from other processes), so a recommendation
+never touches the database.
+
+Each interest is matched against the tag vocabulary rather than every club's
+tags: exact matches are a dict lookup, prefix matches a bisect range, tags inside
+the interest are found by looking up its slices, and tags containing it are
+narrowed down with a trigram index. Clubs are scored by the best match weight
+per tag, optionally scaled by the tag's IDF, and the top k are taken with a heap.
+"""
+import bisect
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Club, ClubInterest, club_interest_link
+from app.services.club_tags import normalize
+
+log = logging.getLogger(__name__)
+
+EXACT, PREFIX, SUBSTRING = 3.0, 2.0, 1.0
+DEFAULT_TOP_K = 20
+
+
+class ClubIndex:
+    def __init__(self, clubs, tag_rows):
+        """``tag_rows`` are ``(club_id, tag)`` pairs from the club_interest tables."""
+        self.clubs = {}  # club id -> serialized club
+        self.postings = defaultdict(set)  # tag -> club ids
+        for club_id, tag in tag_rows:
+            self.postings[tag].add(club_id)
+        tagged = set().union(*self.postings.values())
+        for club in clubs:
+            if club.id not in tagged:
+                continue
+            self.clubs[club.id] = {
+                'id': club.id,
+                'name': club.name,
+                'description': club.description,
+                'category': club.category,
+                'faculty_coordinator': 'Faculty Coordinator',
+                'contact_email': club.contact_email,
+                'instagram_link': club.instagram_link
+            }
+        self.tags = sorted(self.postings)
+        self.trigrams = defaultdict(set)  # 3-character slice -> tags containing it
+        for tag in self.tags:
+            for i in range(len(tag) - 2):
+                self.trigrams[tag[i:i + 3]].add(tag)
+        total = len(self.clubs)
+        self.idf = {tag: math.log((1 + total) / (1 + len(ids))) + 1 for tag, ids in self.postings.items()}
+        self.built_at = time.monotonic()
+
+    def match_tags(self, interest):
+        """``{tag: weight}`` for every vocabulary tag the interest matches."""
+        matches = {}
+        if not interest:
+            return matches
+        # Tags starting with the interest: a contiguous run of the sorted vocabulary
+        start = bisect.bisect_left(self.tags, interest)
+        for tag in self.tags[start:]:
+            if not tag.startswith(interest):
+                break
+            matches[tag] = PREFIX
+        # Tags inside the interest: look up each of its slices ("machine learning" -> "machine")
+        for start in range(len(interest)):
+            for end in range(start + 1, len(interest) + 1):
+                part = interest[start:end]
+                if part in self.postings and part not in matches:
+                    matches[part] = PREFIX if start == 0 else SUBSTRING
+        # Tags containing the interest: candidates share all of its trigrams
+        if len(interest) >= 3:
+            candidates = set.intersection(*(self.trigrams.get(interest[i:i + 3], set())
+                                            for i in range(len(interest) - 2)))
+        else:
+            candidates = self.tags
+        for tag in candidates:
+            if tag not in matches and interest in tag:
+                matches[tag] = SUBSTRING
+        if interest in self.postings:
+            matches[interest] = EXACT
+        return matches
+
+    def recommend(self, interests, k=DEFAULT_TOP_K, tfidf=False):
+        best = {}  # tag -> best weight over all interests
+        for interest in {normalize(i) for i in interests if isinstance(i, str)}:
+            for tag, weight in self.match_tags(interest).items():
+                if weight > best.get(tag, 0):
+                    best[tag] = weight
+
+        scores = defaultdict(float)
+        matched = defaultdict(list)
+        for tag, weight in best.items():
+            if tfidf:
+                weight *= self.idf[tag]
+            for club_id in self.postings[tag]:
+                scores[club_id] += weight
+                matched[club_id].append(tag)
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [{
+            'club': self.clubs[club_id],
+            'match_score': len(matched[club_id]),
+            'score': round(score, 3),
+            'matching_interests': sorted(matched[club_id])
+        } for club_id, score in top]
+
+
+_lock = threading.Lock()
+_index = None
+_stale = True
+
+
+def build_index():
+    global _index, _stale
+    tag_rows = db.session.query(club_interest_link.c.club_id, ClubInterest.tag).join(
+        ClubInterest, ClubInterest.id == club_interest_link.c.interest_id
+    ).all()
+    index = ClubIndex(Club.query.all(), tag_rows)
+    with _lock:
+        _index = index
+        _stale = False
+    return index
+
+
+def get_index():
+    index = _index
+    if index is None or _stale or time.monotonic() - index.built_at >= current_app.config['CLUB_INDEX_TTL']:
+        index = build_index()
+    return index
+
+
+def recommend(interests, k=DEFAULT_TOP_K, tfidf=False):
+    return get_index().recommend(interests, k, tfidf)
+
+
+def init_app(app):
+    with app.app_context():
+        try:
+            build_index()
+        except OperationalError:
+            # Tables not created yet (fresh database); the first request builds it
+            log.info("Club index not built at startup; club table unavailable")
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+
+def _mark_stale():
+    global _stale
+    _stale = True
+
+
+@event.listens_for(Session, 'before_flush')
+def _on_club_flush(session, flush_context, instances):
+    if any(isinstance(obj, Club) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['clubs_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_club_write(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is Club:
+        orm_execute_state.session.info['clubs_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _rebuild_on_commit(session):
+    if session.info.pop('clubs_changed', None):
+        _mark_stale()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('clubs_changed', None)
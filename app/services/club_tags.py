@@ -0,0 +1,91 @@
+"""Normalized club interest tags.
+
+``Club.interests`` stays the editable comma-separated text; on flush it is parsed
+once into ``ClubInterest`` rows (one per distinct normalized tag) linked through
+``club_interest_link``. Everything that matches on tags queries those tables
+instead of re-splitting the text.
+"""
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Club, ClubInterest, club_interest_link
+
+AUTOCOMPLETE_LIMIT = 10
+
+
+def normalize(tag):
+    return ' '.join(tag.lower().split())
+
+
+def split_interests(text):
+    return {normalize(t) for t in (text or '').split(',') if t.strip()}
+
+
+def get_or_create_tags(session, names):
+    """``ClubInterest`` rows for the given normalized names, adding the missing ones."""
+    if not names:
+        return []
+    with session.no_autoflush:
+        existing = {t.tag: t for t in session.query(ClubInterest).filter(ClubInterest.tag.in_(names))}
+    # Tags added earlier in this session but not flushed yet
+    for obj in session.new:
+        if isinstance(obj, ClubInterest) and obj.tag in names:
+            existing.setdefault(obj.tag, obj)
+    for name in names - existing.keys():
+        existing[name] = ClubInterest(tag=name)
+        session.add(existing[name])
+    return [existing[name] for name in sorted(names)]
+
+
+def sync_tags(session, club):
+    names = split_interests(club.interests)
+    if {t.tag for t in club.tags} != names:
+        club.tags = get_or_create_tags(session, names)
+
+
+def backfill(session=None):
+    """Sync every club's tags from its interests text; returns the number of clubs."""
+    session = session or db.session
+    clubs = session.query(Club).all()
+    for club in clubs:
+        sync_tags(session, club)
+    session.commit()
+    return len(clubs)
+
+
+def autocomplete(prefix, limit=AUTOCOMPLETE_LIMIT):
+    """``(tag, club_count)`` for tags starting with ``prefix``, via a range scan on the unique index."""
+    prefix = normalize(prefix)
+    query = db.session.query(ClubInterest.tag, func.count(club_interest_link.c.club_id)).outerjoin(
+        club_interest_link, club_interest_link.c.interest_id == ClubInterest.id
+    )
+    if prefix:
+        query = query.filter(ClubInterest.tag >= prefix, ClubInterest.tag < prefix + '\uffff')
+    return query.group_by(ClubInterest.id).order_by(ClubInterest.tag).limit(limit).all()
+
+
+def clubs_with_tags(names):
+    """Query of active clubs carrying any of the tags, most shared tags first."""
+    names = {normalize(n) for n in names if n and n.strip()}
+    matched = func.count(ClubInterest.id).label('matched')
+    return db.session.query(Club, matched).join(Club.tags).filter(
+        Club.is_active == True, ClubInterest.tag.in_(names)
+    ).group_by(Club.id).order_by(matched.desc(), Club.id)
+
+
+def similar_clubs(club_id, limit=5):
+    """Clubs sharing tags with ``club_id`` as ``(club, shared_count)``, most shared first."""
+    own = db.session.query(club_interest_link.c.interest_id).filter(club_interest_link.c.club_id == club_id)
+    other = club_interest_link.alias('other')
+    shared = func.count(other.c.interest_id).label('shared')
+    return db.session.query(Club, shared).join(other, other.c.club_id == Club.id).filter(
+        other.c.interest_id.in_(own), Club.id != club_id, Club.is_active == True
+    ).group_by(Club.id).order_by(shared.desc(), Club.id).limit(limit).all()
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_club_tags(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Club) and (obj in session.new or inspect(obj).attrs.interests.history.has_changes()):
+            sync_tags(session, obj)
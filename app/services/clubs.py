@@ -0,0 +1,122 @@
+"""Club membership queries shared by the student and coordinator views."""
+from datetime import datetime
+
+from flask import g
+from sqlalchemy import event, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models import Club, ClubRequest, Student
+
+STATUSES = ('pending', 'approved', 'rejected')
+DECISIONS = ('approved', 'rejected')
+DEFAULT_ROSTER_PAGE_SIZE = 50
+MAX_ROSTER_PAGE_SIZE = 200
+
+
+@event.listens_for(ClubRequest.status, 'set')
+def _track_decision(target, value, oldvalue, initiator):
+    # Any move out of 'pending' is a decision; moving back clears it
+    target.decided_at = datetime.utcnow() if value not in (None, 'pending') else None
+
+
+def student_memberships(student_id):
+    """``(club, joined_at)`` for every approved request of the student, in one query."""
+    return db.session.query(
+        Club, func.coalesce(ClubRequest.decided_at, ClubRequest.requested_at)
+    ).join(ClubRequest, ClubRequest.club_id == Club.id).filter(
+        ClubRequest.student_id == student_id,
+        ClubRequest.status == 'approved'
+    ).order_by(Club.name).all()
+
+
+def status_counts(club_id):
+    """``{status: count}`` from the (club_id, status) index alone."""
+    rows = db.session.query(ClubRequest.status, func.count(ClubRequest.id)).filter(
+        ClubRequest.club_id == club_id
+    ).group_by(ClubRequest.status).all()
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update({status: count for status, count in rows})
+    return counts
+
+
+def roster_page(club_id, status, limit, after_id=None):
+    """Requests of a club in one status, oldest first; returns ``(rows, next_after_id)``."""
+    query = ClubRequest.query.options(
+        joinedload(ClubRequest.student).joinedload(Student.user)
+    ).filter(ClubRequest.club_id == club_id, ClubRequest.status == status)
+    if after_id:
+        query = query.filter(ClubRequest.id > after_id)
+    rows = query.order_by(ClubRequest.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+def serialize_roster_entry(req):
+    student = req.student
+    return {
+        'request_id': req.id,
+        'student_id': student.id,
+        'full_name': student.user.full_name,
+        'roll_number': student.roll_number,
+        'branch': student.branch,
+        'semester': student.current_semester,
+        'status': req.status,
+        'requested_at': req.requested_at.isoformat() if req.requested_at else None,
+        'decided_at': req.decided_at.isoformat() if req.decided_at else None
+    }
+
+
+def can_manage(club):
+    """Coordinators manage their own clubs; admins manage all."""
+    if g.get('role') == 'admin':
+        return True
+    return g.get('role') == 'faculty' and g.get('faculty_id') is not None \
+        and club.faculty_coordinator == g.faculty_id
+
+
+def _upsert_dialect():
+    return postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+
+
+def request_membership(student_id, club_id):
+    """Insert a pending request, or reopen a rejected one, in a single statement.
+
+    Relies on the (student_id, club_id) unique constraint, so concurrent
+    double-clicks can't create two rows. Returns True if a request was created
+    or reopened, False if one is already pending or approved.
+    """
+    now = datetime.utcnow()
+    stmt = _upsert_dialect().insert(ClubRequest).values(
+        student_id=student_id, club_id=club_id, status='pending', requested_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['student_id', 'club_id'],
+        set_={'status': 'pending', 'requested_at': now, 'decided_at': None},
+        where=ClubRequest.__table__.c.status == 'rejected'
+    )
+    return db.session.execute(stmt).rowcount > 0
+
+
+def decide_requests(club_id, decision, request_ids=None):
+    """Approve or reject pending requests of a club in one UPDATE.
+
+    With ``request_ids`` only those requests are decided, otherwise every pending
+    one. Returns the student ids whose requests changed.
+    """
+    stmt = update(ClubRequest).where(
+        ClubRequest.club_id == club_id, ClubRequest.status == 'pending'
+    )
+    if request_ids is not None:
+        stmt = stmt.where(ClubRequest.id.in_(request_ids))
+    stmt = stmt.values(status=decision, decided_at=datetime.utcnow()).returning(ClubRequest.student_id)
+    return [student_id for (student_id,) in db.session.execute(stmt, execution_options={'synchronize_session': False})]
+
+
+def student_user_ids(student_ids):
+    if not student_ids:
+        return []
+    return [uid for (uid,) in db.session.query(Student.user_id).filter(Student.id.in_(student_ids))]
@@ -0,0 +1,153 @@
+"""In-process pub/sub hub behind the server-sent events stream.
+
+Routes publish small events (``notification``, ``query``) to per-user channels,
+and audience fan-outs to per-audience channels, once their transaction commits; every open SSE connection holds a subscription
+queue on the hub. The hub only fans out locally: a broker carries messages between
+processes. ``LocalBroker`` loops them straight back (single worker, dev, tests)
+and ``RedisBroker`` relays them over Redis pub/sub when EVENT_BROKER_URL is set,
+so every worker's hub sees every event.
+"""
+import json
+import logging
+import queue
+import threading
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+
+log = logging.getLogger(__name__)
+
+SUBSCRIPTION_BUFFER = 100
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class LocalBroker:
+    """Delivers messages to this process only."""
+
+    def start(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+
+class RedisBroker:
+    """Relays messages between workers through Redis pub/sub (needs the ``redis`` package)."""
+
+    def __init__(self, url, prefix='eduportal:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('EVENT_BROKER_URL is set but the redis package is not installed') from e
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def start(self, deliver):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{self._prefix}*')
+
+        def listen():
+            for msg in pubsub.listen():
+                channel = msg['channel'].decode()[len(self._prefix):]
+                deliver(channel, json.loads(msg['data']))
+
+        threading.Thread(target=listen, name='event-broker', daemon=True).start()
+
+    def publish(self, channel, message):
+        self._redis.publish(f'{self._prefix}{channel}', json.dumps(message))
+
+
+class Subscription:
+    def __init__(self, hub, channels):
+        self.hub = hub
+        self.channels = channels
+        self.queue = queue.Queue(maxsize=SUBSCRIPTION_BUFFER)
+
+    def get(self, timeout):
+        """Next message, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    def __init__(self, broker):
+        self._broker = broker
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        broker.start(self._deliver)
+
+    def publish(self, channel, event_type, data):
+        self._broker.publish(channel, {'event': event_type, 'data': data})
+
+    def subscribe(self, channels):
+        sub = Subscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for channel in sub.channels:
+                subs = self._subscribers.get(channel)
+                if subs:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscribers[channel]
+
+    def connection_count(self):
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subs = list(self._subscribers.get(channel, ()))
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(message)
+            except queue.Full:
+                # Client isn't reading; it will resync with a full fetch on reconnect
+                log.warning("Dropping %s event for a slow subscriber on %s", message['event'], channel)
+
+
+def make_broker(url):
+    return RedisBroker(url) if url else LocalBroker()
+
+
+def init_app(app):
+    app.extensions['event_hub'] = Hub(make_broker(app.config['EVENT_BROKER_URL']))
+
+
+def get_hub():
+    return current_app.extensions['event_hub']
+
+
+def publish_after_commit(channel, event_type, data):
+    """Publish once the current transaction commits; dropped on rollback."""
+    pending = db.session.info.setdefault('pending_events', [])
+    pending.append((get_hub(), channel, event_type, data))
+
+
+def _publish_pending(session):
+    for hub, channel, event_type, data in session.info.pop('pending_events', ()):
+        hub.publish(channel, event_type, data)
+
+
+def _discard_pending(session):
+    session.info.pop('pending_events', None)
+
+
+event.listen(Session, 'after_commit', _publish_pending)
+event.listen(Session, 'after_rollback', _discard_pending)
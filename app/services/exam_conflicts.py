@@ -0,0 +1,127 @@
+"""Clash detection for exam timetable entries.
+
+A submission is checked together with every exam already booked on the same
+dates. Slots are bucketed per room, per invigilator and per cohort (the
+semester/division pairs that take the subject according to ``Timetable``),
+and each bucket is swept in start-time order with a heap of the slots still
+running, so a batch of n entries with k clashes costs O(n log n + k) and every
+clash is reported, not just the first.
+
+Intervals are half-open: an exam ending at 13:00 doesn't clash with one
+starting at 13:00. Several rooms sitting the same subject at the same time is
+one exam, so cohort clashes need different subjects.
+"""
+import heapq
+from collections import defaultdict
+from datetime import datetime, time
+
+from app.extensions import db
+from app.models import ExamTimetable, Timetable
+
+TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%I:%M %p')
+
+
+def parse_time(value):
+    if isinstance(value, time):
+        return value
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time '{value}'")
+
+
+def room_key(room):
+    return ' '.join((room or '').split()).upper()
+
+
+class Slot:
+    __slots__ = ('ref', 'exam_date', 'start', 'end', 'room', 'faculty_id', 'subject')
+
+    def __init__(self, ref, exam_date, start, end, room, faculty_id, subject):
+        self.ref = ref  # {'row': i} for submitted entries, {'id': id} for stored ones
+        self.exam_date = exam_date
+        self.start = start
+        self.end = end
+        self.room = room_key(room)
+        self.faculty_id = faculty_id
+        self.subject = (subject or '').strip() or None
+
+    @classmethod
+    def from_entry(cls, entry):
+        return cls({'id': entry.id}, entry.exam_date, entry.start_time, entry.end_time,
+                   entry.room_number, entry.faculty_id, entry.subject_name)
+
+
+def overlapping_pairs(slots):
+    """Every overlapping pair in one bucket: sort by start, keep running slots in a min-heap by end."""
+    running = []
+    for seq, slot in enumerate(sorted(slots, key=lambda s: (s.start, s.end))):
+        while running and running[0][0] <= slot.start:
+            heapq.heappop(running)
+        for _, _, other in running:
+            yield other, slot
+        heapq.heappush(running, (slot.end, seq, slot))
+
+
+def subject_cohorts(subjects):
+    """``{subject: {(semester, division), ...}}`` from the class timetable."""
+    cohorts = defaultdict(set)
+    if subjects:
+        rows = db.session.query(Timetable.subject_raw, Timetable.semester, Timetable.division).filter(
+            Timetable.subject_raw.in_(subjects)
+        ).distinct()
+        for subject, semester, division in rows:
+            cohorts[subject].add((semester, division))
+    return cohorts
+
+
+def existing_slots(dates, exclude_ids=()):
+    """Stored exams on the given dates, minus the rows being replaced."""
+    if not dates:
+        return []
+    query = ExamTimetable.query.filter(ExamTimetable.exam_date.in_(dates))
+    if exclude_ids:
+        query = query.filter(ExamTimetable.id.notin_(exclude_ids))
+    return [Slot.from_entry(e) for e in query]
+
+
+def find_conflicts(slots):
+    """All room, invigilator and cohort clashes among ``slots``, at least one side submitted."""
+    cohorts = subject_cohorts({s.subject for s in slots if s.subject})
+    buckets = defaultdict(list)
+    for slot in slots:
+        if slot.room:
+            buckets[('room', slot.room, slot.exam_date)].append(slot)
+        if slot.faculty_id:
+            buckets[('invigilator', slot.faculty_id, slot.exam_date)].append(slot)
+        for cohort in cohorts.get(slot.subject, ()):
+            buckets[('cohort', cohort, slot.exam_date)].append(slot)
+
+    conflicts = []
+    for (kind, key, exam_date), bucket in buckets.items():
+        if len(bucket) < 2:
+            continue
+        for a, b in overlapping_pairs(bucket):
+            if 'id' in a.ref and 'id' in b.ref:
+                continue  # already stored; not this submission's doing
+            if kind == 'cohort' and a.subject == b.subject:
+                continue
+            conflicts.append({
+                'type': kind,
+                'key': f"Sem {key[0]} Div {key[1]}" if kind == 'cohort' else key,
+                'exam_date': exam_date.isoformat(),
+                'entries': [
+                    dict(a.ref, subject=a.subject, start_time=a.start.strftime('%H:%M'), end_time=a.end.strftime('%H:%M')),
+                    dict(b.ref, subject=b.subject, start_time=b.start.strftime('%H:%M'), end_time=b.end.strftime('%H:%M'))
+                ]
+            })
+    conflicts.sort(key=lambda c: (c['exam_date'], c['type'], str(c['key'])))
+    return conflicts
+
+
+def check_submission(slots, replacing_ids=()):
+    """Conflicts of submitted slots with each other and with the stored timetable."""
+    dates = {s.exam_date for s in slots}
+    return find_conflicts(list(slots) + existing_slots(dates, replacing_ids))
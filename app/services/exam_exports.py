@@ -0,0 +1,406 @@
+"""Downloadable exports of an exam schedule: the exam cell CSV, per-room
+seating sheets and iCalendar files per cohort and per invigilator.
+
+Every export is a generator of text chunks fed by ``yield_per`` queries, so a
+large schedule is streamed to the client without being held in memory. While
+streaming, the bytes are also written to ``<store>/<schedule>/v<version>/``;
+once a file is complete, later downloads of the same schedule version are
+served from disk with ``send_file``. ``ExamSchedule.version`` is bumped in the
+committing transaction whenever the schedule or its entries change, which
+retires every cached file of the old version at once.
+
+Rows outside the schedule that an export reads (cohort subjects, invigilator
+names) don't bump the version; a digest of them is part of the cached file's
+name instead. Seating sheets depend on the whole student roster and are always
+streamed fresh.
+"""
+import csv
+import hashlib
+import math
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime
+from itertools import groupby
+
+from flask import Response, current_app, send_file, stream_with_context
+from sqlalchemy import and_, event, func, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import CohortSubject, ExamSchedule, ExamTimetable, Faculty, Student, User
+from app.services.exam_conflicts import room_key
+
+YIELD_PER = 500
+PRODID = '-//EduPortal//Exam Schedule//EN'
+
+
+def store_root():
+    return current_app.config['EXPORT_STORE'] or os.path.join(current_app.instance_path, 'exports')
+
+
+def slug(value):
+    return re.sub(r'[^A-Za-z0-9]+', '-', str(value or '')).strip('-') or 'none'
+
+
+def export_path(schedule, filename, inputs=''):
+    name = f'{inputs}-{filename}' if inputs else filename
+    return os.path.join(store_root(), str(schedule.id), f'v{schedule.version}', name)
+
+
+def digest(*rows):
+    """Short digest of the rows outside the schedule that an export reads."""
+    return hashlib.sha1(repr(rows).encode('utf-8')).hexdigest()[:16]
+
+
+def _prune(path, filename):
+    # Once a file of a version is complete, earlier versions can never be served again
+    version_dir, current = os.path.split(path)
+    directory, version = os.path.split(version_dir)
+    versions = {int(name[1:]) for name in os.listdir(directory) if re.fullmatch(r'v\d+', name)}
+    if max(versions) > int(version[1:]):
+        # This download outlived its version; its file is already stale
+        shutil.rmtree(version_dir, ignore_errors=True)
+        return
+    for number in versions - {int(version[1:])}:
+        shutil.rmtree(os.path.join(directory, f'v{number}'), ignore_errors=True)
+    # nor can this export built from older inputs
+    for name in os.listdir(version_dir):
+        if name != current and name.endswith(f'-{filename}'):
+            os.remove(os.path.join(version_dir, name))
+
+
+def _tee(chunks, path, filename):
+    """Yield encoded chunks while writing them to ``path``; the file appears only when complete."""
+    tmp_dir = os.path.join(store_root(), 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+    try:
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            tmp.write(data)
+            yield data
+        tmp.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp.name, path)
+        _prune(path, filename)
+    finally:
+        # Client went away or a query failed: drop the partial file
+        if not tmp.closed:
+            tmp.close()
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+
+
+def serve(schedule, filename, chunks, mimetype, inputs=''):
+    """The cached file for this schedule version and ``inputs`` digest, or a streamed response that fills the cache."""
+    path = export_path(schedule, filename, inputs)
+    etag = f"{schedule.id}-{schedule.version}-{inputs + '-' if inputs else ''}{filename}"
+    if os.path.exists(path):
+        return send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename,
+                         etag=etag, conditional=True, max_age=0)
+
+    response = stream(filename, _tee(chunks, path, filename), mimetype)
+    response.set_etag(etag)
+    return response
+
+
+def stream(filename, chunks, mimetype):
+    """A streamed download of ``chunks``, which ``serve`` also tees into the cache."""
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.cache_control.no_cache = True
+    response.cache_control.max_age = 0
+    return response
+
+
+class _Echo:
+    """File-like target that hands back each row ``csv.writer`` formats."""
+
+    def write(self, value):
+        return value
+
+
+def _cohort_match(schedule):
+    return or_(CohortSubject.academic_year == schedule.academic_year, CohortSubject.academic_year.is_(None))
+
+
+def _cohort_labels(schedule):
+    """``{subject: 'Sem 4 A/A1; ...'}`` for the subjects in the schedule."""
+    rows = db.session.query(
+        CohortSubject.subject, CohortSubject.semester, CohortSubject.division, CohortSubject.batch
+    ).join(ExamTimetable, ExamTimetable.subject_name == CohortSubject.subject).filter(
+        ExamTimetable.exam_schedule_id == schedule.id, _cohort_match(schedule)
+    ).distinct().order_by(CohortSubject.subject, CohortSubject.semester, CohortSubject.division, CohortSubject.batch)
+    return {subject: '; '.join(f"Sem {sem} {div or '-'}/{batch or '-'}" for _, sem, div, batch in group)
+            for subject, group in groupby(rows, key=lambda r: r[0])}
+
+
+def schedule_csv_inputs(schedule):
+    """Digest of the cohort labels and invigilator names ``schedule_csv`` prints."""
+    invigilators = db.session.query(Faculty.id, Faculty.faculty_id, User.full_name).join(
+        ExamTimetable, ExamTimetable.faculty_id == Faculty.id).outerjoin(User, User.id == Faculty.user_id).filter(
+        ExamTimetable.exam_schedule_id == schedule.id).distinct().order_by(Faculty.id).all()
+    return digest(sorted(_cohort_labels(schedule).items()), [tuple(row) for row in invigilators])
+
+
+def schedule_csv(schedule):
+    """Every entry of the schedule, one row per exam room."""
+    writer = csv.writer(_Echo())
+    cohorts = _cohort_labels(schedule)
+    yield writer.writerow(['Date', 'Day', 'Start', 'End', 'Subject', 'Subject Code', 'Cohorts', 'Room',
+                           'Invigilator ID', 'Invigilator'])
+    rows = db.session.query(
+        ExamTimetable.exam_date, ExamTimetable.start_time, ExamTimetable.end_time, ExamTimetable.subject_name,
+        ExamTimetable.subject_id, ExamTimetable.room_number, Faculty.faculty_id, User.full_name
+    ).outerjoin(Faculty, Faculty.id == ExamTimetable.faculty_id).outerjoin(User, User.id == Faculty.user_id).filter(
+        ExamTimetable.exam_schedule_id == schedule.id
+    ).order_by(ExamTimetable.exam_date, ExamTimetable.start_time, ExamTimetable.room_number).yield_per(YIELD_PER)
+    for exam_date, start, end, subject, subject_id, room, faculty_code, faculty_name in rows:
+        yield writer.writerow([
+            exam_date.isoformat(), exam_date.strftime('%A'), start.strftime('%H:%M'), end.strftime('%H:%M'),
+            subject or '', subject_id or '', cohorts.get(subject, ''), room or '', faculty_code or '', faculty_name or ''
+        ])
+
+
+def schedule_rooms(schedule):
+    """Distinct rooms used by the schedule, as ``[(room, filename), ...]``."""
+    rooms = [room for (room,) in db.session.query(ExamTimetable.room_number).filter(
+        ExamTimetable.exam_schedule_id == schedule.id).distinct().order_by(ExamTimetable.room_number)]
+    return [(room, f'seating-{slug(room)}.csv') for room in rooms if room]
+
+
+def seating_sheet(schedule, room):
+    """Seat list for every sitting in ``room``.
+
+    Students taking a subject are taken in roll number order and split evenly
+    across the rooms of that sitting, so each room's sheet gets its own block.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(['Date', 'Time', 'Subject', 'Room', 'Seat', 'Roll Number', 'Enrollment Number', 'Name',
+                           'Signature'])
+    key = room_key(room)
+    sittings = db.session.query(
+        ExamTimetable.exam_date, ExamTimetable.start_time, ExamTimetable.end_time, ExamTimetable.subject_name,
+        ExamTimetable.room_number
+    ).filter(ExamTimetable.exam_schedule_id == schedule.id).order_by(
+        ExamTimetable.exam_date, ExamTimetable.start_time, ExamTimetable.subject_name).all()
+
+    for (exam_date, start, end, subject), group in groupby(sittings, key=lambda r: r[:4]):
+        rooms = sorted({room_key(r[4]) for r in group})
+        if key not in rooms or not subject:
+            continue
+        students = db.session.query(
+            Student.roll_number, Student.enrollment_number, User.full_name
+        ).join(User, User.id == Student.user_id).join(CohortSubject, and_(
+            CohortSubject.semester == Student.current_semester,
+            CohortSubject.division == Student.division,
+            CohortSubject.batch == Student.batch
+        )).filter(CohortSubject.subject == subject, _cohort_match(schedule)).distinct()
+        per_room = math.ceil(students.count() / len(rooms))
+        if not per_room:
+            continue
+        time_range = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+        block = students.order_by(Student.roll_number).offset(rooms.index(key) * per_room).limit(per_room)
+        for seat, (roll, enrollment, name) in enumerate(block.yield_per(YIELD_PER), start=1):
+            yield writer.writerow([exam_date.isoformat(), time_range, subject, room, seat, roll, enrollment,
+                                   name or '', ''])
+
+
+def _escape(text):
+    return str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    # RFC 5545 3.1: content lines longer than 75 octets continue on lines starting with a space
+    out, size = [], 0
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > 75:
+            out.append('\r\n ')
+            size = 1
+        out.append(char)
+        size += width
+    return ''.join(out) + '\r\n'
+
+
+def _calendar(name, events):
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold(f'PRODID:{PRODID}')
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold('METHOD:PUBLISH')
+    yield _fold(f'X-WR-CALNAME:{_escape(name)}')
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    for fields in events:
+        yield from _event(fields, stamp)
+    yield _fold('END:VCALENDAR')
+
+
+def _event(fields, stamp):
+    uid, schedule, exam_date, start, end, summary, location = fields
+    yield _fold('BEGIN:VEVENT')
+    yield _fold(f'UID:{uid}')
+    yield _fold(f'DTSTAMP:{stamp}')
+    # SEQUENCE lets calendar clients replace events from an older version
+    yield _fold(f'SEQUENCE:{schedule.version}')
+    yield _fold(f"DTSTART:{datetime.combine(exam_date, start).strftime('%Y%m%dT%H%M%S')}")
+    yield _fold(f"DTEND:{datetime.combine(exam_date, end).strftime('%Y%m%dT%H%M%S')}")
+    yield _fold(f'SUMMARY:{_escape(summary)}')
+    if location:
+        yield _fold(f'LOCATION:{_escape(location)}')
+    yield _fold(f'DESCRIPTION:{_escape(schedule.name)}')
+    yield _fold('END:VEVENT')
+
+
+def cohort_filename(semester, division, batch):
+    return f'cohort-{semester}-{slug(division)}-{slug(batch)}.ics'
+
+
+def _cohort_subjects(schedule, semester, division, batch):
+    return db.session.query(CohortSubject.subject).filter(
+        CohortSubject.semester == semester,
+        CohortSubject.division == division,
+        CohortSubject.batch == batch,
+        _cohort_match(schedule)
+    )
+
+
+def cohort_calendar_inputs(schedule, semester, division, batch):
+    """Digest of the subjects the cohort sits, which ``cohort_calendar`` reads from CohortSubject."""
+    return digest([subject for (subject,) in _cohort_subjects(schedule, semester, division, batch).distinct().order_by(
+        CohortSubject.subject)])
+
+
+def cohort_calendar(schedule, semester, division, batch):
+    """One event per exam the cohort sits, with all its rooms as the location."""
+    rows = db.session.query(
+        ExamTimetable.subject_name, ExamTimetable.exam_date, ExamTimetable.start_time, ExamTimetable.end_time,
+        ExamTimetable.room_number
+    ).join(CohortSubject, CohortSubject.subject == ExamTimetable.subject_name).filter(
+        ExamTimetable.exam_schedule_id == schedule.id,
+        CohortSubject.semester == semester,
+        CohortSubject.division == division,
+        CohortSubject.batch == batch,
+        _cohort_match(schedule)
+    ).distinct().order_by(ExamTimetable.exam_date, ExamTimetable.start_time, ExamTimetable.subject_name,
+                          ExamTimetable.room_number).yield_per(YIELD_PER)
+
+    def events():
+        for (subject, exam_date, start, end), group in groupby(rows, key=lambda r: r[:4]):
+            rooms = ', '.join(dict.fromkeys(r[4] for r in group if r[4]))
+            uid = f"exam-{schedule.id}-{exam_date:%Y%m%d}-{start:%H%M}-{slug(subject)}@eduportal"
+            yield uid, schedule, exam_date, start, end, f'Exam: {subject}', rooms
+
+    label = f"Sem {semester} {division or ''} {batch or ''}".strip()
+    return _calendar(f'{schedule.name} - {label}', events())
+
+
+def invigilator_filename(faculty_id):
+    return f'invigilator-{faculty_id}.ics'
+
+
+def invigilator_calendar(schedule, faculty_id):
+    """One event per room the faculty member invigilates."""
+    rows = db.session.query(
+        ExamTimetable.id, ExamTimetable.subject_name, ExamTimetable.exam_date, ExamTimetable.start_time,
+        ExamTimetable.end_time, ExamTimetable.room_number
+    ).filter(
+        ExamTimetable.exam_schedule_id == schedule.id, ExamTimetable.faculty_id == faculty_id
+    ).order_by(ExamTimetable.exam_date, ExamTimetable.start_time).yield_per(YIELD_PER)
+
+    events = ((f'exam-{entry_id}@eduportal', schedule, exam_date, start, end,
+               f"Invigilation: {subject or 'Exam'}", room)
+              for entry_id, subject, exam_date, start, end, room in rows)
+    return _calendar(f'{schedule.name} - Invigilation', events)
+
+
+# --- Schedule versions ---
+# Each schedule touched by a transaction is bumped once, in that transaction,
+# as soon as the write is seen: ORM changes from the flush, bulk statements
+# from their parameters or by selecting the rows their WHERE clause matches.
+
+def _bump(session, schedule_ids):
+    bumped = session.info.setdefault('exam_versions_bumped', set())
+    ids = {sid for sid in schedule_ids if sid is not None} - bumped
+    if ids:
+        bumped.update(ids)
+        table = ExamSchedule.__table__
+        session.connection().execute(
+            update(table).where(table.c.id.in_(ids)).values(version=func.coalesce(table.c.version, 0) + 1))
+
+
+@event.listens_for(Session, 'before_flush')
+def _bump_flushed_versions(session, flush_context, instances):
+    ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, ExamTimetable) and (obj not in session.dirty or session.is_modified(obj)):
+            ids.add(obj.exam_schedule_id)
+            ids.update(inspect(obj).attrs.exam_schedule_id.history.deleted or ())
+        elif isinstance(obj, ExamSchedule) and obj not in session.new and session.is_modified(obj):
+            ids.add(obj.id)
+    if ids:
+        _bump(session, ids)
+
+
+def _matched(session, column, statement, params):
+    """Values of ``column`` in the rows a bulk UPDATE/DELETE will touch."""
+    table = column.table
+    if params and all('id' in p for p in params):
+        # Bulk UPDATE by primary key
+        where = table.c.id.in_({p['id'] for p in params})
+    else:
+        where = statement.whereclause
+    query = select(table.c.id, column).where(where) if where is not None else select(table.c.id, column)
+    return session.connection().execute(query).all()
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_bulk_versions(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (ExamTimetable, ExamSchedule):
+        return
+    session = orm_execute_state.session
+    params = orm_execute_state.parameters
+    params = params if isinstance(params, list) else [params] if params else []
+
+    if mapper.class_ is ExamSchedule:
+        if not orm_execute_state.is_insert:
+            _bump(session, {sid for sid, _ in _matched(
+                session, ExamSchedule.__table__.c.id, orm_execute_state.statement, params)})
+        return
+
+    column = ExamTimetable.__table__.c.exam_schedule_id
+    ids = {p.get('exam_schedule_id') for p in params}
+    if not orm_execute_state.is_insert:
+        rows = _matched(session, column, orm_execute_state.statement, params)
+        ids.update(sid for _, sid in rows)
+        if orm_execute_state.is_update and not params:
+            # A WHERE-based UPDATE may move rows to another schedule; look again before commit
+            session.info.setdefault('exam_version_rows', set()).update(row_id for row_id, _ in rows)
+            if not session.info.get('exam_version_hook'):
+                session.info['exam_version_hook'] = True
+                event.listen(session, 'before_commit', _bump_moved_rows)
+    _bump(session, ids)
+
+
+def _bump_moved_rows(session):
+    row_ids = session.info.pop('exam_version_rows', None)
+    if row_ids:
+        table = ExamTimetable.__table__
+        _bump(session, {sid for (sid,) in session.connection().execute(
+            select(table.c.exam_schedule_id).where(table.c.id.in_(row_ids)).distinct())})
+
+
+@event.listens_for(Session, 'after_commit')
+def _reset_versions(session):
+    session.info.pop('exam_versions_bumped', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_versions(session):
+    session.info.pop('exam_versions_bumped', None)
+    session.info.pop('exam_version_rows', None)
@@ -0,0 +1,342 @@
+"""Exam timetable generation for an ExamSchedule.
+
+Each subject in ``Timetable`` becomes one exam sat by every cohort
+(semester/division) that takes it, one room and one invigilator per cohort.
+Two subjects sharing a cohort must land on different days, so placing exams
+is a colouring of that conflict graph with (day, slot) pairs as colours, under
+room and invigilator capacity per slot.
+
+Exams are placed greedily, most constrained first, each into the feasible
+slot with the lowest cost. Local search then moves single exams: first an
+annealing pass that may take worse moves early on, then hill climbing until
+no move helps. The whole thing is restarted a few times with shuffled
+tie-breaks and the best plan is kept. Cost is ``BACK_TO_BACK_WEIGHT`` per cohort with
+exams on consecutive days plus the sum of squared exams per day, which
+spreads the load. Rooms are handed out in order and invigilators least-loaded
+first, skipping anyone marked unavailable or already booked by a stored exam.
+"""
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import ExamTimetable, Faculty, Timetable, User
+from app.services import exam_conflicts
+
+DEFAULT_SLOTS = (('10:00', '13:00'), ('14:00', '17:00'))
+BACK_TO_BACK_WEIGHT = 10
+LOCAL_SEARCH_ROUNDS = 20
+RESTARTS = 3
+ANNEAL_STEPS_PER_EXAM = 500
+MAX_ANNEAL_STEPS = 100000
+
+
+def exam_days(schedule, skip_weekends=True):
+    days = []
+    day = schedule.start_date
+    while day <= schedule.end_date:
+        if not (skip_weekends and day.weekday() >= 5):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def subject_cohorts(schedule):
+    """``{subject: {(semester, division), ...}}`` for the schedule's year and semesters."""
+    query = db.session.query(Timetable.subject_raw, Timetable.semester, Timetable.division).filter(
+        Timetable.subject_raw.isnot(None), Timetable.subject_raw != ''
+    )
+    if schedule.academic_year and db.session.query(Timetable.id).filter(
+            Timetable.academic_year == schedule.academic_year).first():
+        query = query.filter(Timetable.academic_year == schedule.academic_year)
+    kind = (schedule.semester_type or '').strip().lower()
+    if kind.isdigit():
+        query = query.filter(Timetable.semester == int(kind))
+    elif kind in ('odd', 'even'):
+        query = query.filter(Timetable.semester % 2 == (1 if kind == 'odd' else 0))
+
+    cohorts = defaultdict(set)
+    for subject, semester, division in query.distinct():
+        cohorts[subject.strip()].add((semester, division))
+    return cohorts
+
+
+def default_rooms():
+    return sorted({room.strip() for (room,) in db.session.query(Timetable.room_number).distinct()
+                   if room and room.strip()})
+
+
+def active_faculty_ids():
+    return [fid for (fid,) in db.session.query(Faculty.id).join(User, User.id == Faculty.user_id).filter(
+        User.is_active == True).order_by(Faculty.id)]
+
+
+class Plan:
+    """Placement state: exam index -> (day index, slot index)."""
+
+    def __init__(self, exams, n_days, capacity):
+        self.exams = exams  # [(subject, sorted cohorts)]
+        self.n_days = n_days
+        self.capacity = capacity  # (day, slot) -> (free rooms, free invigilators)
+        self.position = {}
+        self.cohort_day = {}  # (cohort, day) -> exam index
+        self.load = [0] * n_days
+        self.used = defaultdict(int)  # (day, slot) -> rooms/invigilators taken
+
+    def need(self, exam):
+        return len(self.exams[exam][1])
+
+    def place(self, exam, pos):
+        self.position[exam] = pos
+        for cohort in self.exams[exam][1]:
+            self.cohort_day[(cohort, pos[0])] = exam
+        self.load[pos[0]] += 1
+        self.used[pos] += self.need(exam)
+
+    def remove(self, exam):
+        pos = self.position.pop(exam)
+        for cohort in self.exams[exam][1]:
+            del self.cohort_day[(cohort, pos[0])]
+        self.load[pos[0]] -= 1
+        self.used[pos] -= self.need(exam)
+        return pos
+
+    def feasible(self, exam, pos):
+        day = pos[0]
+        if any((cohort, day) in self.cohort_day for cohort in self.exams[exam][1]):
+            return False
+        rooms, invigilators = self.capacity[pos]
+        return self.used[pos] + self.need(exam) <= min(rooms, invigilators)
+
+    def cost_at(self, exam, day):
+        """Cost added by putting an (unplaced) exam on ``day``."""
+        adjacent = sum((cohort, d) in self.cohort_day
+                       for cohort in self.exams[exam][1] for d in (day - 1, day + 1))
+        return BACK_TO_BACK_WEIGHT * adjacent + 2 * self.load[day] + 1
+
+    def best_position(self, exam):
+        best, best_cost = None, None
+        for pos in self.capacity:
+            if self.feasible(exam, pos):
+                cost = self.cost_at(exam, pos[0])
+                if best_cost is None or cost < best_cost:
+                    best, best_cost = pos, cost
+        return best, best_cost
+
+    def total_cost(self):
+        back_to_back = sum((cohort, day + 1) in self.cohort_day for cohort, day in self.cohort_day)
+        return BACK_TO_BACK_WEIGHT * back_to_back + sum(n * n for n in self.load), back_to_back
+
+
+def greedy(exams, n_days, capacity, order):
+    plan = Plan(exams, n_days, capacity)
+    unplaced = []
+    for exam in order:
+        pos, _ = plan.best_position(exam)
+        if pos is None:
+            unplaced.append(exam)
+        else:
+            plan.place(exam, pos)
+    return plan, unplaced
+
+
+def climb(plan, unplaced, rng):
+    """Move single exams to cheaper slots until no move helps."""
+    placed = list(plan.position)
+    for _ in range(LOCAL_SEARCH_ROUNDS):
+        improved = False
+        rng.shuffle(placed)
+        for exam in placed:
+            old = plan.remove(exam)
+            old_cost = plan.cost_at(exam, old[0])
+            pos, cost = plan.best_position(exam)
+            if pos is not None and cost < old_cost:
+                plan.place(exam, pos)
+                improved = True
+            else:
+                plan.place(exam, old)
+        # Moves may have freed room for exams the greedy pass couldn't fit
+        for exam in list(unplaced):
+            pos, _ = plan.best_position(exam)
+            if pos is not None:
+                plan.place(exam, pos)
+                unplaced.remove(exam)
+                placed.append(exam)
+                improved = True
+        if not improved:
+            break
+
+
+def anneal(plan, rng, steps):
+    """Random single-exam moves, accepting worse ones with a falling probability.
+
+    ``cost_at`` is exactly an exam's share of ``total_cost``, so the running cost
+    is kept incrementally; the best layout seen is restored at the end.
+    """
+    placed = list(plan.position)
+    positions = list(plan.capacity)
+    if not placed or len(positions) < 2:
+        return
+    cost = best_cost = plan.total_cost()[0]
+    best = dict(plan.position)
+    for step in range(steps):
+        temperature = BACK_TO_BACK_WEIGHT * (1 - step / steps) + 0.01
+        exam = rng.choice(placed)
+        pos = rng.choice(positions)
+        old = plan.remove(exam)
+        if pos != old and plan.feasible(exam, pos):
+            delta = plan.cost_at(exam, pos[0]) - plan.cost_at(exam, old[0])
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                plan.place(exam, pos)
+                cost += delta
+                if cost < best_cost:
+                    best_cost, best = cost, dict(plan.position)
+                continue
+        plan.place(exam, old)
+    if cost > best_cost:
+        for exam in placed:
+            plan.remove(exam)
+        for exam, pos in best.items():
+            plan.place(exam, pos)
+
+
+def solve(exams, n_days, capacity, seed=0, restarts=RESTARTS):
+    """Greedy placement plus hill climbing, restarted with shuffled tie-breaks.
+
+    Returns the best plan, its unplaced exams and the cost of the first greedy pass.
+    """
+    degree = defaultdict(int)
+    by_cohort = defaultdict(list)
+    for i, (_, cohorts) in enumerate(exams):
+        for cohort in cohorts:
+            by_cohort[cohort].append(i)
+    for members in by_cohort.values():
+        for i in members:
+            degree[i] += len(members) - 1
+
+    rng = random.Random(seed)
+    best = None
+    greedy_cost = None
+    for attempt in range(restarts):
+        # Most conflicted and largest exams first; ties broken by name, then at random
+        tie = {i: (exams[i][0] if attempt == 0 else rng.random()) for i in range(len(exams))}
+        order = sorted(range(len(exams)), key=lambda i: (-degree[i], -len(exams[i][1]), tie[i]))
+        plan, unplaced = greedy(exams, n_days, capacity, order)
+        if greedy_cost is None:
+            greedy_cost = plan.total_cost()[0]
+        anneal(plan, rng, min(ANNEAL_STEPS_PER_EXAM * len(exams), MAX_ANNEAL_STEPS))
+        climb(plan, unplaced, rng)
+        score = (len(unplaced), plan.total_cost()[0])
+        if best is None or score < best[0]:
+            best = (score, plan, unplaced)
+        if score == (0, 0):
+            break
+    return best[1], best[2], greedy_cost
+
+
+def generate(schedule, slots=DEFAULT_SLOTS, rooms=None, unavailable=None, skip_weekends=True,
+             seed=0, ignore_schedule_entries=False):
+    """Plan a clash-free timetable; returns ``(entries, metrics)`` without writing anything.
+
+    ``unavailable`` maps faculty id -> dates they can't invigilate. Stored exams
+    on the schedule's dates keep their rooms and invigilators booked; with
+    ``ignore_schedule_entries`` this schedule's own rows are left out (they are
+    about to be replaced).
+    """
+    started = time.perf_counter()
+    slots = [(exam_conflicts.parse_time(start), exam_conflicts.parse_time(end)) for start, end in slots]
+    for start, end in slots:
+        if end <= start:
+            raise ValueError(f"slot {start.strftime('%H:%M')}-{end.strftime('%H:%M')} must end after it starts")
+    days = exam_days(schedule, skip_weekends)
+    rooms = sorted({r.strip() for r in rooms if r and r.strip()}) if rooms else default_rooms()
+    faculty = active_faculty_ids()
+    unavailable = {int(fid): set(dates) for fid, dates in (unavailable or {}).items()}
+    cohorts = subject_cohorts(schedule)
+    exams = [(subject, sorted(cohorts[subject], key=str)) for subject in sorted(cohorts)]
+
+    own = set()
+    if ignore_schedule_entries:
+        own = {eid for (eid,) in db.session.query(ExamTimetable.id).filter(
+            ExamTimetable.exam_schedule_id == schedule.id)}
+    booked = exam_conflicts.existing_slots(set(days), own)
+
+    free_rooms, free_faculty, capacity = {}, {}, {}
+    for d, day in enumerate(days):
+        for s, (start, end) in enumerate(slots):
+            busy = [b for b in booked if b.exam_date == day and b.start < end and start < b.end]
+            busy_rooms = {b.room for b in busy}
+            busy_faculty = {b.faculty_id for b in busy}
+            free_rooms[(d, s)] = [r for r in rooms if exam_conflicts.room_key(r) not in busy_rooms]
+            free_faculty[(d, s)] = [f for f in faculty if f not in busy_faculty and day not in unavailable.get(f, ())]
+            capacity[(d, s)] = (len(free_rooms[(d, s)]), len(free_faculty[(d, s)]))
+
+    plan, unplaced, greedy_cost = solve(exams, len(days), capacity, seed)
+
+    # Rooms in order, invigilators least-loaded first
+    duty = dict.fromkeys(faculty, 0)
+    entries = []
+    by_position = defaultdict(list)
+    for exam, pos in plan.position.items():
+        by_position[pos].append(exam)
+    for pos in sorted(by_position):
+        day, (start, end) = days[pos[0]], slots[pos[1]]
+        room_iter = iter(free_rooms[pos])
+        invigilators = sorted(free_faculty[pos], key=lambda f: (duty[f], f))
+        taken = 0
+        for exam in sorted(by_position[pos], key=lambda i: exams[i][0]):
+            subject, exam_cohorts = exams[exam]
+            for semester, division in exam_cohorts:
+                faculty_id = invigilators[taken]
+                taken += 1
+                duty[faculty_id] += 1
+                entries.append({
+                    'exam_schedule_id': schedule.id,
+                    'subject_name': subject,
+                    'semester': semester,
+                    'division': division,
+                    'exam_date': day,
+                    'start_time': start,
+                    'end_time': end,
+                    'room_number': next(room_iter),
+                    'faculty_id': faculty_id
+                })
+
+    final_cost, back_to_back = plan.total_cost()
+    loads = [n for n in duty.values() if n] or [0]
+    metrics = {
+        'solver_ms': round((time.perf_counter() - started) * 1000, 1),
+        'exams': len(exams),
+        'placed': len(plan.position),
+        'unplaced': sorted(exams[i][0] for i in unplaced),
+        'entries': len(entries),
+        'days_available': len(days),
+        'days_used': sum(1 for n in plan.load if n),
+        'max_exams_per_day': max(plan.load, default=0),
+        'cohort_back_to_back_days': back_to_back,
+        'greedy_cost': greedy_cost,
+        'final_cost': final_cost,
+        'invigilators_used': sum(1 for n in duty.values() if n),
+        'invigilator_duties_min': min(loads),
+        'invigilator_duties_max': max(loads),
+        # Independent re-check against the stored timetable; 0 unless something is off
+        'conflicts': len(exam_conflicts.check_submission(as_slots(entries), own)),
+    }
+    return entries, metrics
+
+
+def serialize_entry(entry):
+    return dict(entry, exam_date=entry['exam_date'].isoformat(),
+                start_time=entry['start_time'].strftime('%H:%M'), end_time=entry['end_time'].strftime('%H:%M'))
+
+
+def as_slots(entries):
+    return [exam_conflicts.Slot({'row': i}, e['exam_date'], e['start_time'], e['end_time'],
+                                e['room_number'], e['faculty_id'], e['subject_name'])
+            for i, e in enumerate(entries)]
+
+
+def parse_unavailable(raw):
+    return {fid: {datetime.strptime(d, '%Y-%m-%d').date() for d in dates} for fid, dates in (raw or {}).items()}
@@ -0,0 +1,166 @@
+"""Batch create/update of exam timetable entries.
+
+``prepare`` validates a whole submission up front - field types, the
+schedule's date range, end after start, ids that exist - resolving every
+referenced row and schedule with one ``IN`` query each. ``apply`` then writes
+updates with one ORM bulk UPDATE by primary key and inserts with one bulk
+INSERT, so a few hundred rows cost a handful of statements in a single
+transaction. Both go through ``Session.execute`` so the session's write hooks
+(cache invalidation, schedule versions) see them.
+"""
+from datetime import date, datetime
+
+from sqlalchemy import insert, update
+
+from app.extensions import db
+from app.models import ExamSchedule, ExamTimetable
+from app.services import exam_conflicts
+
+FIELDS = ('exam_schedule_id', 'subject_id', 'subject_name', 'exam_date', 'start_time', 'end_time',
+          'room_number', 'faculty_id')
+REQUIRED = ('exam_schedule_id', 'exam_date', 'start_time', 'end_time', 'room_number')
+
+
+def _optional_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+def parse_fields(entry):
+    """Typed values for the fields present in ``entry``; raises ValueError."""
+    fields = {}
+    for name in FIELDS:
+        if name not in entry:
+            continue
+        value = entry[name]
+        if name in ('exam_schedule_id', 'subject_id', 'faculty_id'):
+            value = _optional_int(value)
+        elif name == 'exam_date':
+            value = value if isinstance(value, date) else datetime.strptime(str(value), '%Y-%m-%d').date()
+        elif name in ('start_time', 'end_time'):
+            value = exam_conflicts.parse_time(value)
+        else:
+            value = (str(value).strip() or None) if value is not None else None
+        fields[name] = value
+    return fields
+
+
+class Batch:
+    def __init__(self, size):
+        self.inserts = []  # (row, mapping)
+        self.updates = []  # (row, mapping)
+        self.slots = []
+        self.results = [None] * size
+
+    @property
+    def errors(self):
+        return [r for r in self.results if r['status'] == 'error']
+
+    @property
+    def replacing_ids(self):
+        return {mapping['id'] for _, mapping in self.updates}
+
+    def fail(self, row, message):
+        self.results[row] = {'row': row, 'status': 'error', 'error': message}
+
+
+def prepare(entries):
+    """Validate every entry against the stored rows and schedule windows, writing nothing."""
+    batch = Batch(len(entries))
+
+    requested = set()
+    for entry in entries:
+        try:
+            if isinstance(entry, dict) and entry.get('id'):
+                requested.add(int(entry['id']))
+        except (TypeError, ValueError):
+            pass
+    columns = [getattr(ExamTimetable, name) for name in FIELDS]
+    existing = {row[0]: dict(zip(FIELDS, row[1:])) for row in db.session.query(ExamTimetable.id, *columns).filter(
+        ExamTimetable.id.in_(requested))} if requested else {}
+
+    parsed = []
+    for row, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            parsed.append(None)
+            batch.fail(row, 'Entry must be an object')
+            continue
+        try:
+            entry_id = _optional_int(entry.get('id'))
+            parsed.append((entry_id, parse_fields(entry)))
+        except (TypeError, ValueError) as e:
+            parsed.append(None)
+            batch.fail(row, str(e))
+
+    schedule_ids = {item[1].get('exam_schedule_id') for item in parsed if item}
+    schedule_ids |= {values['exam_schedule_id'] for values in existing.values()}
+    schedule_ids.discard(None)
+    windows = {sid: (start, end) for sid, start, end in db.session.query(
+        ExamSchedule.id, ExamSchedule.start_date, ExamSchedule.end_date
+    ).filter(ExamSchedule.id.in_(schedule_ids))} if schedule_ids else {}
+
+    seen = set()
+    for row, item in enumerate(parsed):
+        if item is None:
+            continue
+        entry_id, fields = item
+        if entry_id:
+            if entry_id not in existing:
+                batch.fail(row, f'Entry {entry_id} not found')
+                continue
+            if entry_id in seen:
+                batch.fail(row, f'Entry {entry_id} appears more than once')
+                continue
+            seen.add(entry_id)
+            values = dict(existing[entry_id], **fields)
+        else:
+            missing = [name for name in REQUIRED if fields.get(name) is None]
+            if missing:
+                batch.fail(row, f"Missing field {', '.join(missing)}")
+                continue
+            values = fields
+
+        window = windows.get(values['exam_schedule_id'])
+        if window is None:
+            batch.fail(row, 'Schedule not found')
+            continue
+        if not window[0] <= values['exam_date'] <= window[1]:
+            batch.fail(row, f'exam_date must be between {window[0].isoformat()} and {window[1].isoformat()}')
+            continue
+        if values['end_time'] <= values['start_time']:
+            batch.fail(row, 'end_time must be after start_time')
+            continue
+        if not values.get('room_number'):
+            batch.fail(row, 'room_number is required')
+            continue
+
+        if entry_id:
+            batch.updates.append((row, dict(fields, id=entry_id)))
+            batch.results[row] = {'row': row, 'status': 'updated', 'id': entry_id}
+        else:
+            batch.inserts.append((row, dict(fields)))
+            batch.results[row] = {'row': row, 'status': 'created'}
+        batch.slots.append(exam_conflicts.Slot(
+            {'row': row}, values['exam_date'], values['start_time'], values['end_time'],
+            values['room_number'], values.get('faculty_id'), values.get('subject_name')))
+    return batch
+
+
+def apply(batch):
+    """Write a validated batch: UPDATE and INSERT executemany calls (caller commits)."""
+    if batch.updates:
+        db.session.execute(update(ExamTimetable), [mapping for _, mapping in batch.updates])
+    if batch.inserts:
+        mappings = [mapping for _, mapping in batch.inserts]
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Still one batched INSERT, with the new ids returned in row order
+            ids = db.session.scalars(
+                insert(ExamTimetable).returning(ExamTimetable.id, sort_by_parameter_order=True), mappings
+            ).all()
+            for (row, _), new_id in zip(batch.inserts, ids):
+                batch.results[row]['id'] = new_id
+        else:
+            # SQLite can't return server-generated ids from a batched INSERT in row
+            # order (SQLAlchemy falls back to one INSERT per row), so created rows
+            # are reported without ids
+            db.session.execute(insert(ExamTimetable), mappings)
+    return batch.results
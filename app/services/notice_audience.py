@@ -0,0 +1,192 @@
+"""Audience targeting for notices.
+
+Each notice stores one ``NoticeAudience`` key per role it is visible to, built
+from its targeting columns as ``role:branch:semester:class`` with ``*`` standing
+for "anyone". A viewer expands their own profile into the (at most eight) key
+patterns that could match it, so resolving their notices is a single IN lookup on
+the audience_key index instead of a chain of ``OR ... IS NULL`` filters.
+
+Resolved pages are cached per viewer key tuple against a feed version counter
+that moves whenever a notice write commits (scheduler flips included) or another
+process is seen to have changed the table.
+"""
+import itertools
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Notice, NoticeAudience
+
+ANY = '*'
+ROLES_FOR_VISIBILITY = {
+    'student': ('student',),
+    'faculty': ('faculty',),
+    'both': ('student', 'faculty'),
+}
+
+_lock = threading.Lock()
+_entries = {}  # (viewer key tuple, page args) -> (result, feed version)
+
+
+def _part(value):
+    # The old feed treated '' and 0 like NULL, i.e. "not targeted"
+    return str(value) if value not in (None, '', 0) else ANY
+
+
+def audience_keys(notice):
+    """Keys a notice should be indexed under."""
+    keys = []
+    for role in ROLES_FOR_VISIBILITY.get(notice.visible_to, ()):
+        if role == 'student':
+            parts = (notice.target_branch, notice.target_semester, notice.target_class_id)
+        else:
+            # Targeting columns describe students; faculty see every notice addressed to them
+            parts = (None, None, None)
+        keys.append(':'.join([role] + [_part(p) for p in parts]))
+    return keys
+
+
+def sync_audience(notice):
+    keys = audience_keys(notice)
+    if sorted(a.audience_key for a in notice.audiences) != sorted(keys):
+        notice.audiences = [NoticeAudience(audience_key=key) for key in keys]
+
+
+def viewer_profile(role, student=None):
+    """Key tuple for a viewer: ``(role, branch, semester, class_id)``."""
+    if role != 'student' or student is None:
+        return (role, None, None, None)
+    class_id = f"{student.branch}-{student.division}" if student.division else None
+    return (role, student.branch, student.current_semester, class_id)
+
+
+def viewer_keys(profile):
+    role, *parts = profile
+    choices = [(ANY,) if _part(p) == ANY else (_part(p), ANY) for p in parts]
+    return [':'.join((role,) + combo) for combo in itertools.product(*choices)]
+
+
+URGENCY_RANKS = {'urgent': 3, 'moderate': 2, 'low': 1}
+
+
+def urgency_rank(urgency):
+    return URGENCY_RANKS.get(urgency, URGENCY_RANKS['low'])
+
+
+def visible_query(profile):
+    """Active notices for the viewer; admins see every active notice.
+
+    ``is_active`` is flipped by the notice scheduler at publish_at/expire_at, so
+    no time window is needed here.
+    """
+    query = Notice.query.filter(Notice.is_active == True)
+    if profile[0] != 'admin':
+        matching = db.session.query(NoticeAudience.notice_id).filter(
+            NoticeAudience.audience_key.in_(viewer_keys(profile))
+        )
+        query = query.filter(Notice.id.in_(matching))
+    return query
+
+
+def fan_out_audiences(notice):
+    """``notifications.audience_query`` arguments covering the notice's readers."""
+    audiences = []
+    for role in ROLES_FOR_VISIBILITY.get(notice.visible_to, ()):
+        audience = {'role': role}
+        if role == 'student':
+            class_id = notice.target_class_id
+            audience.update({
+                'branch': notice.target_branch or None,
+                'semester': notice.target_semester or None,
+                # Class ids are '<branch>-<division>', see viewer_profile
+                'division': class_id.rsplit('-', 1)[-1] if class_id else None,
+            })
+        audiences.append(audience)
+    return audiences
+
+
+# --- Feed version ---
+#
+# A counter bumped whenever the visible set of notices may have changed: a notice
+# write (including a scheduler flip) committed in this process, or another process
+# was seen to change the table (count/max(updated_at) is compared every
+# NOTICE_CACHE_TTL seconds). Cached pages and ETags are tied to it.
+
+_version = 0
+_signature = None
+_checked_at = None
+
+
+def _table_signature():
+    return tuple(db.session.query(db.func.count(Notice.id), db.func.max(Notice.updated_at)).one())
+
+
+def _bump():
+    global _version, _checked_at
+    with _lock:
+        _version += 1
+        _entries.clear()
+        _checked_at = None
+
+
+def feed_version():
+    """Current feed version, revalidated against the table every NOTICE_CACHE_TTL."""
+    global _signature, _checked_at
+    if _checked_at is None or time.monotonic() - _checked_at >= current_app.config['NOTICE_CACHE_TTL']:
+        signature = _table_signature()
+        if _signature is not None and signature != _signature:
+            _bump()
+        with _lock:
+            _signature = signature
+            _checked_at = time.monotonic()
+    return _version
+
+
+def cached(key, build):
+    """``build()`` cached under ``key`` for the current feed version."""
+    version = feed_version()
+    entry = _entries.get(key)
+    if entry and entry[1] == version:
+        return entry[0]
+    result = build()
+    with _lock:
+        _entries[key] = (result, version)
+    return result
+
+
+def invalidate():
+    _bump()
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_notice_audiences(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Notice):
+            obj.urgency_rank = urgency_rank(obj.urgency)
+            sync_audience(obj)
+    if any(isinstance(obj, (Notice, NoticeAudience))
+           for obj in itertools.chain(session.new, session.dirty, session.deleted)):
+        session.info['notices_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_notice_write(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ in (Notice, NoticeAudience):
+        orm_execute_state.session.info['notices_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('notices_changed', None):
+        invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('notices_changed', None)
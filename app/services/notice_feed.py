@@ -0,0 +1,122 @@
+"""Paginated notice feed served as excerpts.
+
+Pages are keyset scans over (urgency_rank, created_at, id), newest and most urgent
+first, and only carry the first EXCERPT_LENGTH characters of each notice; the
+full text is fetched per notice. Pages are cached and ETagged against the feed
+version kept by ``notice_audience``, so an unchanged feed is answered with a 304
+without querying the notices.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from app.extensions import db
+from app.models import Notice, User
+from app.services import notice_audience
+
+EXCERPT_LENGTH = 200
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+
+def encode_cursor(row):
+    data = {'r': row.urgency_rank, 'c': row.created_at.isoformat(), 'i': row.id}
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Raises ValueError for anything that isn't a cursor we issued."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(data['r']), datetime.fromisoformat(data['c']), int(data['i'])
+    except (TypeError, KeyError, AttributeError, json.JSONDecodeError, binascii.Error) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def parse_page_args(args):
+    """Return ``(limit, cursor)``; the cursor is validated but kept encoded for cache keys."""
+    limit = min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    cursor = args.get('cursor') or None
+    if cursor:
+        decode_cursor(cursor)
+    return limit, cursor
+
+
+def feed_etag(profile, limit, cursor):
+    digest = hashlib.sha1(repr((profile, limit, cursor)).encode()).hexdigest()[:16]
+    return f"notices-{notice_audience.feed_version()}-{digest}"
+
+
+def _page_query(profile, limit, cursor):
+    query = notice_audience.visible_query(profile).outerjoin(
+        User, User.id == Notice.created_by_user_id
+    ).with_entities(
+        Notice.id, Notice.title, Notice.urgency, Notice.urgency_rank, Notice.visible_to,
+        Notice.created_at, User.full_name.label('author'),
+        db.func.substr(Notice.content, 1, EXCERPT_LENGTH).label('excerpt'),
+        (db.func.length(Notice.content) > EXCERPT_LENGTH).label('truncated')
+    )
+    if cursor:
+        rank, created_at, notice_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Notice.urgency_rank < rank,
+            and_(Notice.urgency_rank == rank, or_(
+                Notice.created_at < created_at,
+                and_(Notice.created_at == created_at, Notice.id < notice_id)
+            ))
+        ))
+    return query.order_by(
+        Notice.urgency_rank.desc(), Notice.created_at.desc(), Notice.id.desc()
+    ).limit(limit + 1)
+
+
+def _serialize(row):
+    return {
+        'id': row.id,
+        'title': row.title,
+        'excerpt': row.excerpt,
+        'truncated': bool(row.truncated),
+        'notice_type': row.urgency,
+        'visible_to': row.visible_to,
+        'created_at': row.created_at.isoformat(),
+        'author': row.author or 'System',
+    }
+
+
+def feed_page(profile, limit, cursor=None):
+    """``{'notices': [...], 'next_cursor': ...}`` for the viewer, cached per feed version."""
+    def build():
+        rows = _page_query(profile, limit, cursor).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1])
+        return {'notices': [_serialize(r) for r in rows], 'next_cursor': next_cursor}
+
+    return notice_audience.cached((profile, limit, cursor), build)
+
+
+def load_notice(profile, notice_id):
+    """Full notice if the viewer may see it, else None."""
+    return notice_audience.visible_query(profile).filter(Notice.id == notice_id).first()
+
+
+def serialize_notice(notice):
+    return {
+        'id': notice.id,
+        'title': notice.title,
+        'content': notice.content,
+        'notice_type': notice.urgency,
+        'visible_to': notice.visible_to,
+        'created_at': notice.created_at.isoformat(),
+        'expire_at': notice.expire_at.isoformat() if notice.expire_at else None,
+        'author': notice.author.full_name if notice.author else 'System',
+    }
+
+
+def notice_etag(notice):
+    return f"notice-{notice.id}-{notice.updated_at.timestamp() if notice.updated_at else 0}"
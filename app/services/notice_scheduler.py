@@ -0,0 +1,144 @@
+"""Publishes and expires notices on time.
+
+Notices published with a future ``publish_at`` are stored inactive and
+unpublished. A background thread keeps a min-heap of upcoming publish/expiry
+times and sleeps until the earliest one; on waking it sweeps every due notice:
+unpublished notices past publish_at are switched on and their audience is
+notified, active notices past expire_at are switched off. The commit bumps the
+notice feed version, so readers only ever filter on ``is_active``.
+
+The sweep is idempotent and each publish is claimed with a conditional UPDATE, so
+several workers can run schedulers against one database without notifying twice.
+Every NOTICE_SCHEDULER_POLL seconds the heap is reloaded from the table to pick
+up notices scheduled by other processes.
+"""
+import heapq
+import logging
+import threading
+from datetime import datetime
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import Notice
+from app.services.notice_audience import fan_out_audiences
+from app.services.notifications import fan_out
+
+log = logging.getLogger(__name__)
+
+
+class NoticeScheduler:
+    def __init__(self, app, poll_interval):
+        self.app = app
+        self.poll_interval = poll_interval
+        self._heap = []  # (when, notice_id)
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._wakeup:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notice-scheduler', daemon=True)
+                self._thread.start()
+
+    def schedule(self, when, notice_id):
+        with self._wakeup:
+            heapq.heappush(self._heap, (when, notice_id))
+            self._wakeup.notify()
+
+    def _next_wait(self):
+        if not self._heap:
+            return self.poll_interval
+        delay = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+        return max(0, min(delay, self.poll_interval))
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                try:
+                    self.reload()
+                    self.sweep()
+                    self._wait_for_due()
+                except Exception:
+                    db.session.rollback()
+                    log.exception("Notice scheduler pass failed")
+                    with self._wakeup:
+                        self._wakeup.wait(self.poll_interval)
+                finally:
+                    db.session.remove()
+
+    def _wait_for_due(self):
+        """Sleep until the next transition, a new schedule() call or the poll interval."""
+        with self._wakeup:
+            wait = self._next_wait()
+            if wait > 0:
+                self._wakeup.wait(wait)
+
+    def reload(self):
+        """Rebuild the heap from the table's upcoming publish and expiry times."""
+        now = datetime.utcnow()
+        pending = db.session.query(Notice.publish_at, Notice.id).filter(
+            Notice.is_published == False, Notice.publish_at > now)
+        expiring = db.session.query(Notice.expire_at, Notice.id).filter(
+            Notice.is_active == True, Notice.expire_at > now)
+        heap = [tuple(row) for row in pending.union_all(expiring)]
+        heapq.heapify(heap)
+        with self._wakeup:
+            self._heap = heap
+
+    def sweep(self, now=None):
+        """Apply every transition that is due; returns ``(published, expired)`` counts."""
+        now = now or datetime.utcnow()
+        due = db.session.query(Notice.id).filter(
+            Notice.is_published == False, Notice.publish_at <= now
+        ).all()
+        published = []
+        for (notice_id,) in due:
+            # Claim the notice so only one worker announces it
+            claimed = Notice.query.filter(
+                Notice.id == notice_id, Notice.is_published == False
+            ).update({'is_published': True, 'is_active': True, 'updated_at': now},
+                     synchronize_session=False)
+            if claimed:
+                published.append(notice_id)
+
+        expired = Notice.query.filter(
+            Notice.is_active == True, Notice.expire_at <= now
+        ).update({'is_active': False, 'updated_at': now}, synchronize_session=False)
+        db.session.commit()
+
+        # Their expiry times are picked up by the next reload()
+        for notice in Notice.query.filter(Notice.id.in_(published)).all() if published else ():
+            if notice.is_active:
+                announce(notice, background=False)
+        if published or expired:
+            log.info("Notice scheduler published %d and expired %d notices", len(published), expired)
+        return len(published), expired
+
+
+def init_app(app):
+    scheduler = NoticeScheduler(app, app.config['NOTICE_SCHEDULER_POLL'])
+    app.extensions['notice_scheduler'] = scheduler
+
+    if app.config['NOTICE_SCHEDULER_ENABLED']:
+        # Started by the first request so CLI scripts building an app don't spawn it
+        @app.before_request
+        def start_notice_scheduler():
+            if scheduler._thread is None:
+                scheduler.start()
+
+
+def schedule(notice):
+    """Register a committed notice's future publish and expiry times with this worker."""
+    scheduler = current_app.extensions['notice_scheduler']
+    now = datetime.utcnow()
+    if not notice.is_published and notice.publish_at:
+        scheduler.schedule(max(notice.publish_at, now), notice.id)
+    if notice.expire_at:
+        scheduler.schedule(max(notice.expire_at, now), notice.id)
+
+
+def announce(notice, background=None):
+    """Notify the notice's audience."""
+    for audience in fan_out_audiences(notice):
+        fan_out(audience, 'New Notice', notice.title, 'notice', background=background)
@@ -0,0 +1,215 @@
+"""Bulk creation of Notification rows.
+
+``notify`` writes a known list of recipients with chunked executemany inserts.
+``fan_out`` resolves an audience (role, branch, semester, division, batch) inside
+the database and writes every notification with a single INSERT ... SELECT,
+optionally on a background worker so the publishing request returns immediately.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import combinations
+
+from flask import current_app
+from sqlalchemy import event, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Notification, Student, User
+from app.services.events import publish_after_commit, user_channel
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+STUDENT_FIELDS = {
+    'branch': Student.branch,
+    'semester': Student.current_semester,
+    'division': Student.division,
+    'batch': Student.batch,
+}
+
+# One worker keeps fan-outs from competing for SQLite's write lock; threads start on first submit
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notify')
+
+
+def notify(user_ids, title, message, notification_type):
+    """Queue notifications for explicit recipients on the current session."""
+    now = datetime.utcnow()
+    rows = [{
+        'user_id': user_id,
+        'title': title,
+        'message': message,
+        'notification_type': notification_type,
+        'is_read': False,
+        'created_at': now
+    } for user_id in user_ids if user_id]
+    for i in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(Notification), rows[i:i + CHUNK_SIZE])
+    _pending_deltas(db.session).extend((row['user_id'], 1) for row in rows)
+    for row in rows:
+        publish_after_commit(user_channel(row['user_id']), 'notification',
+                             {'title': title, 'notification_type': notification_type})
+    return len(rows)
+
+
+def audience_query(role=None, **filters):
+    """SELECT of active user ids matching the audience; student filters imply role=student."""
+    unknown = set(filters) - set(STUDENT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown audience filter(s): {', '.join(sorted(unknown))}")
+    filters = {k: v for k, v in filters.items() if v not in (None, '')}
+    if filters and role not in (None, 'student'):
+        raise ValueError(f"Audience filter(s) {', '.join(sorted(filters))} only apply to students, not role '{role}'")
+
+    query = select(User.id).where(User.is_active == True)
+    if filters or role == 'student':
+        query = query.join(Student, Student.user_id == User.id).where(Student.function == 1)
+        role = 'student'
+        for key, value in filters.items():
+            query = query.where(STUDENT_FIELDS[key] == value)
+    if role:
+        query = query.where(User.role == role)
+    return query
+
+
+def audience_channel(audience):
+    """Event channel for an audience dict; its members subscribe via ``member_channels``."""
+    filters = {k: v for k, v in audience.items() if k != 'role' and v not in (None, '')}
+    role = 'student' if filters else audience.get('role')
+    parts = [role or '*'] + [f'{key}={filters[key]}' for key in sorted(filters)]
+    return 'audience:' + '|'.join(parts)
+
+
+def member_channels(role, student=None):
+    """Every audience channel a user with this role (and student profile) belongs to."""
+    channels = [audience_channel({})]
+    if role:
+        channels.append(audience_channel({'role': role}))
+    if role == 'student' and student is not None:
+        values = {key: getattr(student, column.key) for key, column in STUDENT_FIELDS.items()}
+        values = {k: v for k, v in values.items() if v not in (None, '')}
+        # A fan-out can filter on any subset of the profile fields
+        for size in range(1, len(values) + 1):
+            for keys in combinations(sorted(values), size):
+                channels.append(audience_channel({key: values[key] for key in keys}))
+    return channels
+
+
+def _insert_for_audience(audience, title, message, notification_type):
+    user_ids = audience_query(**audience).subquery()
+    source = select(
+        user_ids.c.id,
+        literal(title),
+        literal(message),
+        literal(notification_type),
+        literal(False),
+        literal(datetime.utcnow())
+    )
+    stmt = insert(Notification).from_select(
+        ['user_id', 'title', 'message', 'notification_type', 'is_read', 'created_at'], source
+    )
+    _pending_deltas(db.session).append((_ALL, 0))
+    # Only the audience's members are subscribed to its channel
+    publish_after_commit(audience_channel(audience), 'notification', {
+        'title': title, 'notification_type': notification_type
+    })
+    return db.session.execute(stmt).rowcount
+
+
+def fan_out(audience, title, message, notification_type, background=None):
+    """Notify every user in ``audience`` (a dict of audience_query arguments).
+
+    In the background (the default, see NOTIFICATION_FANOUT_ASYNC) the insert runs
+    in the worker's own session and a Future is returned. Otherwise it commits the
+    current session and returns the inserted row count.
+    """
+    audience_query(**audience)  # validate before handing off
+    if background is None:
+        background = current_app.config['NOTIFICATION_FANOUT_ASYNC']
+    if not background:
+        count = _insert_for_audience(audience, title, message, notification_type)
+        db.session.commit()
+        return count
+
+    app = current_app._get_current_object()
+    return _executor.submit(_run_in_background, app, audience, title, message, notification_type)
+
+
+def _run_in_background(app, audience, title, message, notification_type):
+    with app.app_context():
+        try:
+            count = _insert_for_audience(audience, title, message, notification_type)
+            db.session.commit()
+            return count
+        except Exception:
+            db.session.rollback()
+            log.exception("Notification fan-out failed for audience %r", audience)
+            raise
+
+
+
+# --- Per-user unread counters ---
+#
+# Kept in-process so the badge poll never touches the database. Inserts and
+# mark-read operations adjust the counters once their transaction commits;
+# audience fan-outs, whose recipients aren't known in Python, drop the cache
+# instead. Entries older than NOTIFICATION_COUNTER_TTL are recounted from the
+# (user_id, is_read, created_at) index so writes from other workers show up.
+
+_counter_lock = threading.Lock()
+_unread = {}  # user_id -> (count, counted_at)
+_ALL = object()  # delta key meaning "recipients unknown, drop every counter"
+
+
+def unread_count(user_id):
+    entry = _unread.get(user_id)
+    if entry and time.monotonic() - entry[1] < current_app.config['NOTIFICATION_COUNTER_TTL']:
+        return entry[0]
+
+    count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    with _counter_lock:
+        _unread[user_id] = (count, time.monotonic())
+    return count
+
+
+def mark_read_up_to(user_id, max_id):
+    """Mark every unread notification of the user with id <= max_id as read."""
+    updated = Notification.query.filter(
+        Notification.user_id == user_id,
+        Notification.is_read == False,
+        Notification.id <= max_id
+    ).update({'is_read': True}, synchronize_session=False)
+    _pending_deltas(db.session).append((user_id, -updated))
+    return updated
+
+
+def reset_counters():
+    with _counter_lock:
+        _unread.clear()
+
+
+def _pending_deltas(session):
+    return session.info.setdefault('unread_deltas', [])
+
+
+def _apply_deltas(session):
+    deltas = session.info.pop('unread_deltas', None)
+    if not deltas:
+        return
+    with _counter_lock:
+        for user_id, delta in deltas:
+            if user_id is _ALL:
+                _unread.clear()
+            elif user_id in _unread:
+                count, counted_at = _unread[user_id]
+                _unread[user_id] = (max(count + delta, 0), counted_at)
+
+
+def _discard_deltas(session):
+    session.info.pop('unread_deltas', None)
+
+
+event.listen(Session, 'after_commit', _apply_deltas)
+event.listen(Session, 'after_rollback', _discard_deltas)
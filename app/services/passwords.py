@@ -0,0 +1,29 @@
+"""Password hashing with a configurable cost policy.
+
+PASSWORD_HASH_METHOD selects the werkzeug method (e.g. ``scrypt:32768:8:1`` or
+``pbkdf2:sha256:260000``). Hashes stored with other parameters keep verifying and
+are upgraded on the user's next successful login.
+"""
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+@lru_cache(maxsize=8)
+def _canonical_method(method):
+    # werkzeug fills in defaults (e.g. 'pbkdf2' -> 'pbkdf2:sha256:1000000'),
+    # so compare against what it would actually store
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+def needs_rehash(pwhash):
+    return pwhash.split('$', 1)[0] != _canonical_method(current_app.config['PASSWORD_HASH_METHOD'])
@@ -0,0 +1,189 @@
+"""Shared query builders for the student/faculty query thread system."""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.extensions import db
+from app.models import QueryThread, QueryPost, Student, Faculty
+
+PREVIEW_LENGTH = 50
+
+
+def last_post_preview():
+    """Correlated subquery yielding the first characters of a thread's newest post."""
+    return db.session.query(
+        db.func.substr(QueryPost.content, 1, PREVIEW_LENGTH)
+    ).filter(
+        QueryPost.thread_id == QueryThread.id
+    ).order_by(
+        QueryPost.created_at.desc(), QueryPost.id.desc()
+    ).limit(1).correlate(QueryThread).scalar_subquery()
+
+
+def with_student_user():
+    return joinedload(QueryThread.student).joinedload(Student.user)
+
+
+def with_faculty_user():
+    return joinedload(QueryThread.faculty).joinedload(Faculty.user)
+
+
+def thread_list_query(*options):
+    """``(thread, preview)`` rows; pass the loader options the listing needs."""
+    return db.session.query(
+        QueryThread, last_post_preview().label('last_post_preview')
+    ).options(*options)
+
+
+def format_preview(preview):
+    return preview + "..." if preview is not None else ""
+
+
+# --- Keyset pagination on (updated_at, id) ---
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(thread=None, phase=None):
+    data = {'p': phase}
+    if thread is not None:
+        data.update({'u': thread.updated_at.isoformat(), 'i': thread.id})
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Raises ValueError for anything that isn't a cursor we issued."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after = (datetime.fromisoformat(data['u']), int(data['i'])) if 'u' in data else None
+        return data.get('p'), after
+    except (TypeError, KeyError, AttributeError, json.JSONDecodeError, binascii.Error) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def parse_page_args(args):
+    """Return ``(limit, phase, after)`` from the request args."""
+    limit = min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    cursor = args.get('cursor')
+    phase, after = decode_cursor(cursor) if cursor else (None, None)
+    return limit, phase, after
+
+
+def keyset_page(query, limit, after=None, phase=None):
+    """Newest-first page of ``query`` strictly after the ``(updated_at, id)`` position."""
+    if after:
+        updated_at, thread_id = after
+        query = query.filter(or_(
+            QueryThread.updated_at < updated_at,
+            and_(QueryThread.updated_at == updated_at, QueryThread.id < thread_id)
+        ))
+    rows = query.order_by(QueryThread.updated_at.desc(), QueryThread.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(_thread_of(rows[-1]), phase)
+    return rows, None
+
+
+def pending_first_page(query, limit, phase=None, after=None):
+    """Page pending threads first, then everything else, each newest-first.
+
+    Each phase is a plain keyset scan, so the pending phase can seek on the
+    (faculty_id, status, updated_at) index.
+    """
+    rows = []
+    if phase != 'rest':
+        rows, next_cursor = keyset_page(query.filter(QueryThread.status == 'pending'), limit, after, 'pending')
+        if next_cursor:
+            return rows, next_cursor
+        after = None
+        if len(rows) == limit:
+            return rows, encode_cursor(phase='rest')
+
+    rest = query.filter(or_(QueryThread.status != 'pending', QueryThread.status.is_(None)))
+    more, next_cursor = keyset_page(rest, limit - len(rows), after, 'rest')
+    return rows + more, next_cursor
+
+
+def _thread_of(row):
+    # Listings select (thread, preview) rows
+    return row[0] if hasattr(row, '_fields') else row
+
+
+# --- Thread header and post stream ---
+
+DEFAULT_POST_PAGE_SIZE = 30
+
+
+def load_thread_header(thread_id):
+    return QueryThread.query.options(
+        with_student_user(), with_faculty_user()
+    ).filter(QueryThread.id == thread_id).first()
+
+
+def serialize_thread_header(thread):
+    std = thread.student
+    return {
+        'id': thread.id,
+        'title': thread.title,
+        'subject': thread.subject_name,
+        'status': thread.status,
+        'type': getattr(thread, 'query_type', 'academic'),
+        'faculty_id': thread.faculty_id,
+        'faculty_name': thread.faculty.user.full_name if thread.faculty else "Unassigned",
+        'student_details': {
+            'full_name': std.user.full_name,
+            'enrollment': std.enrollment_number,
+            'roll_number': std.roll_number,
+            'branch': std.branch,
+            'semester': std.current_semester
+        }
+    }
+
+
+def header_etag(thread):
+    # Replies and status changes both bump updated_at
+    return f"thread-{thread.id}-{thread.updated_at.timestamp() if thread.updated_at else 0}-{thread.status}"
+
+
+def post_stream_query(thread_id):
+    """Posts of a thread with authors and attachments batch-loaded (two IN queries)."""
+    return QueryPost.query.options(
+        selectinload(QueryPost.author), selectinload(QueryPost.attachments)
+    ).filter(QueryPost.thread_id == thread_id)
+
+
+def post_page(thread_id, limit, before=None):
+    """Newest ``limit`` posts older than post id ``before``, returned oldest-first.
+
+    The second value is the cursor for the next (older) page, or None.
+    """
+    query = post_stream_query(thread_id)
+    if before:
+        query = query.filter(QueryPost.id < before)
+    posts = query.order_by(QueryPost.id.desc()).limit(limit + 1).all()
+    next_before = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_before = posts[-1].id
+    posts.reverse()
+    return posts, next_before
+
+
+def serialize_post(p):
+    return {
+        'id': p.id,
+        'author_name': p.author.full_name,
+        'role': p.role,
+        'content': p.content,
+        'created_at': p.created_at.strftime('%Y-%m-%d %H:%M'),
+        'attachments': [{
+            'file_url': a.file_url,
+            'file_name': a.file_name,
+            'file_type': a.file_type
+        } for a in p.attachments]
+    }
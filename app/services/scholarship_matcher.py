@@ -0,0 +1,207 @@
+"""Precomputed scholarship matches for every student with a scholarship profile.
+
+``run()`` evaluates all active, still-open scholarships against all saved
+profiles at once and rewrites the ``ScholarshipMatch`` table, so a student's
+"scholarships you qualify for" list and the per-scholarship eligible counts
+are plain indexed reads. The rules are the ones ``eligibility_query`` applies
+in SQL (see app/services/scholarships.py).
+
+With NumPy installed the profile columns are compared against the scholarship
+columns as broadcast arrays, a block of students at a time. Without it,
+profiles are grouped by (CGPA band, income band, category, gender) - the
+same bands the eligibility cache uses - and each group is evaluated once.
+
+Saving a changed profile rematches that student immediately; scholarship
+edits are picked up by the next batch run (scripts/match_scholarships.py).
+"""
+import bisect
+import time
+from datetime import date
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models import Scholarship, ScholarshipMatch, ScholarshipProfile
+from app.services.scholarships import CATEGORY_BITS, GENDER_BITS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BLOCK_SIZE = 4096  # students per broadcast block
+INSERT_CHUNK = 20000
+
+
+def student_bit(name, bits):
+    # None leaves the criterion unchecked, as eligibility_query does; an unknown name matches nothing
+    return None if not name else bits.get(name.lower(), 0)
+
+
+def load_profiles():
+    """``(student_id, cgpa, income or None, category bit or None, gender bit or None)`` per profile."""
+    return [(sid, cgpa or 0.0, income, student_bit(category, CATEGORY_BITS), student_bit(gender, GENDER_BITS))
+            for sid, cgpa, income, category, gender in db.session.query(
+                ScholarshipProfile.student_id, ScholarshipProfile.cgpa, ScholarshipProfile.family_income,
+                ScholarshipProfile.category, ScholarshipProfile.gender
+            ).order_by(ScholarshipProfile.student_id)]
+
+
+def load_scholarships(today=None):
+    """``(id, min_cgpa, max_income, category_mask, gender_mask)`` of open scholarships."""
+    return [(sid, min_cgpa or 0.0, max_income or 0.0, cmask, gmask)
+            for sid, min_cgpa, max_income, cmask, gmask in db.session.query(
+                Scholarship.id, Scholarship.min_cgpa, Scholarship.max_family_income,
+                Scholarship.category_mask, Scholarship.gender_mask
+            ).filter(Scholarship.is_active == True, Scholarship.deadline >= (today or date.today())
+                     ).order_by(Scholarship.id)]
+
+
+def eligible(profile, scholarship):
+    _, cgpa, income, cbit, gbit = profile
+    _, min_cgpa, max_income, cmask, gmask = scholarship
+    return (cgpa <= 0 or min_cgpa <= cgpa) \
+        and (income is None or max_income <= 0 or max_income >= income) \
+        and (cbit is None or cbit & cmask != 0) and (gbit is None or gbit & gmask != 0)
+
+
+def match_numpy(profiles, schols):
+    """Yield ``(student_ids, scholarship_ids)`` array pairs, one per block of students."""
+    sch_ids = np.array([s[0] for s in schols], dtype=np.int64)
+    min_cgpa = np.array([s[1] for s in schols], dtype=np.float64)
+    max_income = np.array([s[2] for s in schols], dtype=np.float64)
+    cmask = np.array([s[3] for s in schols], dtype=np.int64)
+    gmask = np.array([s[4] for s in schols], dtype=np.int64)
+    no_limit = max_income <= 0
+
+    for start in range(0, len(profiles), BLOCK_SIZE):
+        block = profiles[start:start + BLOCK_SIZE]
+        ids = np.array([p[0] for p in block], dtype=np.int64)
+        cgpa = np.array([p[1] for p in block], dtype=np.float64)[:, None]
+        income = np.array([np.nan if p[2] is None else p[2] for p in block], dtype=np.float64)[:, None]
+        cbit = np.array([p[3] or 0 for p in block], dtype=np.int64)[:, None]
+        gbit = np.array([p[4] or 0 for p in block], dtype=np.int64)[:, None]
+        no_category = np.array([p[3] is None for p in block])[:, None]
+        no_gender = np.array([p[4] is None for p in block])[:, None]
+
+        ok = (cgpa <= 0) | (min_cgpa <= cgpa)
+        ok &= np.isnan(income) | no_limit | (max_income >= income)
+        ok &= no_category | ((cbit & cmask) != 0)
+        ok &= no_gender | ((gbit & gmask) != 0)
+        rows, cols = np.nonzero(ok)
+        yield ids[rows], sch_ids[cols]
+
+
+def match_grouped(profiles, schols):
+    """Pure-Python fallback: evaluate each distinct band key once.
+
+    Yields ``(student_id, scholarship_ids)`` in profile order; students in the
+    same group share one list.
+    """
+    cgpa_cuts = sorted({s[1] for s in schols if s[1] > 0})
+    income_cuts = sorted({s[2] for s in schols if s[2] > 0})
+    groups = {}
+    for profile in profiles:
+        _, cgpa, income, cbit, gbit = profile
+        key = (bisect.bisect_right(cgpa_cuts, cgpa) if cgpa > 0 else None,
+               bisect.bisect_left(income_cuts, income) if income is not None else None,
+               cbit, gbit)
+        ids = groups.get(key)
+        if ids is None:
+            ids = groups[key] = [s[0] for s in schols if eligible(profile, s)]
+        yield profile[0], ids
+
+
+def _pairs(profiles, schols):
+    # Both engines emit pairs in primary key order, which keeps the inserts append-only
+    if np is not None:
+        for student_ids, scholarship_ids in match_numpy(profiles, schols):
+            yield from zip(student_ids.tolist(), scholarship_ids.tolist())
+    else:
+        for student_id, scholarship_ids in match_grouped(profiles, schols):
+            for scholarship_id in scholarship_ids:
+                yield student_id, scholarship_id
+
+
+def _insert(connection, pairs):
+    compiled = ScholarshipMatch.__table__.insert().compile(dialect=connection.dialect)
+    if compiled.positional and list(compiled.positiontup) == ['student_id', 'scholarship_id']:
+        # Hand the pairs straight to the driver; building a dict per row costs
+        # more than the matching itself at millions of rows
+        sql, make_row = str(compiled), tuple
+    else:
+        sql, make_row = str(compiled), lambda pair: {'student_id': pair[0], 'scholarship_id': pair[1]}
+    count = 0
+    chunk = []
+    for pair in pairs:
+        chunk.append(make_row(pair))
+        if len(chunk) >= INSERT_CHUNK:
+            connection.exec_driver_sql(sql, chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        connection.exec_driver_sql(sql, chunk)
+        count += len(chunk)
+    return count
+
+
+def run(today=None):
+    """Rematch every profile against every open scholarship; returns run statistics."""
+    start = time.perf_counter()
+    profiles = load_profiles()
+    schols = load_scholarships(today)
+    connection = db.session.connection()
+    connection.execute(ScholarshipMatch.__table__.delete())
+    # Rebuilding the secondary index once is far cheaper than maintaining it per row
+    by_scholarship = next(ix for ix in ScholarshipMatch.__table__.indexes
+                          if ix.name == 'ix_scholarship_match_scholarship')
+    by_scholarship.drop(connection)
+    matches = _insert(connection, _pairs(profiles, schols)) if profiles and schols else 0
+    by_scholarship.create(connection)
+    db.session.commit()
+    return {
+        'students': len(profiles),
+        'scholarships': len(schols),
+        'matches': matches,
+        'engine': 'numpy' if np is not None else 'python',
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def save_profile(student_id, cgpa, income, category, gender, scholarship_ids):
+    """Store the finder input as the student's profile with its matches (caller commits).
+
+    ``scholarship_ids`` is the finder's own (memoized) result for these inputs.
+    Returns False, writing nothing, when the stored profile already has them.
+    """
+    values = (cgpa or 0.0, income, (category or '').lower() or None, (gender or '').lower() or None)
+    profile = db.session.get(ScholarshipProfile, student_id)
+    if profile is not None and (profile.cgpa, profile.family_income, profile.category, profile.gender) == values:
+        return False
+    if profile is None:
+        profile = ScholarshipProfile(student_id=student_id)
+        db.session.add(profile)
+    profile.cgpa, profile.family_income, profile.category, profile.gender = values
+
+    db.session.execute(ScholarshipMatch.__table__.delete().where(ScholarshipMatch.student_id == student_id))
+    if scholarship_ids:
+        db.session.execute(ScholarshipMatch.__table__.insert(),
+                           [{'student_id': student_id, 'scholarship_id': sid} for sid in scholarship_ids])
+    return True
+
+
+def matched_scholarships(student_id, today=None):
+    """The student's precomputed matches that are still active and open."""
+    return Scholarship.query.join(ScholarshipMatch, ScholarshipMatch.scholarship_id == Scholarship.id).filter(
+        ScholarshipMatch.student_id == student_id,
+        Scholarship.is_active == True,
+        Scholarship.deadline >= (today or date.today())
+    ).order_by(Scholarship.deadline, Scholarship.id).all()
+
+
+def eligible_counts():
+    """``(scholarship, eligible student count)`` for every active scholarship."""
+    count = func.count(ScholarshipMatch.student_id)
+    return db.session.query(Scholarship, count).outerjoin(
+        ScholarshipMatch, ScholarshipMatch.scholarship_id == Scholarship.id
+    ).filter(Scholarship.is_active == True).group_by(Scholarship.id).order_by(count.desc(), Scholarship.id).all()
@@ -0,0 +1,171 @@
+"""Scholarship eligibility evaluated in SQL.
+
+The comma-separated ``eligible_categories``/``eligible_genders`` lists are stored
+a second time as bitmasks (``all`` sets every bit), so the whole eligibility
+check - CGPA, income, category, gender and deadline - is one query with
+``mask & :bit`` tests instead of re-splitting strings per row in Python.
+
+Results are memoized in an LRU keyed by the applicant's CGPA band, income band,
+category and gender. Bands are the intervals between the distinct thresholds
+present in the table, so every input inside a band gets exactly the same
+answer. The cache and bands are dropped whenever a scholarship write commits,
+and after SCHOLARSHIP_CACHE_TTL for writes from other processes.
+"""
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import event, func, inspect, or_
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Scholarship
+
+CATEGORY_BITS = {'general': 1, 'obc': 2, 'sc': 4, 'st': 8, 'ews': 16, 'minority': 32}
+GENDER_BITS = {'male': 1, 'female': 2, 'other': 4}
+ALL_BITS = 0x7FFFFFFF
+
+CACHE_SIZE = 512
+
+
+def mask_for(text, bits):
+    """Bitmask of a comma-separated eligibility list; unknown names are ignored."""
+    names = {name.strip().lower() for name in (text or '').split(',') if name.strip()}
+    if 'all' in names:
+        return ALL_BITS
+    mask = 0
+    for name in names:
+        mask |= bits.get(name, 0)
+    return mask
+
+
+def sync_masks(scholarship):
+    scholarship.category_mask = mask_for(scholarship.eligible_categories, CATEGORY_BITS)
+    scholarship.gender_mask = mask_for(scholarship.eligible_genders, GENDER_BITS)
+
+
+def eligibility_query(cgpa=None, income=None, category=None, gender=None, today=None):
+    """Active, still-open scholarships the applicant qualifies for.
+
+    Unset criteria are not checked, as before: a zero CGPA skips the CGPA test and
+    a zero threshold on the scholarship means "no limit".
+    """
+    query = Scholarship.query.filter(
+        Scholarship.is_active == True,
+        Scholarship.deadline >= (today or date.today())
+    )
+    if cgpa:
+        query = query.filter(func.coalesce(Scholarship.min_cgpa, 0) <= cgpa)
+    if income is not None:
+        query = query.filter(or_(func.coalesce(Scholarship.max_family_income, 0) <= 0,
+                                 Scholarship.max_family_income >= income))
+    if category:
+        query = query.filter(Scholarship.category_mask.op('&')(CATEGORY_BITS.get(category.lower(), 0)) != 0)
+    if gender:
+        query = query.filter(Scholarship.gender_mask.op('&')(GENDER_BITS.get(gender.lower(), 0)) != 0)
+    return query.order_by(Scholarship.deadline, Scholarship.id)
+
+
+def serialize(scholarship):
+    return {
+        'id': scholarship.id,
+        'name': scholarship.name,
+        'description': scholarship.description,
+        'category': scholarship.category,
+        'amount': scholarship.amount,
+        'deadline': scholarship.deadline.isoformat(),
+        'official_website': scholarship.official_website,
+        'eligible': True,
+        'eligibility_criteria': scholarship.eligibility_criteria
+    }
+
+
+# --- Band-keyed LRU ---
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+_bands = None  # (sorted distinct min_cgpa, sorted distinct max_family_income)
+_loaded_at = 0.0
+
+
+def _thresholds():
+    global _bands, _loaded_at
+    if time.monotonic() - _loaded_at >= current_app.config['SCHOLARSHIP_CACHE_TTL']:
+        invalidate()
+    bands = _bands
+    if bands is None:
+        active = db.session.query(Scholarship.min_cgpa, Scholarship.max_family_income).filter(
+            Scholarship.is_active == True).distinct().all()
+        bands = (sorted({c for c, _ in active if c}), sorted({i for _, i in active if i and i > 0}))
+        _bands = bands
+        _loaded_at = time.monotonic()
+    return bands
+
+
+def cache_key(cgpa, income, category, gender, today):
+    cgpa_thresholds, income_thresholds = _thresholds()
+    # Number of thresholds at or below the CGPA (min_cgpa <= cgpa passes);
+    # number of limits strictly below the income (max_family_income >= income passes)
+    cgpa_band = bisect.bisect_right(cgpa_thresholds, cgpa) if cgpa else None
+    income_band = bisect.bisect_left(income_thresholds, income) if income is not None else None
+    return (cgpa_band, income_band, (category or '').lower() or None, (gender or '').lower() or None, today)
+
+
+def eligible_scholarships(cgpa=None, income=None, category=None, gender=None):
+    """Serialized eligible scholarships, memoized per band key."""
+    today = date.today()
+    key = cache_key(cgpa, income, category, gender, today)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    result = [serialize(s) for s in eligibility_query(cgpa, income, category, gender, today)]
+    with _lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def invalidate():
+    global _bands
+    with _lock:
+        _cache.clear()
+        _bands = None
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_scholarship_masks(session, flush_context, instances):
+    changed = False
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Scholarship):
+            attrs = inspect(obj).attrs
+            if obj in session.new or attrs.eligible_categories.history.has_changes() \
+                    or attrs.eligible_genders.history.has_changes():
+                sync_masks(obj)
+            changed = True
+    if changed or any(isinstance(obj, Scholarship) for obj in session.deleted):
+        session.info['scholarships_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_scholarship_write(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is Scholarship:
+        orm_execute_state.session.info['scholarships_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('scholarships_changed', None):
+        invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('scholarships_changed', None)
@@ -0,0 +1,224 @@
+"""Per-student exam lists for the latest published exam schedule.
+
+Which subjects a student sits is read from ``CohortSubject``, a materialized
+copy of the distinct (semester, division, batch, academic_year, subject) rows
+of ``Timetable``. After a flush that wrote Timetable rows, the cohorts those
+rows belong to are rebuilt with ``INSERT ... SELECT DISTINCT`` in the same
+transaction, so the exam lookup is a join on an index instead of a scan of the
+class timetable.
+
+Status (upcoming/ongoing/completed) is computed by the query. The serialized
+list is cached per cohort and dropped when an exam schedule, its entries or
+the timetable change; a cached list also expires at the next start or end time
+among its exams, so a status never goes stale, and after EXAM_CACHE_TTL for
+writes from other processes.
+"""
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, or_, select
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.models import CohortSubject, ExamSchedule, ExamTimetable, Student, Timetable
+
+_lock = threading.Lock()
+_entries = {}  # (schedule_id, semester, division, batch) -> (body, etag, expires_at)
+_current = None  # (schedule id, academic year, cached at) of the latest published schedule
+
+
+def _same(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def refresh_cohort_subjects(connection, cohorts=None):
+    """Rebuild the cohort -> subject mapping from Timetable.
+
+    ``cohorts`` limits the rebuild to those (semester, division, batch) keys;
+    None rebuilds the whole table.
+    """
+    table = CohortSubject.__table__
+    subject = func.trim(Timetable.subject_raw)
+    columns = ['semester', 'division', 'batch', 'academic_year', 'subject']
+    source = select(Timetable.semester, Timetable.division, Timetable.batch, Timetable.academic_year, subject).where(
+        Timetable.subject_raw.isnot(None), subject != ''
+    ).distinct()
+    if cohorts is None:
+        connection.execute(delete(table))
+        connection.execute(insert(table).from_select(columns, source))
+        return
+    for semester, division, batch in cohorts:
+        connection.execute(delete(table).where(
+            table.c.semester == semester, _same(table.c.division, division), _same(table.c.batch, batch)))
+        connection.execute(insert(table).from_select(columns, source.where(
+            Timetable.semester == semester, _same(Timetable.division, division), _same(Timetable.batch, batch))))
+
+
+def current_schedule():
+    """``(id, academic_year)`` of the most recently created published schedule, or None."""
+    global _current
+    current = _current
+    if current is None or time.monotonic() - current[2] >= current_app.config['EXAM_CACHE_TTL']:
+        row = db.session.query(ExamSchedule.id, ExamSchedule.academic_year).filter(
+            ExamSchedule.is_published == True
+        ).order_by(ExamSchedule.created_at.desc(), ExamSchedule.id.desc()).first()
+        current = _current = (row[0] if row else None, row[1] if row else None, time.monotonic())
+    return (current[0], current[1]) if current[0] else None
+
+
+def exam_rows(schedule_id, academic_year, semester, division, batch, now):
+    """The cohort's exams in a schedule with their status, soonest first."""
+    today, clock = now.date(), now.time()
+    status = case(
+        (or_(ExamTimetable.exam_date < today,
+             and_(ExamTimetable.exam_date == today, ExamTimetable.end_time <= clock)), 'completed'),
+        (and_(ExamTimetable.exam_date == today, ExamTimetable.start_time <= clock), 'ongoing'),
+        else_='upcoming'
+    )
+    return db.session.query(
+        ExamTimetable.subject_name, ExamTimetable.subject_id, ExamTimetable.exam_date,
+        ExamTimetable.start_time, ExamTimetable.end_time, ExamTimetable.room_number, status.label('status')
+    ).join(CohortSubject, CohortSubject.subject == ExamTimetable.subject_name).filter(
+        ExamTimetable.exam_schedule_id == schedule_id,
+        CohortSubject.semester == semester,
+        CohortSubject.division == division,
+        CohortSubject.batch == batch,
+        or_(CohortSubject.academic_year == academic_year, CohortSubject.academic_year.is_(None))
+    ).distinct().order_by(ExamTimetable.exam_date, ExamTimetable.start_time, ExamTimetable.subject_name).all()
+
+
+def _build(rows, now):
+    # A subject sat in several rooms at once is one exam for the student
+    exams = {}
+    next_change = None
+    for subject, subject_id, exam_date, start, end, room, status in rows:
+        key = (subject, exam_date, start, end)
+        exam = exams.get(key)
+        if exam is None:
+            exam = exams[key] = {
+                'subject_name': subject,
+                'subject_code': str(subject_id) if subject_id else '',
+                'date': exam_date.strftime('%d %b %Y'),
+                'day': exam_date.strftime('%A'),
+                'time': f"{start.strftime('%I:%M %p')} - {end.strftime('%I:%M %p')}",
+                'room': room,
+                'status': status.capitalize(),
+                'status_class': status
+            }
+        elif room and room not in exam['room'].split(', '):
+            exam['room'] = f"{exam['room']}, {room}"
+        if status != 'completed':
+            boundary = datetime.combine(exam_date, start if status == 'upcoming' else end)
+            next_change = boundary if next_change is None else min(next_change, boundary)
+
+    body = json.dumps(list(exams.values())).encode('utf-8')
+    seconds_left = (next_change - now).total_seconds() if next_change else None
+    return body, hashlib.sha1(body).hexdigest(), seconds_left
+
+
+def student_exams(student_id):
+    """``(body, etag)`` of the student's exams in the current schedule; ``None`` if no such student."""
+    cohort = db.session.query(Student.current_semester, Student.division, Student.batch).filter(
+        Student.id == student_id).first()
+    if cohort is None:
+        return None
+    schedule = current_schedule()
+    if schedule is None:
+        return b'[]', hashlib.sha1(b'[]').hexdigest()
+
+    key = (schedule[0], *cohort)
+    entry = _entries.get(key)
+    if entry and time.monotonic() < entry[2]:
+        return entry[0], entry[1]
+
+    now = datetime.now()
+    body, etag, seconds_left = _build(exam_rows(schedule[0], schedule[1], *cohort, now), now)
+    ttl = current_app.config['EXAM_CACHE_TTL']
+    if seconds_left is not None:
+        ttl = min(ttl, max(seconds_left, 0))
+    with _lock:
+        _entries[key] = (body, etag, time.monotonic() + ttl)
+    return body, etag
+
+
+def invalidate():
+    global _current
+    with _lock:
+        _entries.clear()
+        _current = None
+
+
+_WATCHED = (ExamSchedule, ExamTimetable, Timetable)
+_COHORT_KEYS = ('semester', 'division', 'batch')
+
+
+@event.listens_for(Session, 'before_flush')
+def _on_exam_flush(session, flush_context, instances):
+    if any(isinstance(obj, _WATCHED) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['exams_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_exam_write(orm_execute_state):
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ in _WATCHED:
+        session = orm_execute_state.session
+        session.info['exams_changed'] = True
+        if orm_execute_state.bind_mapper is inspect(Timetable):
+            # Rows touched by a bulk statement aren't known; rebuild everything once, before commit
+            session.info['cohorts_rebuild_all'] = True
+            _hook(session, 'before_commit', _rebuild_all_cohorts)
+
+
+def _hook(session, identifier, fn):
+    # Sessions that never write Timetable never get these listeners
+    hooked = session.info.setdefault('cohort_hooks', set())
+    if identifier not in hooked:
+        hooked.add(identifier)
+        event.listen(session, identifier, fn)
+
+
+def _on_timetable_write(mapper, connection, target):
+    # Note the row's cohort, and the one it left if it moved; refreshed once the flush is done
+    session = object_session(target)
+    if session is None:
+        return
+    state = inspect(target)
+    current = tuple(state.dict.get(key) for key in _COHORT_KEYS)
+    previous = tuple(state.attrs[key].history.deleted[0] if state.attrs[key].history.deleted else value
+                     for key, value in zip(_COHORT_KEYS, current))
+    session.info.setdefault('timetable_cohorts', set()).update({current, previous})
+    _hook(session, 'after_flush', _refresh_flushed_cohorts)
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Timetable, _event, _on_timetable_write)
+
+
+def _refresh_flushed_cohorts(session, flush_context):
+    cohorts = session.info.pop('timetable_cohorts', None)
+    if cohorts:
+        refresh_cohort_subjects(session.connection(), cohorts)
+
+
+def _rebuild_all_cohorts(session):
+    if session.info.pop('cohorts_rebuild_all', None):
+        refresh_cohort_subjects(session.connection())
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('exams_changed', None):
+        invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('exams_changed', None)
+    session.info.pop('timetable_cohorts', None)
+    session.info.pop('cohorts_rebuild_all', None)
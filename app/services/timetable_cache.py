@@ -0,0 +1,134 @@
+"""In-process cache of serialized student timetables, keyed by (batch, academic_year).
+
+Every student in a batch receives the same timetable payload, so the JSON is built
+once per batch and reused until a timetable write touches that batch or the entry
+outlives TIMETABLE_CACHE_TTL. Writers in other processes (import_timetable.py) call
+``touch_stamp`` so that every worker drops its cache on the next request.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from flask import current_app
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Timetable
+
+DAY_NAMES = {
+    'MON': 'Monday', 'TUE': 'Tuesday', 'WED': 'Wednesday',
+    'THU': 'Thursday', 'FRI': 'Friday', 'SAT': 'Saturday', 'SUN': 'Sunday'
+}
+
+_lock = threading.Lock()
+_entries = {}  # (batch, academic_year) -> (body, etag, built_at)
+_seen_stamp = None
+
+STAMP_FILE = 'timetable_cache.stamp'
+
+
+def full_day_name(raw_day):
+    return DAY_NAMES.get(raw_day.upper(), raw_day.capitalize())
+
+
+def _build(batch, academic_year):
+    rows = Timetable.query.with_entities(
+        Timetable.day_of_week, Timetable.time_slot, Timetable.subject_raw,
+        Timetable.faculty_raw, Timetable.room_number
+    ).filter(
+        Timetable.batch == batch,
+        Timetable.academic_year == academic_year
+    ).order_by(Timetable.id).all()
+
+    result = [{
+        'day': full_day_name(day),
+        'time': time_slot,
+        'subject': subject,
+        'faculty': faculty,
+        'room': room,
+        'type': "Lecture"
+    } for day, time_slot, subject, faculty, room in rows]
+
+    body = json.dumps(result).encode('utf-8')
+    etag = hashlib.sha1(body).hexdigest()
+    return body, etag
+
+
+def _stamp_path():
+    return os.path.join(current_app.instance_path, STAMP_FILE)
+
+
+def touch_stamp():
+    """Mark every worker's cache stale; used by out-of-process timetable writers."""
+    path = _stamp_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a'):
+        os.utime(path, None)
+    invalidate()
+
+
+def _check_stamp():
+    global _seen_stamp
+    try:
+        stamp = os.stat(_stamp_path()).st_mtime_ns
+    except OSError:
+        stamp = None
+    if stamp != _seen_stamp:
+        invalidate()
+        _seen_stamp = stamp
+
+
+def get_batch_timetable(batch, academic_year, ttl):
+    """Return ``(body, etag)`` for a batch, building and caching it on a miss."""
+    _check_stamp()
+    key = (batch, academic_year)
+    entry = _entries.get(key)
+    if entry and time.monotonic() - entry[2] < ttl:
+        return entry[0], entry[1]
+
+    body, etag = _build(batch, academic_year)
+    with _lock:
+        _entries[key] = (body, etag, time.monotonic())
+    return body, etag
+
+
+def invalidate(batch=None, academic_year=None):
+    """Drop cached entries. With no arguments the whole cache is cleared."""
+    with _lock:
+        if batch is None and academic_year is None:
+            _entries.clear()
+            return
+        for key in list(_entries):
+            if (batch is None or key[0] == batch) and (academic_year is None or key[1] == academic_year):
+                del _entries[key]
+
+
+def _previous_batches(target):
+    history = inspect(target).attrs.batch.history
+    return [value for value in (history.deleted or ()) if value is not None]
+
+
+def _on_timetable_write(mapper, connection, target):
+    # A row moved between batches stales both the old and the new batch
+    for batch in {target.batch, *_previous_batches(target)}:
+        invalidate(batch=batch)
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Timetable, _event, _on_timetable_write)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_timetable_write(orm_execute_state):
+    # Query.update()/delete() bypass the mapper events above
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is inspect(Timetable):
+        invalidate()
+
+
+@event.listens_for(Timetable.__table__, 'after_create')
+def _on_timetable_create(target, connection, **kw):
+    invalidate()
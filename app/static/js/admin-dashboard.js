@@ -569,11 +569,16 @@ function setupFormHandlers() {
 }
 
 // Load published notices
-function loadPublishedNotices() {
-    fetch('/api/notices?role=admin')
+let publishedNoticesCursor = null;
+
+function loadPublishedNotices(cursor = null) {
+    let url = '/api/notices?role=admin&limit=20';
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+    fetch(url)
         .then(response => response.json())
         .then(data => {
-            updatePublishedNoticesDisplay(data);
+            publishedNoticesCursor = data.next_cursor;
+            updatePublishedNoticesDisplay(data.notices, !!cursor);
         })
         .catch(error => {
             console.error('Error loading notices:', error);
@@ -581,11 +586,16 @@ function loadPublishedNotices() {
 }
 
 // Update published notices display
-function updatePublishedNoticesDisplay(notices) {
+function updatePublishedNoticesDisplay(notices, append = false) {
     const container = document.querySelector('.notices-list');
     if (!container) return;
 
-    container.innerHTML = '';
+    if (append) {
+        const moreBtn = container.querySelector('.notices-load-more');
+        if (moreBtn) moreBtn.remove();
+    } else {
+        container.innerHTML = '';
+    }
 
     notices.forEach(notice => {
         const noticeItem = document.createElement('div');
@@ -602,7 +612,7 @@ function updatePublishedNoticesDisplay(notices) {
                 <h4>${notice.title}</h4>
                 <span class="notice-type ${urgencyClass}">${urgencyClass.toUpperCase()}</span>
             </div>
-            <p>${notice.content}</p>
+            <p>${notice.excerpt}${notice.truncated ? '...' : ''}</p>
             <div class="notice-meta">
                 <span>Published ${createdDate} by ${notice.author}</span>
                 <span class="target-badge" style="font-size: 0.8em; background: #eee; padding: 2px 6px; border-radius: 4px; margin-left: 10px;">To: ${notice.visible_to}</span>
@@ -615,6 +625,14 @@ function updatePublishedNoticesDisplay(notices) {
 
         container.appendChild(noticeItem);
     });
+
+    if (publishedNoticesCursor) {
+        const btn = document.createElement('button');
+        btn.className = 'notices-load-more';
+        btn.textContent = 'Load more';
+        btn.onclick = () => loadPublishedNotices(publishedNoticesCursor);
+        container.appendChild(btn);
+    }
 }
 
 // Show success modal
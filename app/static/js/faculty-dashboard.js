@@ -101,8 +101,35 @@ document.addEventListener('DOMContentLoaded', function () {
 
     // Setup Notice Form
     setupFacultyNoticeForm();
+
+    connectEventStream();
 });
 
+// Live updates over server-sent events instead of re-fetching lists
+let eventStream = null;
+function connectEventStream() {
+    if (eventStream || !window.EventSource || !currentUser || !currentUser.token) return;
+
+    // The URL only carries a short-lived stream token; fetch a fresh one for each connection
+    fetch('/api/events/token', { method: 'POST' })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.token || eventStream) return;
+            eventStream = new EventSource(`/api/events/stream?stream_token=${encodeURIComponent(data.token)}`);
+            eventStream.addEventListener('query', () => loadFacultyQueries());
+            eventStream.onerror = () => {
+                // A reconnect with an expired token is refused and not retried by the browser
+                if (eventStream.readyState === EventSource.CLOSED) {
+                    eventStream = null;
+                    setTimeout(connectEventStream, 5000);
+                }
+            };
+        })
+        .catch(error => {
+            console.error('Error opening event stream:', error);
+        });
+}
+
 // Setup Faculty Notice Form
 function setupFacultyNoticeForm() {
     const form = document.getElementById('facultyNoticeForm');
@@ -151,21 +178,32 @@ function setupFacultyNoticeForm() {
 }
 
 // Load Faculty Notices
-function loadFacultyNotices() {
+let facultyNoticesCursor = null;
+
+function loadFacultyNotices(cursor = null) {
     const container = document.querySelector('.notices-list');
     if (!container) return;
 
-    // Fetch notices visible to faculty (role=faculty)
-    fetch('/api/notices?role=faculty')
+    // Fetch notices visible to faculty (role=faculty), one page at a time
+    let url = '/api/notices?role=faculty&limit=20';
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+    fetch(url)
         .then(res => res.json())
         .then(data => {
-            if (data.length === 0) {
+            const notices = data.notices || [];
+            facultyNoticesCursor = data.next_cursor;
+            if (!cursor && notices.length === 0) {
                 container.innerHTML = '<div style="text-align:center; padding:20px; color:#666;">No notices found.</div>';
                 return;
             }
 
-            container.innerHTML = '';
-            data.forEach(notice => {
+            if (cursor) {
+                const moreBtn = container.querySelector('.notices-load-more');
+                if (moreBtn) moreBtn.remove();
+            } else {
+                container.innerHTML = '';
+            }
+            notices.forEach(notice => {
                 const card = document.createElement('div');
                 card.className = 'notice-card';
                 // Inline styles for simplicity matching Student/Admin themes
@@ -183,14 +221,36 @@ function loadFacultyNotices() {
                         <h4 style="margin:0; color:#333;">${notice.title}</h4>
                         <span style="font-size:0.8em; color:#666;">${dateStr}</span>
                     </div>
-                    <p style="color:#555; font-size:0.95em; line-height:1.5;">${notice.content}</p>
+                    <p class="notice-body" style="color:#555; font-size:0.95em; line-height:1.5;">${notice.excerpt}${notice.truncated ? '...' : ''}</p>
                     <div style="margin-top:10px; font-size:0.85em; display:flex; gap:10px;">
                         <span style="background:#f0f2f5; padding:2px 8px; border-radius:4px;">By: ${notice.author}</span>
                         <span style="background:${getUrgencyColor(notice.notice_type, true)}; color:${getUrgencyColor(notice.notice_type)}; padding:2px 8px; border-radius:4px; font-weight:600;">${notice.notice_type.toUpperCase()}</span>
                     </div>
                 `;
+                if (notice.truncated) {
+                    const readMore = document.createElement('a');
+                    readMore.href = '#';
+                    readMore.textContent = 'Read more';
+                    readMore.onclick = (e) => {
+                        e.preventDefault();
+                        fetch(`/api/notices/${notice.id}`)
+                            .then(res => res.json())
+                            .then(full => { if (full.content) card.querySelector('.notice-body').textContent = full.content; });
+                        readMore.remove();
+                    };
+                    card.appendChild(readMore);
+                }
                 container.appendChild(card);
             });
+
+            if (facultyNoticesCursor) {
+                const btn = document.createElement('button');
+                btn.className = 'btn btn-secondary notices-load-more';
+                btn.style.cssText = 'display:block; margin: 10px auto;';
+                btn.textContent = 'Load more';
+                btn.onclick = () => loadFacultyNotices(facultyNoticesCursor);
+                container.appendChild(btn);
+            }
         })
         .catch(err => {
             console.error("Error loading notices:", err);
@@ -950,19 +1010,23 @@ function submitSwapRequest() {
 // --- Faculty Query Management ---
 
 let currentFacultyQueries = [];
+let facultyQueriesCursor = null;
 let activeFacultyThreadId = null;
 
-function loadFacultyQueries() {
+function loadFacultyQueries(cursor) {
     if (!currentUser) return;
 
     const container = document.getElementById('facultyQueryList');
-    if (container) container.innerHTML = '<div class="text-center p-5 text-muted"><i class="fas fa-spinner fa-spin"></i> Loading queries...</div>';
+    if (container && !cursor) container.innerHTML = '<div class="text-center p-5 text-muted"><i class="fas fa-spinner fa-spin"></i> Loading queries...</div>';
 
     // We use currentUser.id (User Table ID) as updated in app.py logic
-    fetch(`/api/queries/faculty/${currentUser.id}`)
+    const params = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    fetch(`/api/queries/faculty/${currentUser.id}${params}`)
         .then(res => res.json())
         .then(data => {
-            currentFacultyQueries = data;
+            // Pages arrive newest-first; "Load more" appends the next one
+            currentFacultyQueries = cursor ? currentFacultyQueries.concat(data.threads) : data.threads;
+            facultyQueriesCursor = data.next_cursor;
             filterFacultyQueries();
         })
         .catch(err => {
@@ -985,6 +1049,7 @@ function filterFacultyQueries() {
 
     if (filtered.length === 0) {
         container.innerHTML = '<div class="text-center p-5 text-muted">No queries found.</div>';
+        appendFacultyLoadMore(container);
         return;
     }
 
@@ -1022,6 +1087,18 @@ function filterFacultyQueries() {
         card.onclick = () => openFacultyReplyModal(q.id);
         container.appendChild(card);
     });
+
+    appendFacultyLoadMore(container);
+}
+
+function appendFacultyLoadMore(container) {
+    if (!facultyQueriesCursor) return;
+    const btn = document.createElement('button');
+    btn.className = 'btn btn-secondary';
+    btn.style.cssText = 'display:block; margin: 10px auto;';
+    btn.textContent = 'Load more';
+    btn.onclick = () => loadFacultyQueries(facultyQueriesCursor);
+    container.appendChild(btn);
 }
 
 function getStatusColor(status) {
@@ -1040,9 +1117,12 @@ function openFacultyReplyModal(threadId) {
     if (modal) modal.style.display = 'block';
     if (msgContainer) msgContainer.innerHTML = '<div class="text-center p-3">Loading messages...</div>';
 
-    fetch(`/api/queries/thread/${threadId}`)
-        .then(res => res.json())
-        .then(data => {
+    // Header and the newest page of posts; older posts are fetched on demand
+    Promise.all([
+        fetch(`/api/queries/thread/${threadId}/header`).then(res => res.json()),
+        fetch(`/api/queries/thread/${threadId}/posts`).then(res => res.json())
+    ])
+        .then(([data, page]) => {
             document.getElementById('replyStudentName').textContent = data.student_details?.full_name || 'Student';
             document.getElementById('replyStudentRoll').textContent = `Roll: ${data.student_details?.roll_number || '--'}`;
             document.getElementById('replyStudentBranch').textContent = `Branch: ${data.student_details?.branch || '--'}`;
@@ -1058,38 +1138,11 @@ function openFacultyReplyModal(threadId) {
 
             if (msgContainer) {
                 msgContainer.innerHTML = '';
-                if (!data.posts || data.posts.length === 0) {
+                if (!page.posts || page.posts.length === 0) {
                     msgContainer.innerHTML = '<p class="text-center text-muted">No messages.</p>';
                 } else {
-                    data.posts.forEach(post => {
-                        const isMe = post.role === 'faculty';
-                        const div = document.createElement('div');
-                        div.style.cssText = `display: flex; flex-direction: column; align-items: ${isMe ? 'flex-end' : 'flex-start'}; margin-bottom: 15px;`;
-
-                        let attachmentHtml = '';
-                        if (post.attachments && post.attachments.length > 0) {
-                            post.attachments.forEach(att => {
-                                const isImage = ['jpg', 'jpeg', 'png', 'gif', 'webp'].includes(att.file_type.toLowerCase());
-                                if (isImage) {
-                                    attachmentHtml += `<div style="margin-top:8px;"><img src="${att.file_url}" style="max-width:100%; border-radius:8px; cursor:pointer;" onclick="window.open(this.src)"></div>`;
-                                } else {
-                                    attachmentHtml += `<div style="margin-top:8px;"><a href="${att.file_url}" target="_blank" style="text-decoration:none; color:${isMe ? '#333' : '#0d6efd'}; font-size:0.9rem;"><i class="fas fa-file-download"></i> ${att.file_name}</a></div>`;
-                                }
-                            });
-                        }
-
-                        div.innerHTML = `
-                            <div style="background: ${isMe ? '#e9ecef' : '#e3f2fd'}; color: #333; padding: 10px 15px; border-radius: 15px; border-${isMe ? 'bottom-right' : 'bottom-left'}-radius: 0; max-width: 80%;">
-                                <div style="font-weight: 600; font-size: 0.8rem; margin-bottom: 4px; color: ${isMe ? '#495057' : '#0d6efd'};">
-                                    ${post.author_name} <span style="font-weight: normal; color: #888;">• ${post.role.toUpperCase()}</span>
-                                </div>
-                                <div style="white-space: pre-wrap;">${post.content}</div>
-                                ${attachmentHtml}
-                                <div style="font-size: 0.75rem; color: #999; text-align: right; margin-top: 5px;">${post.created_at}</div>
-                            </div>
-                        `;
-                        msgContainer.appendChild(div);
-                    });
+                    page.posts.forEach(post => msgContainer.appendChild(renderFacultyThreadPost(post)));
+                    prependEarlierFacultyPosts(msgContainer, threadId, page.before);
                     msgContainer.scrollTop = msgContainer.scrollHeight;
                 }
             }
@@ -1100,6 +1153,63 @@ function openFacultyReplyModal(threadId) {
         });
 }
 
+function renderFacultyThreadPost(post) {
+    const isMe = post.role === 'faculty';
+    const div = document.createElement('div');
+    div.style.cssText = `display: flex; flex-direction: column; align-items: ${isMe ? 'flex-end' : 'flex-start'}; margin-bottom: 15px;`;
+
+    let attachmentHtml = '';
+    if (post.attachments && post.attachments.length > 0) {
+        post.attachments.forEach(att => {
+            const isImage = ['jpg', 'jpeg', 'png', 'gif', 'webp'].includes(att.file_type.toLowerCase());
+            if (isImage) {
+                attachmentHtml += `<div style="margin-top:8px;"><img src="${att.file_url}" style="max-width:100%; border-radius:8px; cursor:pointer;" onclick="window.open(this.src)"></div>`;
+            } else {
+                attachmentHtml += `<div style="margin-top:8px;"><a href="${att.file_url}" target="_blank" style="text-decoration:none; color:${isMe ? '#333' : '#0d6efd'}; font-size:0.9rem;"><i class="fas fa-file-download"></i> ${att.file_name}</a></div>`;
+            }
+        });
+    }
+
+    div.innerHTML = `
+        <div style="background: ${isMe ? '#e9ecef' : '#e3f2fd'}; color: #333; padding: 10px 15px; border-radius: 15px; border-${isMe ? 'bottom-right' : 'bottom-left'}-radius: 0; max-width: 80%;">
+            <div style="font-weight: 600; font-size: 0.8rem; margin-bottom: 4px; color: ${isMe ? '#495057' : '#0d6efd'};">
+                ${post.author_name} <span style="font-weight: normal; color: #888;">• ${post.role.toUpperCase()}</span>
+            </div>
+            <div style="white-space: pre-wrap;">${post.content}</div>
+            ${attachmentHtml}
+            <div style="font-size: 0.75rem; color: #999; text-align: right; margin-top: 5px;">${post.created_at}</div>
+        </div>
+    `;
+    return div;
+}
+
+// Older posts come a page at a time, above the ones already shown
+function prependEarlierFacultyPosts(container, threadId, before) {
+    if (!before) return;
+    const btn = document.createElement('button');
+    btn.className = 'btn btn-secondary';
+    btn.style.cssText = 'display:block; margin: 10px auto;';
+    btn.textContent = 'Load earlier messages';
+    btn.onclick = () => {
+        btn.disabled = true;
+        fetch(`/api/queries/thread/${threadId}/posts?before=${before}`)
+            .then(res => res.json())
+            .then(page => {
+                const height = container.scrollHeight;
+                btn.remove();
+                page.posts.slice().reverse().forEach(post => container.prepend(renderFacultyThreadPost(post)));
+                prependEarlierFacultyPosts(container, threadId, page.before);
+                // Keep the messages the user was reading in place
+                container.scrollTop += container.scrollHeight - height;
+            })
+            .catch(err => {
+                console.error(err);
+                btn.disabled = false;
+            });
+    };
+    container.prepend(btn);
+}
+
 function closeFacultyReplyModal() {
     const modal = document.getElementById('facultyReplyModal');
     if (modal) modal.style.display = 'none';
@@ -120,6 +120,7 @@ document.addEventListener('DOMContentLoaded', function () {
     // loadScholarships(); // Removed
     // loadQueries(); // Removed
     loadNotifications();
+    connectEventStream();
     loadStudentTimetable();
 
     // FORCE HIDE ALL MODALS ON LOAD
@@ -423,7 +424,7 @@ function showSection(sectionId) {
             loadStudentTimetable();
             break;
         case 'scholarship':
-            // Scholarships loaded on eligibility check
+            loadScholarshipMatches();
             break;
     }
 }
@@ -554,14 +555,18 @@ function getGrade(marks) {
 }
 
 // Load notices
-function loadNotices() {
+let noticesCursor = null;
+
+function loadNotices(cursor = null) {
     const role = currentUser ? currentUser.role : 'student';
-    const department = currentUser ? currentUser.department : '';
+    let url = `/api/notices?role=${role}&limit=20`;
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
 
-    fetch(`/api/notices?role=${role}&department=${department}`)
+    fetch(url)
         .then(response => response.json())
         .then(data => {
-            updateNoticesDisplay(data);
+            noticesCursor = data.next_cursor;
+            updateNoticesDisplay(data.notices, !!cursor);
         })
         .catch(error => {
             console.error('Error loading notices:', error);
@@ -569,13 +574,13 @@ function loadNotices() {
             const mockData = [
                 {
                     title: 'Exam Schedule Released',
-                    content: 'Mid-semester examination schedule has been published. Check your exam dates.',
+                    excerpt: 'Mid-semester examination schedule has been published. Check your exam dates.',
                     notice_type: 'exam',
                     created_at: new Date(Date.now() - 2 * 60 * 60 * 1000).toISOString()
                 },
                 {
                     title: 'Holiday Announcement',
-                    content: 'College will remain closed on January 15th due to national holiday.',
+                    excerpt: 'College will remain closed on January 15th due to national holiday.',
                     notice_type: 'holiday',
                     created_at: new Date(Date.now() - 24 * 60 * 60 * 1000).toISOString()
                 }
@@ -585,11 +590,16 @@ function loadNotices() {
 }
 
 // Update notices display
-function updateNoticesDisplay(notices) {
+function updateNoticesDisplay(notices, append = false) {
     const container = document.querySelector('.notices-container');
     if (!container) return;
 
-    container.innerHTML = '';
+    if (append) {
+        const moreBtn = container.querySelector('.notices-load-more');
+        if (moreBtn) moreBtn.remove();
+    } else {
+        container.innerHTML = '';
+    }
 
     notices.forEach(notice => {
         const card = document.createElement('div');
@@ -602,12 +612,43 @@ function updateNoticesDisplay(notices) {
                 <h4>${notice.title}</h4>
                 <span class="notice-date">${timeAgo}</span>
             </div>
-            <p>${notice.content}</p>
+            <p class="notice-body">${notice.excerpt}${notice.truncated ? '...' : ''}</p>
             <span class="notice-type">${notice.notice_type.charAt(0).toUpperCase() + notice.notice_type.slice(1)} Notice</span>
         `;
 
+        if (notice.truncated) {
+            const readMore = document.createElement('a');
+            readMore.href = '#';
+            readMore.textContent = 'Read more';
+            readMore.onclick = (e) => {
+                e.preventDefault();
+                loadNoticeBody(notice.id, card.querySelector('.notice-body'));
+                readMore.remove();
+            };
+            card.appendChild(readMore);
+        }
+
         container.appendChild(card);
     });
+
+    if (noticesCursor) {
+        const btn = document.createElement('button');
+        btn.className = 'btn btn-secondary notices-load-more';
+        btn.style.cssText = 'display:block; margin: 10px auto;';
+        btn.textContent = 'Load more';
+        btn.onclick = () => loadNotices(noticesCursor);
+        container.appendChild(btn);
+    }
+}
+
+// Fetch the full text of a notice whose excerpt was truncated
+function loadNoticeBody(noticeId, target) {
+    fetch(`/api/notices/${noticeId}`)
+        .then(response => response.json())
+        .then(notice => {
+            if (notice.content) target.textContent = notice.content;
+        })
+        .catch(error => console.error('Error loading notice:', error));
 }
 
 // Get time ago string
@@ -621,6 +662,16 @@ function getTimeAgo(date) {
     return `${Math.floor(diffInSeconds / 86400)} days ago`;
 }
 
+// Show the scholarships matched to the details entered last time, if any
+function loadScholarshipMatches() {
+    fetch('/api/scholarships/matches')
+        .then(response => response.ok ? response.json() : [])
+        .then(data => {
+            if (data.length > 0) updateScholarshipsDisplay(data);
+        })
+        .catch(error => console.error('Error loading scholarship matches:', error));
+}
+
 // Find scholarships based on criteria
 function findScholarships() {
     const income = document.getElementById('searchIncome').value;
@@ -986,21 +1037,50 @@ function downloadFeeReceipt() {
 function loadNotifications() {
     if (!currentUser) return;
 
-    fetch(`/api/notifications/${currentUser.id}`)
+    // Badge only needs the counter, not the notification list
+    fetch(`/api/notifications/${currentUser.id}/unread-count`)
         .then(response => response.json())
         .then(data => {
-            updateNotificationCount(data);
+            updateNotificationCount(data.unread_count);
         })
         .catch(error => {
             console.error('Error loading notifications:', error);
         });
 }
 
+// Live updates over server-sent events instead of re-fetching lists
+let eventStream = null;
+function connectEventStream() {
+    if (eventStream || !window.EventSource) return;
+    const stored = JSON.parse(sessionStorage.getItem('userData') || '{}');
+    if (!stored.token) return;
+
+    // The URL only carries a short-lived stream token; fetch a fresh one for each connection
+    fetch('/api/events/token', { method: 'POST' })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.token || eventStream) return;
+            eventStream = new EventSource(`/api/events/stream?stream_token=${encodeURIComponent(data.token)}`);
+            // An audience-wide notice reaches many clients at once; spread out their refetches
+            eventStream.addEventListener('notification', () => setTimeout(loadNotifications, Math.random() * 3000));
+            eventStream.addEventListener('query', () => loadAcademicQueries());
+            eventStream.onerror = () => {
+                // A reconnect with an expired token is refused and not retried by the browser
+                if (eventStream.readyState === EventSource.CLOSED) {
+                    eventStream = null;
+                    setTimeout(connectEventStream, 5000);
+                }
+            };
+        })
+        .catch(error => {
+            console.error('Error opening event stream:', error);
+        });
+}
+
 // Update notification count
-function updateNotificationCount(notifications) {
+function updateNotificationCount(unreadCount) {
     const notificationCount = document.querySelector('.notification-count');
     if (notificationCount) {
-        const unreadCount = notifications.filter(n => !n.is_read).length;
         notificationCount.textContent = unreadCount;
         notificationCount.style.display = unreadCount > 0 ? 'flex' : 'none';
     }
@@ -2469,20 +2549,24 @@ function loadNotes() {
 // --- Academic Query System Logic ---
 
 let currentQueries = [];
+let queriesCursor = null;
 let currentFilter = 'all';
 let activeThreadId = null;
 
-function loadAcademicQueries() {
+function loadAcademicQueries(cursor) {
     if (!currentUser) return;
 
     // Show Loading
     const container = document.getElementById('academicQueriesList');
-    if (container) container.innerHTML = '<div class="text-center p-4">Loading queries...</div>';
+    if (container && !cursor) container.innerHTML = '<div class="text-center p-4">Loading queries...</div>';
 
-    fetch(`/api/queries/student/${currentUser.student_id || currentUser.id}`)
+    const params = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    fetch(`/api/queries/student/${currentUser.student_id || currentUser.id}${params}`)
         .then(res => res.json())
         .then(data => {
-            currentQueries = data;
+            // Pages arrive newest-first; "Load more" appends the next one
+            currentQueries = cursor ? currentQueries.concat(data.threads) : data.threads;
+            queriesCursor = data.next_cursor;
             renderQueries();
             updateQueryStats();
         })
@@ -2517,6 +2601,7 @@ function renderQueries() {
 
     if (filtered.length === 0) {
         container.innerHTML = '<div class="no-data p-4 text-center text-muted">No queries found in this category.</div>';
+        appendQueriesLoadMore(container);
         return;
     }
 
@@ -2562,6 +2647,18 @@ function renderQueries() {
         card.onclick = () => openQueryThread(q.id);
         container.appendChild(card);
     });
+
+    appendQueriesLoadMore(container);
+}
+
+function appendQueriesLoadMore(container) {
+    if (!queriesCursor) return;
+    const btn = document.createElement('button');
+    btn.className = 'btn btn-secondary';
+    btn.style.cssText = 'display:block; margin: 10px auto;';
+    btn.textContent = 'Load more';
+    btn.onclick = () => loadAcademicQueries(queriesCursor);
+    container.appendChild(btn);
 }
 
 function updateQueryStats() {
@@ -2586,10 +2683,13 @@ function openQueryThread(threadId) {
         modal.style.display = 'block';
         if (msgContainer) msgContainer.innerHTML = '<div class="text-center p-3">Loading conversation...</div>';
 
-        fetch(`/api/queries/thread/${threadId}`)
-            .then(res => res.json())
-            .then(data => {
-                renderThreadDetails(data);
+        // Header and the newest page of posts; older posts are fetched on demand
+        Promise.all([
+            fetch(`/api/queries/thread/${threadId}/header`).then(res => res.json()),
+            fetch(`/api/queries/thread/${threadId}/posts`).then(res => res.json())
+        ])
+            .then(([thread, page]) => {
+                renderThreadDetails(thread, page);
             })
             .catch(err => {
                 console.error(err);
@@ -2598,7 +2698,7 @@ function openQueryThread(threadId) {
     }
 }
 
-function renderThreadDetails(thread) {
+function renderThreadDetails(thread, page) {
     const titleEl = document.getElementById('threadTitle');
     const metaEl = document.getElementById('threadMeta');
     const statusEl = document.getElementById('threadStatusBadge');
@@ -2612,54 +2712,13 @@ function renderThreadDetails(thread) {
 
     container.innerHTML = '';
 
-    if (!thread.posts || thread.posts.length === 0) {
+    if (!page.posts || page.posts.length === 0) {
         container.innerHTML = '<p class="text-muted text-center">No messages yet.</p>';
         return;
     }
 
-    thread.posts.forEach(post => {
-        const div = document.createElement('div');
-        const isMe = post.role === 'student'; // Assuming viewer is student
-
-        div.style.cssText = `
-            display: flex; 
-            flex-direction: column; 
-            align-items: ${isMe ? 'flex-end' : 'flex-start'}; 
-            margin-bottom: 15px;
-        `;
-
-        let attachmentHtml = '';
-        if (post.attachments && post.attachments.length > 0) {
-            post.attachments.forEach(att => {
-                const isImage = ['jpg', 'jpeg', 'png', 'gif', 'webp'].includes(att.file_type.toLowerCase());
-                if (isImage) {
-                    attachmentHtml += `<div style="margin-top:8px;"><img src="${att.file_url}" style="max-width:100%; border-radius:8px; cursor:pointer;" onclick="window.open(this.src)"></div>`;
-                } else {
-                    attachmentHtml += `<div style="margin-top:8px;"><a href="${att.file_url}" target="_blank" style="text-decoration:none; color:${isMe ? '#0f5132' : '#0d6efd'}; font-size:0.9rem;"><i class="fas fa-file-download"></i> ${att.file_name}</a></div>`;
-                }
-            });
-        }
-
-        div.innerHTML = `
-            <div style="
-                background: ${isMe ? '#d1e7dd' : 'white'}; 
-                color: ${isMe ? '#0f5132' : '#333'};
-                padding: 10px 15px; 
-                border-radius: 15px; 
-                border-bottom-${isMe ? 'right' : 'left'}-radius: 0;
-                max-width: 80%; 
-                box-shadow: 0 1px 2px rgba(0,0,0,0.1);
-            ">
-                <div style="font-weight: 600; font-size: 0.8rem; margin-bottom: 4px; color: ${isMe ? '#0f5132' : '#0d6efd'};">
-                    ${post.author_name} <span style="font-weight: normal; color: #666; font-size: 0.7rem;">• ${post.role.toUpperCase()}</span>
-                </div>
-                <div style="white-space: pre-wrap;">${post.content}</div>
-                ${attachmentHtml}
-                <div style="font-size: 0.7rem; color: #888; text-align: right; margin-top: 5px;">${post.created_at}</div>
-            </div>
-        `;
-        container.appendChild(div);
-    });
+    page.posts.forEach(post => container.appendChild(renderThreadPost(post)));
+    prependEarlierPosts(container, thread.id, page.before);
 
     // Scroll to bottom
     container.scrollTop = container.scrollHeight;
@@ -2677,6 +2736,77 @@ function renderThreadDetails(thread) {
     }
 }
 
+function renderThreadPost(post) {
+    const div = document.createElement('div');
+    const isMe = post.role === 'student'; // Assuming viewer is student
+
+    div.style.cssText = `
+        display: flex; 
+        flex-direction: column; 
+        align-items: ${isMe ? 'flex-end' : 'flex-start'}; 
+        margin-bottom: 15px;
+    `;
+
+    let attachmentHtml = '';
+    if (post.attachments && post.attachments.length > 0) {
+        post.attachments.forEach(att => {
+            const isImage = ['jpg', 'jpeg', 'png', 'gif', 'webp'].includes(att.file_type.toLowerCase());
+            if (isImage) {
+                attachmentHtml += `<div style="margin-top:8px;"><img src="${att.file_url}" style="max-width:100%; border-radius:8px; cursor:pointer;" onclick="window.open(this.src)"></div>`;
+            } else {
+                attachmentHtml += `<div style="margin-top:8px;"><a href="${att.file_url}" target="_blank" style="text-decoration:none; color:${isMe ? '#0f5132' : '#0d6efd'}; font-size:0.9rem;"><i class="fas fa-file-download"></i> ${att.file_name}</a></div>`;
+            }
+        });
+    }
+
+    div.innerHTML = `
+        <div style="
+            background: ${isMe ? '#d1e7dd' : 'white'}; 
+            color: ${isMe ? '#0f5132' : '#333'};
+            padding: 10px 15px; 
+            border-radius: 15px; 
+            border-bottom-${isMe ? 'right' : 'left'}-radius: 0;
+            max-width: 80%; 
+            box-shadow: 0 1px 2px rgba(0,0,0,0.1);
+        ">
+            <div style="font-weight: 600; font-size: 0.8rem; margin-bottom: 4px; color: ${isMe ? '#0f5132' : '#0d6efd'};">
+                ${post.author_name} <span style="font-weight: normal; color: #666; font-size: 0.7rem;">• ${post.role.toUpperCase()}</span>
+            </div>
+            <div style="white-space: pre-wrap;">${post.content}</div>
+            ${attachmentHtml}
+            <div style="font-size: 0.7rem; color: #888; text-align: right; margin-top: 5px;">${post.created_at}</div>
+        </div>
+    `;
+    return div;
+}
+
+// Older posts come a page at a time, above the ones already shown
+function prependEarlierPosts(container, threadId, before) {
+    if (!before) return;
+    const btn = document.createElement('button');
+    btn.className = 'btn btn-secondary';
+    btn.style.cssText = 'display:block; margin: 10px auto;';
+    btn.textContent = 'Load earlier messages';
+    btn.onclick = () => {
+        btn.disabled = true;
+        fetch(`/api/queries/thread/${threadId}/posts?before=${before}`)
+            .then(res => res.json())
+            .then(page => {
+                const height = container.scrollHeight;
+                btn.remove();
+                page.posts.slice().reverse().forEach(post => container.prepend(renderThreadPost(post)));
+                prependEarlierPosts(container, threadId, page.before);
+                // Keep the messages the user was reading in place
+                container.scrollTop += container.scrollHeight - height;
+            })
+            .catch(err => {
+                console.error(err);
+                btn.disabled = false;
+            });
+    };
+    container.prepend(btn);
+}
+
 function submitQueryReply() {
     if (!activeThreadId || !currentUser) return;
 
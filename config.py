@@ -4,3 +4,42 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///eduportal.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    AUTH_TOKEN_MAX_AGE = 86400  # X-Auth-Token lifetime in seconds
+    STREAM_TOKEN_MAX_AGE = 60  # lifetime of the query-string token that opens an event stream
+
+    # Query attachments: content-addressed store (defaults to instance/attachments)
+    ATTACHMENT_STORE = os.environ.get('ATTACHMENT_STORE')
+    MAX_ATTACHMENT_SIZE = int(os.environ.get('MAX_ATTACHMENT_SIZE', 10 * 1024 * 1024))
+    # Generated exam schedule exports, one file per schedule version (defaults to instance/exports)
+    EXPORT_STORE = os.environ.get('EXPORT_STORE')
+
+    # Run audience-wide notification fan-outs on a background worker
+    NOTIFICATION_FANOUT_ASYNC = True
+    # Seconds an in-process unread counter is trusted before it is recounted
+    NOTIFICATION_COUNTER_TTL = 60
+
+    # Server-sent events: Redis URL for multi-worker deployments, unset for in-process only
+    EVENT_BROKER_URL = os.environ.get('EVENT_BROKER_URL')
+    SSE_KEEPALIVE = 15  # seconds between comment frames on idle streams
+
+    # Seconds between checks of the notice table for writes made by other processes
+    NOTICE_CACHE_TTL = int(os.environ.get('NOTICE_CACHE_TTL', 60))
+    # Background thread that publishes/expires notices at publish_at/expire_at
+    NOTICE_SCHEDULER_ENABLED = os.environ.get('NOTICE_SCHEDULER_ENABLED', '1') == '1'
+    NOTICE_SCHEDULER_POLL = 300  # seconds between rescans for notices scheduled elsewhere
+
+    # Seconds the in-memory club interest index is used before it is rebuilt from the table
+    CLUB_INDEX_TTL = int(os.environ.get('CLUB_INDEX_TTL', 600))
+    # Seconds memoized scholarship eligibility results are kept, for edits from other processes
+    SCHOLARSHIP_CACHE_TTL = int(os.environ.get('SCHOLARSHIP_CACHE_TTL', 600))
+
+    CURRENT_ACADEMIC_YEAR = '2025-26'
+    # Seconds a cached batch timetable is served before it is rebuilt. Bounds staleness
+    # when the table is rewritten from another process (e.g. import_timetable.py).
+    TIMETABLE_CACHE_TTL = int(os.environ.get('TIMETABLE_CACHE_TTL', 300))
+    # Upper bound on how long a cohort's cached exam list is served (status changes expire it sooner)
+    EXAM_CACHE_TTL = int(os.environ.get('EXAM_CACHE_TTL', 300))
+
+    # Hashing cost for new and upgraded passwords. Lower it if login bursts saturate
+    # the workers (see scripts/bench_login.py); outdated hashes are rehashed on login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
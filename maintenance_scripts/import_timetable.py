@@ -2,6 +2,7 @@ import csv
 import os
 from app import app, db
 from models import Timetable
+from app.services import timetable_cache
 
 def import_timetable():
     data_dir = os.path.join(os.path.dirname(__file__), 'data')
@@ -89,6 +90,8 @@ def import_timetable():
 
         try:
             db.session.commit()
+            # bulk_save_objects skips ORM events, so tell running workers explicitly
+            timetable_cache.touch_stamp()
             print(f"SUCCESS: Imported {total_records} timetable entries total.")
         except Exception as e:
             db.session.rollback()
@@ -0,0 +1,27 @@
+import sqlite3
+import os
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    # Existing rows keep content_hash NULL and are still served from their static file_url
+    for column, definition in [('content_hash', 'VARCHAR(64)'), ('file_size', 'INTEGER')]:
+        try:
+            c.execute(f"ALTER TABLE query_attachment ADD COLUMN {column} {definition}")
+            print(f"Added {column} column.")
+        except Exception as e:
+            print(f"Column {column} might already exist: {e}")
+
+    c.execute("CREATE INDEX IF NOT EXISTS ix_query_attachment_content_hash ON query_attachment (content_hash)")
+    print("Ensured index ix_query_attachment_content_hash.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
@@ -0,0 +1,51 @@
+import sqlite3
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.club_tags import split_interests
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS club_interest (
+            id INTEGER PRIMARY KEY,
+            tag VARCHAR(100) NOT NULL UNIQUE
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS club_interest_link (
+            club_id INTEGER NOT NULL,
+            interest_id INTEGER NOT NULL,
+            PRIMARY KEY (club_id, interest_id),
+            FOREIGN KEY (club_id) REFERENCES club (id) ON DELETE CASCADE,
+            FOREIGN KEY (interest_id) REFERENCES club_interest (id) ON DELETE CASCADE
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS ix_club_interest_link_interest ON club_interest_link (interest_id, club_id)")
+    print("Ensured club_interest tables and index.")
+
+    # Backfill from the comma-separated Club.interests column
+    c.execute("SELECT id, interests FROM club")
+    links = [(club_id, tag) for club_id, interests in c.fetchall() for tag in split_interests(interests)]
+    c.executemany("INSERT OR IGNORE INTO club_interest (tag) VALUES (?)", {(tag,) for _, tag in links})
+    c.execute("DELETE FROM club_interest_link")
+    c.executemany("""
+        INSERT INTO club_interest_link (club_id, interest_id)
+        SELECT ?, id FROM club_interest WHERE tag = ?
+    """, links)
+    print(f"Backfilled {len(links)} club tags ({len({tag for _, tag in links})} distinct).")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
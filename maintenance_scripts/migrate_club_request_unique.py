@@ -0,0 +1,34 @@
+import sqlite3
+import os
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    # Keep one request per student and club: approved over pending over rejected, newest first
+    c.execute("""
+        DELETE FROM club_request WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY student_id, club_id
+                    ORDER BY CASE status WHEN 'approved' THEN 0 WHEN 'pending' THEN 1 ELSE 2 END, id DESC
+                ) AS rn
+                FROM club_request
+            ) WHERE rn = 1
+        )
+    """)
+    print(f"Removed {c.rowcount} duplicate club requests.")
+
+    # SQLite can't add a table constraint in place; a unique index enforces the same thing
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_club_request_student_club ON club_request (student_id, club_id)")
+    print("Ensured unique index uq_club_request_student_club.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
@@ -0,0 +1,29 @@
+import sqlite3
+import os
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    try:
+        c.execute("ALTER TABLE club_request ADD COLUMN decided_at DATETIME")
+        print("Added decided_at column.")
+    except Exception as e:
+        print(f"Column decided_at might already exist: {e}")
+
+    # The decision time of old requests is unknown; the request time is the best bound
+    c.execute("UPDATE club_request SET decided_at = requested_at WHERE status != 'pending' AND decided_at IS NULL")
+    print(f"Backfilled decided_at on {c.rowcount} requests.")
+
+    c.execute("CREATE INDEX IF NOT EXISTS ix_club_request_club_status ON club_request (club_id, status, id)")
+    print("Ensured index ix_club_request_club_status.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
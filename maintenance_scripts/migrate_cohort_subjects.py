@@ -0,0 +1,42 @@
+import sqlite3
+import os
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS cohort_subject (
+            id INTEGER NOT NULL PRIMARY KEY,
+            semester INTEGER NOT NULL,
+            division VARCHAR(5),
+            batch VARCHAR(10),
+            academic_year VARCHAR(10),
+            subject VARCHAR(100) NOT NULL
+        )
+    """)
+    print("Ensured table cohort_subject.")
+
+    c.execute("CREATE INDEX IF NOT EXISTS ix_cohort_subject_cohort "
+              "ON cohort_subject (semester, division, batch, academic_year, subject)")
+    print("Ensured index ix_cohort_subject_cohort.")
+
+    # Same rebuild the app runs whenever Timetable is written
+    c.execute("DELETE FROM cohort_subject")
+    c.execute("""
+        INSERT INTO cohort_subject (semester, division, batch, academic_year, subject)
+        SELECT DISTINCT semester, division, batch, academic_year, trim(subject_raw)
+        FROM timetable
+        WHERE subject_raw IS NOT NULL AND trim(subject_raw) != ''
+    """)
+    print(f"Filled cohort_subject with {c.rowcount} rows.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
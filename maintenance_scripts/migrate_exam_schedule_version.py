@@ -0,0 +1,22 @@
+import sqlite3
+import os
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    try:
+        c.execute("ALTER TABLE exam_schedule ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        print("Added version to exam_schedule.")
+    except sqlite3.OperationalError as e:
+        print(f"Skipping version: {e}")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
@@ -0,0 +1,49 @@
+import sqlite3
+import os
+from datetime import datetime
+
+# SQLAlchemy's Time type on sqlite stores HH:MM:SS.ffffff text; every row must use
+# that exact format for the time range comparisons to sort correctly.
+TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%H:%M:%S.%f', '%I:%M %p')
+
+def to_time(value):
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime('%H:%M:%S.%f')
+        except ValueError:
+            continue
+    return None
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    rows = c.execute("SELECT id, start_time, end_time FROM exam_timetable").fetchall()
+    updates, unreadable = [], []
+    for row_id, start, end in rows:
+        start_value, end_value = to_time(start or ''), to_time(end or '')
+        if start_value is None or end_value is None:
+            unreadable.append(row_id)
+            continue
+        updates.append((start_value, end_value, row_id))
+    c.executemany("UPDATE exam_timetable SET start_time = ?, end_time = ? WHERE id = ?", updates)
+    print(f"Converted times on {len(updates)} exam timetable rows.")
+    if unreadable:
+        print(f"Could not parse times on rows {unreadable}; fix them by hand.")
+
+    for name, columns in [
+        ('ix_exam_timetable_date_start', 'exam_date, start_time'),
+        ('ix_exam_timetable_schedule_date', 'exam_schedule_id, exam_date, start_time'),
+    ]:
+        c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON exam_timetable ({columns})")
+        print(f"Ensured index {name}.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
@@ -0,0 +1,46 @@
+import sqlite3
+import os
+import sys
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.notice_audience import audience_keys
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS notice_audience (
+            id INTEGER PRIMARY KEY,
+            notice_id INTEGER NOT NULL,
+            audience_key VARCHAR(120) NOT NULL,
+            FOREIGN KEY (notice_id) REFERENCES notice (id) ON DELETE CASCADE
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS ix_notice_audience_key_notice ON notice_audience (audience_key, notice_id)")
+    print("Ensured notice_audience table and index.")
+
+    # Rebuild every notice's keys from its targeting columns
+    c.execute("SELECT id, visible_to, target_branch, target_semester, target_class_id FROM notice")
+    rows = []
+    for notice_id, visible_to, branch, semester, class_id in c.fetchall():
+        notice = SimpleNamespace(visible_to=visible_to, target_branch=branch,
+                                 target_semester=semester, target_class_id=class_id)
+        rows.extend((notice_id, key) for key in audience_keys(notice))
+
+    c.execute("DELETE FROM notice_audience")
+    c.executemany("INSERT INTO notice_audience (notice_id, audience_key) VALUES (?, ?)", rows)
+    print(f"Backfilled {len(rows)} audience keys.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
@@ -0,0 +1,35 @@
+import sqlite3
+import os
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    try:
+        c.execute("ALTER TABLE notice ADD COLUMN urgency_rank INTEGER NOT NULL DEFAULT 1")
+        print("Added urgency_rank column.")
+    except Exception as e:
+        print(f"Column urgency_rank might already exist: {e}")
+
+    # Same mapping as notice_audience.URGENCY_RANKS
+    c.execute("""
+        UPDATE notice SET urgency_rank = CASE urgency
+            WHEN 'urgent' THEN 3
+            WHEN 'moderate' THEN 2
+            ELSE 1
+        END
+    """)
+    print(f"Ranked {c.rowcount} notices.")
+
+    c.execute("CREATE INDEX IF NOT EXISTS ix_notice_feed ON notice (is_active, urgency_rank, created_at, id)")
+    print("Ensured index ix_notice_feed.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
@@ -0,0 +1,37 @@
+import sqlite3
+import os
+from datetime import datetime
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    try:
+        c.execute("ALTER TABLE notice ADD COLUMN is_published BOOLEAN DEFAULT 1")
+        print("Added is_published column.")
+    except Exception as e:
+        print(f"Column is_published might already exist: {e}")
+
+    # Bring is_active in line with the publish/expiry windows the feed used to filter on
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+    c.execute("UPDATE notice SET is_published = 0, is_active = 0 WHERE publish_at > ?", (now,))
+    print(f"Marked {c.rowcount} future notices as scheduled.")
+    c.execute("UPDATE notice SET is_active = 0 WHERE is_active = 1 AND expire_at <= ?", (now,))
+    print(f"Deactivated {c.rowcount} expired notices.")
+
+    for name, columns in [
+        ('ix_notice_publish_pending', 'is_published, publish_at'),
+        ('ix_notice_active_expire', 'is_active, expire_at'),
+    ]:
+        c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON notice ({columns})")
+        print(f"Ensured index {name}.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
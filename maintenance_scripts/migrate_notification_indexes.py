@@ -0,0 +1,30 @@
+import sqlite3
+import os
+
+# Keep in sync with Notification.__table_args__ in app/models.py
+INDEXES = [
+    ('ix_notification_user_read_created', 'notification', '(user_id, is_read, created_at)'),
+]
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    for name, table, columns in INDEXES:
+        try:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {columns}")
+            print(f"Ensured index {name}.")
+        except sqlite3.Error as e:
+            print(f"Error creating index {name}: {e}")
+
+    c.execute("ANALYZE notification")
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate_db()
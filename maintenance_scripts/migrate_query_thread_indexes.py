@@ -0,0 +1,33 @@
+import sqlite3
+import os
+
+# Keep in sync with the __table_args__ of the query models in app/models.py
+INDEXES = [
+    ('ix_query_thread_faculty_status_updated', 'query_thread', '(faculty_id, status, updated_at)'),
+    ('ix_query_thread_student_updated', 'query_thread', '(student_id, updated_at)'),
+    ('ix_query_post_thread', 'query_post', '(thread_id)'),
+    ('ix_query_attachment_post', 'query_attachment', '(post_id)'),
+]
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    for name, table, columns in INDEXES:
+        try:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {columns}")
+            print(f"Ensured index {name}.")
+        except sqlite3.Error as e:
+            print(f"Error creating index {name}: {e}")
+
+    c.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate_db()
@@ -0,0 +1,39 @@
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.scholarships import mask_for, CATEGORY_BITS, GENDER_BITS
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    for column in ('category_mask', 'gender_mask'):
+        try:
+            c.execute(f"ALTER TABLE scholarship ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+            print(f"Added {column} column.")
+        except Exception as e:
+            print(f"Column {column} might already exist: {e}")
+
+    rows = c.execute("SELECT id, eligible_categories, eligible_genders FROM scholarship").fetchall()
+    c.executemany("UPDATE scholarship SET category_mask = ?, gender_mask = ? WHERE id = ?", [
+        (mask_for(categories, CATEGORY_BITS), mask_for(genders, GENDER_BITS), sid)
+        for sid, categories, genders in rows
+    ])
+    print(f"Backfilled eligibility masks on {len(rows)} scholarships.")
+
+    c.execute("CREATE INDEX IF NOT EXISTS ix_scholarship_active_deadline ON scholarship (is_active, deadline)")
+    print("Ensured index ix_scholarship_active_deadline.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
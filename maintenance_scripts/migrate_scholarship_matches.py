@@ -0,0 +1,40 @@
+import sqlite3
+import os
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS scholarship_profile (
+            student_id INTEGER NOT NULL PRIMARY KEY REFERENCES student (id) ON DELETE CASCADE,
+            cgpa FLOAT NOT NULL DEFAULT 0.0,
+            family_income FLOAT,
+            category VARCHAR(20),
+            gender VARCHAR(10),
+            updated_at DATETIME
+        )
+    """)
+    print("Ensured table scholarship_profile.")
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS scholarship_match (
+            student_id INTEGER NOT NULL REFERENCES student (id) ON DELETE CASCADE,
+            scholarship_id INTEGER NOT NULL REFERENCES scholarship (id) ON DELETE CASCADE,
+            PRIMARY KEY (student_id, scholarship_id)
+        ) WITHOUT ROWID
+    """)
+    print("Ensured table scholarship_match.")
+
+    c.execute("CREATE INDEX IF NOT EXISTS ix_scholarship_match_scholarship ON scholarship_match (scholarship_id, student_id)")
+    print("Ensured index ix_scholarship_match_scholarship.")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
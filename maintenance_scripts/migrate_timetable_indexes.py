@@ -0,0 +1,33 @@
+import sqlite3
+import os
+
+# Keep in sync with Timetable.__table_args__ in app/models.py
+INDEXES = [
+    ('ix_timetable_batch_year', 'timetable', '(batch, academic_year)'),
+    ('ix_timetable_faculty_year', 'timetable', '(faculty_raw, academic_year)'),
+    ('ix_timetable_subject', 'timetable', '(subject_raw)'),
+]
+
+def migrate_db(db_path='instance/eduportal.db'):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    # Safe to re-run: existing indexes are left alone and no data is touched
+    for name, table, columns in INDEXES:
+        try:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {columns}")
+            print(f"Ensured index {name}.")
+        except sqlite3.Error as e:
+            print(f"Error creating index {name}: {e}")
+
+    c.execute("ANALYZE timetable")
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate_db()
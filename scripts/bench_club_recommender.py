@@ -0,0 +1,86 @@
+import sys
+import os
+import random
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app
+from app.extensions import db
+from app.models import Club
+from app.services import club_recommender, club_tags
+
+# Usage: python scripts/bench_club_recommender.py [clubs] [interests]
+# Compares the old per-request substring loop with the inverted index.
+
+ROUNDS = 20
+WORDS = ['coding', 'robotics', 'music', 'dance', 'drama', 'chess', 'football', 'cricket', 'design',
+         'photography', 'finance', 'debate', 'writing', 'poetry', 'gaming', 'ai', 'electronics',
+         'astronomy', 'volunteering', 'film', 'art', 'yoga', 'quiz', 'startup', 'marketing']
+
+def make_tags(rng, n):
+    return [f"{rng.choice(WORDS)} {rng.choice(WORDS)}" if rng.random() < 0.4 else rng.choice(WORDS) + str(rng.randint(0, 200))
+            for _ in range(n)]
+
+def make_app(clubs):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    rng = random.Random(42)
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Club), [{
+            'name': f'Club {i}', 'description': 'Benchmark club', 'category': 'technical',
+            'interests': ', '.join(make_tags(rng, rng.randint(3, 10))), 'is_active': True
+        } for i in range(clubs)])
+        db.session.commit()
+        club_tags.backfill()
+    return app
+
+def legacy_loop(user_interests):
+    # recommend_clubs before the index: every club, every tag, every request
+    recommendations = []
+    for club in Club.query.all():
+        if not club.interests:
+            continue
+        club_tags = [tag.strip().lower() for tag in club.interests.split(',')]
+        matching_tags = []
+        for interest in user_interests:
+            interest_lower = interest.lower()
+            for tag in club_tags:
+                if interest_lower == tag or interest_lower in tag or tag in interest_lower:
+                    if tag not in matching_tags:
+                        matching_tags.append(tag)
+        if matching_tags:
+            recommendations.append({'club': club.id, 'match_score': len(matching_tags)})
+    recommendations.sort(key=lambda x: x['match_score'], reverse=True)
+    return recommendations
+
+def timed(label, fn):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / ROUNDS
+    print(f"{label:34s} {elapsed * 1000:9.2f} ms/request  ({len(result)} results)")
+
+def benchmark(clubs=5000, interests=50):
+    app = make_app(clubs)
+    rng = random.Random(7)
+    user_interests = make_tags(rng, interests)
+    with app.app_context():
+        start = time.perf_counter()
+        index = club_recommender.build_index()
+        print(f"{clubs} clubs, {len(index.tags)} distinct tags, {interests} interests; "
+              f"index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+        timed("legacy loop (all matches)", lambda: legacy_loop(user_interests))
+        timed("inverted index, top 20", lambda: club_recommender.recommend(user_interests, 20))
+        timed("inverted index, top 20, TF-IDF", lambda: club_recommender.recommend(user_interests, 20, tfidf=True))
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+              int(sys.argv[2]) if len(sys.argv) > 2 else 50)
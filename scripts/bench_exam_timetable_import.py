@@ -0,0 +1,74 @@
+import sys
+import os
+import tempfile
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+
+from config import Config
+from app import create_app
+from app.extensions import db
+from app.models import ExamSchedule, ExamTimetable
+from app.services import exam_conflicts, exam_timetable
+
+# Usage: python scripts/bench_exam_timetable_import.py [rows]
+# Imports an exam plan twice (fresh rows, then the same rows as updates) and counts statements.
+
+def make_app():
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(ExamSchedule(name='Bench', academic_year='2025-26', start_date=date(2026, 11, 1),
+                                    end_date=date(2026, 11, 30)))
+        db.session.commit()
+    return app
+
+def make_rows(n, with_ids=False):
+    return [dict({'id': i + 1} if with_ids else {}, exam_schedule_id=1, exam_date=f'2026-11-{1 + i // 20:02d}',
+                 subject_name=f'Subject {i}', start_time='10:00', end_time='13:00',
+                 room_number=f'R{i % 20}', faculty_id=i % 20 + 1) for i in range(n)]
+
+def per_row(entries):
+    # manage_timetable before the batch path: a get() per entry, add() per new row
+    for entry in entries:
+        existing = ExamTimetable.query.get(entry['id']) if entry.get('id') else None
+        if existing:
+            existing.room_number = entry['room_number']
+        else:
+            db.session.add(ExamTimetable(**exam_timetable.parse_fields(entry)))
+    db.session.commit()
+
+def batched(entries):
+    batch = exam_timetable.prepare(entries)
+    assert not batch.errors
+    exam_conflicts.check_submission(batch.slots, batch.replacing_ids)
+    exam_timetable.apply(batch)
+    db.session.commit()
+
+def timed(label, fn, entries, statements):
+    statements.clear()
+    start = time.perf_counter()
+    fn(entries)
+    elapsed = time.perf_counter() - start
+    print(f"{label:36s} {elapsed * 1000:8.1f} ms  {len(statements):5d} statements")
+
+def benchmark(rows=400):
+    app = make_app()
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        for label, fn in (('per-row get/add', per_row), ('prepare + bulk mappings', batched)):
+            db.session.query(ExamTimetable).delete()
+            db.session.commit()
+            timed(f"{label}, {rows} inserts", fn, make_rows(rows), statements)
+            timed(f"{label}, {rows} updates", fn, make_rows(rows, with_ids=True), statements)
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
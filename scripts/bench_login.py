@@ -0,0 +1,64 @@
+import sys
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app
+from app.extensions import db
+from app.models import User, Student
+from werkzeug.security import generate_password_hash
+
+# Usage: python scripts/bench_login.py [users] [workers] [method ...]
+DEFAULT_METHODS = ['scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:260000']
+
+def make_app(method, users):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+        PASSWORD_HASH_METHOD = method
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        pwhash = generate_password_hash('Student@123', method=method)
+        for i in range(users):
+            user = User(username=f'bench{i}', email=f'bench{i}@example.com', password_hash=pwhash,
+                        role='student', full_name=f'Bench Student {i}')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Student(user_id=user.id, roll_number=f'R{i}', enrollment_number=f'E{i}',
+                                   branch='CE', batch='A1', admission_year=2024))
+        db.session.commit()
+    return app
+
+def login_storm(app, users, workers):
+    def login(i):
+        with app.test_client() as client:
+            res = client.post('/api/login', json={'username': f'bench{i}', 'password': 'Student@123', 'role': 'student'})
+            return res.status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        ok = sum(pool.map(login, range(users)))
+    elapsed = time.perf_counter() - start
+    return ok, elapsed
+
+def benchmark(users=200, workers=8, methods=None):
+    print(f"{users} concurrent logins over {workers} worker threads")
+    for method in methods or DEFAULT_METHODS:
+        app = make_app(method, users)
+        ok, elapsed = login_storm(app, users, workers)
+        print(f"{method:24s} {ok}/{users} ok  {elapsed:7.2f} s  {users / elapsed:8.1f} logins/s  "
+              f"{elapsed / users * workers * 1000:7.1f} ms/login/worker")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    benchmark(
+        int(args[0]) if len(args) > 0 else 200,
+        int(args[1]) if len(args) > 1 else 8,
+        args[2:] or None
+    )
@@ -0,0 +1,78 @@
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app
+from app.extensions import db
+from app.models import User, Student, Notification
+from app.services.notifications import fan_out, notify
+
+# Usage: python scripts/bench_notifications.py [recipients]
+
+def make_app(recipients):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(User), [{
+            'id': i + 1, 'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': '-',
+            'role': 'student', 'full_name': f'Bench Student {i}', 'is_active': True
+        } for i in range(recipients)])
+        db.session.execute(db.insert(Student), [{
+            'user_id': i + 1, 'roll_number': f'R{i}', 'enrollment_number': f'E{i}', 'current_semester': 4,
+            'branch': 'CE', 'division': 'ABC'[i % 3], 'batch': f'{"ABC"[i % 3]}{i % 4 + 1}',
+            'admission_year': 2024, 'function': 1
+        } for i in range(recipients)])
+        db.session.commit()
+    return app
+
+def timed(label, fn, expected):
+    db.session.query(Notification).delete()
+    db.session.commit()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    count = Notification.query.count()
+    print(f"{label:32s} {elapsed * 1000:9.1f} ms  ({count}/{expected} rows)")
+
+def orm_loop():
+    # What publish_exam_schedule in old_app.py did
+    for student in Student.query.filter_by(function=1).all():
+        db.session.add(Notification(user_id=student.user_id, title='Exam Schedule Released',
+                                    message='The schedule has been published.', notification_type='exam'))
+    db.session.commit()
+
+def executemany_chunks():
+    user_ids = [uid for (uid,) in db.session.query(Student.user_id).filter(Student.function == 1)]
+    notify(user_ids, 'Exam Schedule Released', 'The schedule has been published.', 'exam')
+    db.session.commit()
+
+def insert_select():
+    fan_out({'role': 'student'}, 'Exam Schedule Released', 'The schedule has been published.', 'exam',
+            background=False)
+
+def background_return():
+    start = time.perf_counter()
+    future = fan_out({'role': 'student'}, 'Exam Schedule Released', 'The schedule has been published.', 'exam',
+                     background=True)
+    print(f"{'  request returns after':32s} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    future.result()
+
+def benchmark(recipients=10000):
+    app = make_app(recipients)
+    with app.app_context():
+        print(f"Fan-out to {recipients} students")
+        timed("ORM add() per student", orm_loop, recipients)
+        timed("executemany in chunks", executemany_chunks, recipients)
+        timed("INSERT ... SELECT", insert_select, recipients)
+        timed("INSERT ... SELECT (background)", background_return, recipients)
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,81 @@
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app
+from app.extensions import db
+from app.models import Scholarship, ScholarshipProfile
+from app.services import scholarship_matcher
+from app.services.scholarships import mask_for, CATEGORY_BITS, GENDER_BITS
+
+# Usage: python scripts/bench_scholarship_matcher.py [students] [scholarships]
+# Times the batch matcher against a per-pair Python loop.
+
+CATEGORIES = ['general', 'obc', 'sc', 'st', 'ews']
+GENDERS = ['male', 'female', 'other']
+
+def make_app(students, scholarships):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    rng = random.Random(42)
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        rows = []
+        for i in range(scholarships):
+            categories = 'all' if rng.random() < 0.3 else ','.join(rng.sample(CATEGORIES, rng.randint(1, 3)))
+            genders = 'all' if rng.random() < 0.6 else rng.choice(GENDERS)
+            rows.append({
+                'name': f'Scholarship {i}', 'description': 'Benchmark', 'category': 'merit',
+                'min_cgpa': rng.choice([0, 5, 6, 6.5, 7, 7.5, 8, 8.5, 9]),
+                'max_family_income': rng.choice([0, 100000, 250000, 450000, 600000, 800000, 1000000, 2500000]),
+                'eligible_categories': categories, 'eligible_genders': genders,
+                'category_mask': mask_for(categories, CATEGORY_BITS), 'gender_mask': mask_for(genders, GENDER_BITS),
+                'amount': 10000, 'eligibility_criteria': 'Benchmark', 'deadline': date.today() + timedelta(days=rng.randint(1, 90)), 'is_active': True
+            })
+        db.session.execute(db.insert(Scholarship), rows)
+        db.session.execute(db.insert(ScholarshipProfile), [{
+            'student_id': i + 1, 'cgpa': round(rng.uniform(5, 10), 2),
+            'family_income': rng.randint(50, 3000) * 1000 if rng.random() < 0.9 else None,
+            'category': rng.choice(CATEGORIES), 'gender': rng.choice(GENDERS)
+        } for i in range(students)])
+        db.session.commit()
+    return app
+
+def per_pair_loop(profiles, schols):
+    return sum(1 for p in profiles for s in schols if scholarship_matcher.eligible(p, s))
+
+def count_pairs(matches):
+    return sum(len(ids) for _, ids in matches)
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:34s} {(time.perf_counter() - start) * 1000:9.1f} ms  ({result} matches)")
+
+def benchmark(students=50000, scholarships=500):
+    app = make_app(students, scholarships)
+    with app.app_context():
+        profiles = scholarship_matcher.load_profiles()
+        schols = scholarship_matcher.load_scholarships()
+        print(f"{len(profiles)} profiles x {len(schols)} open scholarships")
+        timed("per-pair Python loop", lambda: per_pair_loop(profiles, schols))
+        timed("grouped by band key", lambda: count_pairs(scholarship_matcher.match_grouped(profiles, schols)))
+        if scholarship_matcher.np is not None:
+            timed("NumPy broadcast", lambda: sum(len(ids) for ids, _ in scholarship_matcher.match_numpy(profiles, schols)))
+        else:
+            print("NumPy broadcast                    (numpy not installed)")
+        stats = scholarship_matcher.run()
+        print(f"{'full run() incl. table rewrite':34s} {stats['seconds'] * 1000:9.1f} ms  ({stats['matches']} matches, {stats['engine']})")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+              int(sys.argv[2]) if len(sys.argv) > 2 else 500)
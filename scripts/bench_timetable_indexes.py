@@ -0,0 +1,74 @@
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from maintenance_scripts.migrate_timetable_indexes import migrate_db
+
+QUERIES = {
+    'student (batch, year)': (
+        "SELECT * FROM timetable WHERE batch = ? AND academic_year = ? ORDER BY id",
+        ('B7', '2025-26')
+    ),
+    'faculty (faculty_raw, year)': (
+        "SELECT * FROM timetable WHERE faculty_raw = ? AND academic_year = ?",
+        ('F042', '2025-26')
+    ),
+    'common subjects (DISTINCT)': (
+        "SELECT DISTINCT subject_raw FROM timetable",
+        ()
+    ),
+}
+
+def build_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE timetable (
+            id INTEGER PRIMARY KEY, division VARCHAR(5), batch VARCHAR(10),
+            day_of_week VARCHAR(15), time_slot VARCHAR(50), subject_raw VARCHAR(100),
+            faculty_raw VARCHAR(100), room_number VARCHAR(50), semester INTEGER NOT NULL,
+            academic_year VARCHAR(10)
+        )
+    """)
+    years = ['2023-24', '2024-25', '2025-26']
+    days = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
+    conn.executemany(
+        "INSERT INTO timetable (division, batch, day_of_week, time_slot, subject_raw, faculty_raw, room_number, semester, academic_year) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(
+            random.choice('ABC'), f"B{random.randint(0, 199)}", random.choice(days), '09:00 - 10:00',
+            f"SUB{random.randint(0, 299)}", f"F{random.randint(0, 399):03d}", str(random.randint(100, 500)),
+            random.randint(1, 8), random.choice(years)
+        ) for _ in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+def run(path, label, repeat=200):
+    conn = sqlite3.connect(path)
+    print(f"\n== {label} ==")
+    for name, (sql, params) in QUERIES.items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name:30s} {elapsed:8.3f} ms  plan: {' | '.join(p[-1] for p in plan)}")
+    conn.close()
+
+def benchmark(rows=200000):
+    random.seed(42)
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    print(f"Building timetable with {rows} rows at {path}...")
+    build_db(path, rows)
+
+    run(path, "Before migration")
+    migrate_db(path)
+    run(path, "After migration")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,112 @@
+import sys
+import os
+import logging
+import resource
+import selectors
+import socket
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.serving import make_server
+
+from config import Config
+from app import create_app
+from app.extensions import db
+from app.services.auth import issue_stream_token
+from app.services.notifications import audience_channel
+
+# Usage: python scripts/loadtest_sse.py [connections]
+# Opens N idle /api/events/stream connections against a threaded dev server, checks
+# they stay idle, then times one everyone-audience event reaching all of them.
+
+BATCH = 100
+
+class LoadTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SSE_KEEPALIVE = 30
+    STREAM_TOKEN_MAX_AGE = 600  # tokens are issued up front for every connection
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def open_stream(port, token):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(
+        f"GET /api/events/stream?stream_token={token} HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    sock.setblocking(False)
+    return sock
+
+def read_until(sel, socks, marker, timeout):
+    """Read from every socket until each has seen ``marker``; returns how many did."""
+    pending = set(socks)
+    buffers = {s: b'' for s in socks}
+    deadline = time.perf_counter() + timeout
+    while pending and time.perf_counter() < deadline:
+        for key, _ in sel.select(timeout=0.5):
+            sock = key.fileobj
+            try:
+                data = sock.recv(65536)
+            except BlockingIOError:
+                continue
+            buffers[sock] = buffers.get(sock, b'') + data
+            if sock in pending and marker in buffers[sock]:
+                pending.discard(sock)
+    return len(socks) - len(pending)
+
+def loadtest(connections=2000):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, connections * 2 + 256)), hard))
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = create_app(LoadTestConfig)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with app.app_context():
+        # The stream looks up the student profile to pick its audience channels
+        db.create_all()
+        tokens = [issue_stream_token({'user_id': i + 1, 'role': 'student', 'student_id': i + 1, 'faculty_id': None})
+                  for i in range(connections)]
+    hub = app.extensions['event_hub']
+
+    base_rss = rss_mb()
+    sel = selectors.DefaultSelector()
+    socks = []
+    start = time.perf_counter()
+    for i in range(0, connections, BATCH):
+        batch = [open_stream(port, token) for token in tokens[i:i + BATCH]]
+        for sock in batch:
+            sel.register(sock, selectors.EVENT_READ)
+        socks.extend(batch)
+        read_until(sel, batch, b'retry:', timeout=30)
+    print(f"Opened {len(socks)} streams in {time.perf_counter() - start:.2f} s; "
+          f"hub subscribers: {hub.connection_count()}")
+
+    # Idle period: the server threads should be parked on their queues
+    cpu_before = time.process_time()
+    time.sleep(5)
+    print(f"Idle 5 s: CPU used {time.process_time() - cpu_before:.3f} s, "
+          f"threads {threading.active_count()}, RSS +{rss_mb() - base_rss:.1f} MB")
+
+    start = time.perf_counter()
+    hub.publish(audience_channel({}), 'notification', {'title': 'Load test'})
+    delivered = read_until(sel, socks, b'event: notification', timeout=60)
+    print(f"Broadcast reached {delivered}/{len(socks)} streams in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for sock in socks:
+        sel.unregister(sock)
+        sock.close()
+    time.sleep(1)
+    server.shutdown()
+
+if __name__ == "__main__":
+    loadtest(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
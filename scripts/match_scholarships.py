@@ -0,0 +1,21 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services import scholarship_matcher
+
+# Usage: python scripts/match_scholarships.py
+# Rebuilds the ScholarshipMatch table; run it after editing scholarships (e.g. nightly).
+
+def main():
+    app = create_app()
+    with app.app_context():
+        stats = scholarship_matcher.run()
+        print(f"Matched {stats['students']} students against {stats['scholarships']} open scholarships: "
+              f"{stats['matches']} matches in {stats['seconds']} s ({stats['engine']}).")
+
+if __name__ == "__main__":
+    main()